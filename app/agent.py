@@ -0,0 +1,156 @@
+# app/agent.py
+"""
+Headless scan agent.
+
+Runs on a host inside a remote L2 segment, leases shards of the ranges
+assigned to its site from the central API, probes them locally (ICMP
+with an nmap ARP fallback by default; see --backend and
+app.services.probes) and posts the results back in batches. It needs no database or app settings, only
+the API URL and an agent token:
+
+    python -m app.agent --server https://ipmap.example --token $TOKEN --site branch-1
+
+Several agents (or several processes on one machine, each with its own
+--name) can serve the same site; the server hands each shard to one of
+them and requeues it if its lease runs out.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import urllib.error
+import urllib.request
+
+from app.services.hosts import iter_hosts
+from app.services.neighbours import ARP_TABLE_PATH
+from app.services.probes import probe_hosts, make_backend, ArpTableBackend, BACKENDS
+from app.services.ratelimit import TokenBucket, Pacer
+
+logger = logging.getLogger("app.agent")
+
+
+class AgentClient:
+    """Minimal JSON client for the /api/agents endpoints (blocking; run in a thread)."""
+
+    def __init__(self, server: str, token: str, name: str):
+        self.server = server.rstrip("/")
+        self.token  = token
+        self.name   = name
+
+    def post(self, path: str, body: dict):
+        body = {"agent": self.name, **body}
+        req = urllib.request.Request(
+            f"{self.server}/api/agents{path}",
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json", "X-Agent-Token": self.token},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            return json.loads(resp.read() or b"null")
+
+
+async def scan_shard(client: AgentClient, shard: dict, args, pacer: Pacer | None = None) -> None:
+    net = ipaddress.ip_network(shard["cidr"], strict=False)
+    options = dict(
+        timeout=args.icmp_timeout,
+        batch_size=args.icmp_batch_size,
+        concurrency=args.icmp_batch_size,
+        retries=args.icmp_retries,
+        ports=[int(p) for p in args.tcp_ports.split(",") if p.strip()],
+        arp_path=args.arp_path,
+        v6_path=args.v6_path,
+    )
+    results = await probe_hosts(
+        iter_hosts(shard["cidr"]),
+        make_backend(args.backend, pacer, **options),
+        fallback=make_backend(args.fallback, pacer, **options) if args.fallback != "none" else None,
+        macs=ArpTableBackend(args.arp_path, args.v6_path),
+        include_v6=net.version == 6,
+    )
+
+    rows = [
+        {
+            "ip":          ip,
+            "status":      rec["status"],
+            "rtt_ms":      rec.get("rtt_ms"),
+            "mac_address": rec.get("mac_address"),
+            "hostname":    rec.get("hostname"),
+        }
+        for ip, rec in results.items()
+    ]
+    batches = [rows[i:i + args.batch] for i in range(0, len(rows), args.batch)] or [[]]
+    for n, batch in enumerate(batches, 1):
+        await asyncio.to_thread(
+            client.post,
+            f"/shards/{shard['id']}/results",
+            {"hosts": batch, "final": n == len(batches)},
+        )
+    up = sum(1 for r in rows if r["status"] == "Up")
+    logger.info("shard %s (%s): %d/%d up", shard["id"], shard["cidr"], up, len(rows))
+
+
+async def run(args) -> None:
+    client = AgentClient(args.server, args.token, args.name)
+    pacer  = Pacer(TokenBucket(args.max_pps, args.burst or None)) if args.max_pps else None
+    while True:
+        try:
+            shards = await asyncio.to_thread(
+                client.post, "/lease", {"site": args.site, "max_shards": args.shards},
+            )
+        except (urllib.error.URLError, OSError) as exc:
+            logger.warning("lease failed: %s", exc)
+            shards = []
+
+        if not shards:
+            if args.once:
+                return
+            await asyncio.sleep(args.poll)
+            continue
+
+        for shard in shards:
+            try:
+                await scan_shard(client, shard, args, pacer)
+            except Exception as exc:
+                logger.exception("shard %s (%s) failed", shard["id"], shard["cidr"])
+                try:
+                    await asyncio.to_thread(
+                        client.post, f"/shards/{shard['id']}/fail", {"error": repr(exc)},
+                    )
+                except (urllib.error.URLError, OSError):
+                    # the lease will simply expire and be retried
+                    pass
+
+
+def main() -> None:
+    env = os.environ.get
+    ap = argparse.ArgumentParser(description="Lease and scan range shards for a site.")
+    ap.add_argument("--server", default=env("AGENT_SERVER", "http://localhost:8000"))
+    ap.add_argument("--token", default=env("AGENT_TOKEN"), required=not env("AGENT_TOKEN"))
+    ap.add_argument("--site", default=env("AGENT_SITE"), required=not env("AGENT_SITE"))
+    ap.add_argument("--name", default=env("AGENT_NAME", f"{socket.gethostname()}-{os.getpid()}"))
+    ap.add_argument("--shards", type=int, default=1, help="shards leased per request")
+    ap.add_argument("--batch", type=int, default=500, help="hosts per results POST")
+    ap.add_argument("--poll", type=float, default=10.0, help="seconds between lease attempts when idle")
+    ap.add_argument("--once", action="store_true", help="exit when no work is left")
+    ap.add_argument("--backend", choices=list(BACKENDS), default="icmp")
+    ap.add_argument("--fallback", choices=[*BACKENDS, "none"], default="nmap")
+    ap.add_argument("--tcp-ports", default="22,80,443,445,3389")
+    ap.add_argument("--icmp-timeout", type=float, default=1.0)
+    ap.add_argument("--icmp-batch-size", type=int, default=256)
+    ap.add_argument("--icmp-retries", type=int, default=1)
+    ap.add_argument("--max-pps", type=float, default=0, help="probe packets per second (0 = unlimited)")
+    ap.add_argument("--burst", type=float, default=0, help="packets sent at once under --max-pps")
+    ap.add_argument("--arp-path", default=ARP_TABLE_PATH)
+    ap.add_argument("--v6-path", default=None)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
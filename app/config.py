@@ -15,6 +15,10 @@ class Settings(BaseSettings):
     mysql_db: str
     mysql_user: str
     mysql_pass: str
+    mysql_replica_host: str | None = Field(
+        None, description="Read replica serving GET listings (default: read from the primary)"
+    )
+    mysql_replica_port: int | None = Field(None, description="Read replica port (default: mysql_port)")
 
     # Cookie / Auth
     cookie_name: str = Field("access_token", description="Name of the auth cookie")
@@ -22,6 +26,86 @@ class Settings(BaseSettings):
     cookie_max_age: int = Field(60 * 60 * 24, description="Cookie validity in seconds")
     cookie_domain: str | None = Field(None, description="Domain for the auth cookie")
 
+    # Scanner
+    icmp_timeout: float = Field(1.0, description="Seconds to wait for an ICMP echo reply")
+    icmp_batch_size: int = Field(256, description="Max ICMP echo requests in flight per sweep")
+    icmp_retries: int = Field(1, description="Extra echo attempts for hosts that stay silent")
+    probe_backend: str = Field("icmp", description="Liveness probe: icmp, tcp, arp or nmap")
+    probe_fallback: str = Field("nmap", description="Second probe for silent hosts: icmp, tcp, arp, nmap or none")
+    probe_tcp_ports: str = Field("22,80,443,445,3389", description="Ports tried by the tcp backend")
+    probe_max_pps: float = Field(0, description="Global cap on probe packets (and PTR queries) per second; 0 = unlimited")
+    probe_burst: float = Field(0, description="Packets the global cap lets through at once; 0 = a tenth of a second's worth")
+    probe_range_pps: float = Field(0, description="Default per-range probe packets per second; 0 = unlimited")
+    probe_range_burst: float = Field(0, description="Burst allowed by each per-range cap; 0 = a tenth of a second's worth")
+    neighbour_table_path: str = Field("/proc/net/arp", description="IPv4 neighbour table to snapshot")
+    neighbour_v6_path: str | None = Field(None, description="Saved `ip -6 neigh` dump (default: run it)")
+    scan_chunk_size: int = Field(1024, description="Addresses probed and persisted per pipeline chunk")
+    scan_pipeline_depth: int = Field(2, description="Probed chunks allowed to wait for persistence")
+    scan_checkpoint_max_age: int = Field(
+        86400, description="Seconds after which an interrupted sweep starts over instead of resuming"
+    )
+    scan_checkpoint_stale_after: int = Field(
+        120, description="Seconds without a heartbeat after which a sweep counts as dead and may be resumed"
+    )
+    scan_resume_on_start: bool = Field(True, description="Resume interrupted sweeps when the app starts")
+    scan_db_chunk_size: int = Field(500, description="Rows per multi-row INSERT when persisting a scan")
+    scan_worker: str = Field(
+        "process",
+        description="'process' runs scan jobs in the host's shared scan worker; 'inline' on the API event loop "
+                    "(single-process deployments only: rate caps and the DNS cache are then per process)",
+    )
+    scan_worker_socket: str = Field("/tmp/ipmap-scan-worker.sock", description="Unix socket of the shared scan worker")
+    scan_worker_idle_exit: float = Field(
+        300, description="Seconds the scan worker stays up with no API process connected and no job running"
+    )
+    scan_max_ranges: int = Field(8, description="Ranges scanned concurrently by one scan_nets run")
+    scan_probe_budget: int = Field(1024, description="ICMP echoes in flight across all concurrent ranges")
+    scan_db_writers: int = Field(4, description="Ranges allowed to write scan results at the same time")
+    dns_cache_ttl: float = Field(3600, description="Seconds to cache a resolved PTR name")
+    dns_negative_ttl: float = Field(300, description="Seconds to cache NXDOMAIN / timed-out lookups")
+    dns_timeout: float = Field(2.0, description="Per-lookup reverse-DNS timeout in seconds")
+    dns_concurrency: int = Field(32, description="Max reverse-DNS lookups in flight")
+    oui_index_path: str = Field("app/data/oui.idx", description="Compiled OUI vendor index")
+    oui_source_path: str | None = Field(None, description="Wireshark manuf file (default: the manuf package's)")
+    history_mode: str = Field(
+        "transitions",
+        description="'transitions' stores state intervals; 'snapshot' appends a row per host per scan",
+    )
+    adaptive_probing: bool = Field(
+        False, description="Probe long-dormant addresses less often and less thoroughly"
+    )
+    adaptive_dormant_after: int = Field(
+        86400, description="Seconds Down (or never Up) after which an address counts as dormant"
+    )
+    adaptive_dormant_interval: int = Field(
+        3600, description="Seconds between (ICMP-only) probes of a dormant address"
+    )
+    metrics_token: str = Field(
+        "", description="Bearer token Prometheus sends to GET /metrics (empty disables the endpoint)"
+    )
+    agent_tokens: str = Field(
+        "", description="Comma-separated tokens accepted from scan agents (empty disables the agent API)"
+    )
+    agent_shard_prefix: int = Field(24, description="Prefix length ranges are sliced into for agents")
+    agent_lease_seconds: int = Field(120, description="Seconds an agent holds a shard without reporting")
+    agent_max_attempts: int = Field(3, description="Leases per shard before it is marked failed")
+    scheduler_enabled: bool = Field(True, description="Run per-range scheduled scans in this process")
+    scheduler_tick: float = Field(15.0, description="Seconds between checks for due ranges")
+    scheduler_jitter: float = Field(0.1, description="Random +/- fraction applied to each range's interval")
+    page_default_limit: int = Field(100, description="Rows per page when a cursor is given without a limit")
+    page_max_limit: int = Field(1000, description="Largest page a list endpoint returns")
+    page_count_limit: int = Field(10000, description="Rows counted at most for a page's total")
+    # Retention
+    retention_enabled: bool = Field(True, description="Prune old history and scan_runs rows in the background")
+    history_retention_days: int = Field(14, description="Days a history interval is kept after it ended")
+    scan_runs_retention_days: int = Field(90, description="Days scan_runs timing rows are kept")
+    rollups_enabled: bool = Field(True, description="Maintain hourly/daily availability rollups as scans land")
+    rollup_hourly_retention_days: int = Field(90, description="Days hourly availability rollups are kept")
+    rollup_daily_retention_days: int = Field(730, description="Days daily availability rollups are kept")
+    retention_interval: float = Field(3600, description="Seconds between retention passes")
+    retention_batch_size: int = Field(5000, description="Primary-key window deleted per retention transaction")
+    retention_pause: float = Field(0.2, description="Seconds to pause between retention batches")
+
     @property
     def db_uri(self) -> str:
         """
@@ -34,6 +118,18 @@ class Settings(BaseSettings):
             f"@{self.mysql_host}:{self.mysql_port}/{self.mysql_db}"
         )
 
+    @property
+    def db_replica_uri(self) -> str | None:
+        """Same as `db_uri` but for the read replica; None when none is configured."""
+        if not self.mysql_replica_host:
+            return None
+        pwd = quote_plus(self.mysql_pass)
+        port = self.mysql_replica_port or self.mysql_port
+        return (
+            f"mysql+aiomysql://{self.mysql_user}:{pwd}"
+            f"@{self.mysql_replica_host}:{port}/{self.mysql_db}"
+        )
+
 # URL where the Snipe-IT UI lives:
     SNIPE_UI:    str
     # Base URL for the Snipe-IT API:
@@ -1,3 +1,4 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -14,6 +15,28 @@ AsyncSessionLocal: sessionmaker[AsyncSession] = sessionmaker(
     class_=AsyncSession,
 )
 
+# GET listings read from the replica when one is configured, else from
+# a pool of their own on the primary
+read_engine = create_async_engine(
+    settings.db_replica_uri or settings.db_uri,
+    echo=False,
+    pool_pre_ping=True,
+)
+
+@event.listens_for(read_engine.sync_engine, "connect")
+def _read_only(dbapi_conn, _record):
+    # once per connection, so a stray write fails instead of landing
+    cursor = dbapi_conn.cursor()
+    cursor.execute("SET SESSION TRANSACTION READ ONLY")
+    cursor.close()
+
+ReadSessionLocal: sessionmaker[AsyncSession] = sessionmaker(
+    read_engine,
+    expire_on_commit=False,
+    autoflush=False,
+    class_=AsyncSession,
+)
+
 async def get_db():
     """
     FastAPI dependency: yields an AsyncSession, then
@@ -28,3 +51,15 @@ async def get_db():
         raise
     finally:
         await session.close()
+
+async def get_read_db():
+    """
+    FastAPI dependency for handlers that only read: yields an
+    AsyncSession on the read engine, whose connections are read-only,
+    never flushes or commits, and just closes.
+    """
+    session: AsyncSession = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -1,6 +1,8 @@
 # app/main.py
 
 
+import logging
+from contextlib import asynccontextmanager
 from pydantic.json import ENCODERS_BY_TYPE
 from datetime import datetime, timezone
 # -- ensure all datetimes are emitted as UTC ISO strings with offset --
@@ -20,6 +22,9 @@ templates.env.globals['get_hardware_id'] = get_hardware_id
 templates.env.globals['SNIPE_UI']       = settings.SNIPE_UI
 
 from app.config import settings
+from app.services.scheduler import scheduler
+from app.services.retention import pruner
+from app.services.worker import scan_worker
 from app.routers.admins import router as admins_router
 from app.routers.health import router as health_router
 from app.routers import (
@@ -33,10 +38,39 @@ from app.routers import (
     history,
     map as ip_map,
     ranges,
+    agents,
+    metrics,
+    availability,
 )
 
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the shared scan worker runs every job and relays live events to
+    # every API process (see app/services/worker.py)
+    if settings.scan_worker == "process":
+        scan_worker.start()
+    # per-range scheduled scans (see app/services/scheduler.py)
+    if settings.scheduler_enabled:
+        scheduler.start()
+    # sweeps cut short by the last shutdown continue from their checkpoint
+    if settings.scan_resume_on_start:
+        try:
+            await scheduler.resume_interrupted()
+        except Exception:
+            logger.exception("could not resume interrupted scans")
+    # history / scan_runs retention, off the request and scan paths
+    if settings.retention_enabled:
+        pruner.start()
+    yield
+    await scheduler.stop()
+    await pruner.stop()
+    await scan_worker.stop()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.app_name)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
     # Serve your CSS/images folder at /css
     app.mount(
@@ -55,11 +89,14 @@ def create_app() -> FastAPI:
     app.include_router(servers.router, prefix="/api")
     app.include_router(ips.router, prefix="/api", tags=["ips"])
     app.include_router(history.router, prefix="/api", tags=["history"])
+    app.include_router(availability.router, prefix="/api", tags=["availability"])
     app.include_router(ip_map.router)
     app.include_router(ranges.router)
     app.include_router(admins_router)
     app.include_router(health_router)
     app.include_router(live.router, prefix="/api", tags=["live"])
+    app.include_router(agents.router)
+    app.include_router(metrics.router)
 
 
     # Global exception handler to redirect unauthorized HTML requests to /login
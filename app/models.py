@@ -8,13 +8,18 @@ from sqlalchemy import (
     DateTime,
     Enum as SQLEnum,
     Boolean,
+    Float,
+    VARBINARY,
     ForeignKey,
+    Index,
     UniqueConstraint
 )
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, validates
 import enum
 import datetime
 
+from app.utils.netaddr import ip_to_bin, ip_bin_default
+
 
 
 Base = declarative_base()
@@ -55,15 +60,15 @@ class Admin(Base, TimestampMixin):
 class User(Base, TimestampMixin):
     __tablename__ = "users"
     id       = Column(Integer, primary_key=True)
-    username = Column(String(100), nullable=False)
+    username = Column(String(100), nullable=False, index=True)
     naos_id  = Column(String(50), nullable=False, unique=True)
     department = Column(String(100), nullable=False, default="", server_default="")
 class Device(Base, TimestampMixin):
     __tablename__ = "devices"
     id           = Column(Integer, primary_key=True)
-    account_name = Column(String(100), nullable=False)
+    account_name = Column(String(100), nullable=False, index=True)
     location     = Column(String(100), nullable=False)
-    hostname     = Column(String(100), nullable=False)
+    hostname     = Column(String(100), nullable=False, index=True)
     updated_by   = Column(Integer, ForeignKey("admins.id"), nullable=True)
 
 class Server(Base, TimestampMixin):
@@ -79,6 +84,9 @@ class IP(Base, TimestampMixin):
 
     id           = Column(Integer, primary_key=True)
     ip_address   = Column(String(45), nullable=False)
+    # 16-byte address key for CIDR range filters (app.utils.netaddr)
+    ip_bin       = Column(VARBINARY(16), nullable=True, index=True,
+                          default=ip_bin_default("ip_address"))
     mac_address  = Column(String(50), nullable=True)
     asset_tag    = Column(String(50), nullable=True)
     snipe_id     = Column(Integer, nullable=True)
@@ -97,16 +105,25 @@ class IP(Base, TimestampMixin):
             "ip_address",
             name="uq_ip_owner"
         ),
-        
+        # duplicate-assignment checks look addresses up across owners;
+        # per-owner lookups use uq_ip_owner's (owner_type, owner_id) prefix
+        Index("ix_ips_ip_address", "ip_address"),
     )
 
+    @validates("ip_address")
+    def _sync_ip_bin(self, key, value):
+        # keep the range-filter key in step when the address is edited
+        self.ip_bin = ip_to_bin(value or "")
+        return value
+
 class LiveMonitor(Base):
     __tablename__ = "live_monitor"
     ip           = Column(String(45), primary_key=True)
+    ip_bin       = Column(VARBINARY(16), nullable=True, index=True, default=ip_bin_default("ip"))
     hostname     = Column(String(100), nullable=False)
     mac_address  = Column(String(50), nullable=False)
     vendor       = Column(String(100), nullable=False)
-    status       = Column(String(10), nullable=False)
+    status       = Column(String(10), nullable=False, index=True)
     last_checked = Column(DateTime, nullable=False)
     last_up      = Column(DateTime, nullable=True)
 
@@ -114,11 +131,58 @@ class History(Base):
     __tablename__ = "history"
     id          = Column(Integer, primary_key=True, autoincrement=True)
     ip          = Column(String(45), nullable=False)
+    ip_bin      = Column(VARBINARY(16), nullable=True, index=True, default=ip_bin_default("ip"))
     hostname    = Column(String(100), nullable=False)
     mac_address = Column(String(50), nullable=False)
     vendor      = Column(String(100), nullable=False)
     status      = Column(String(10), nullable=False)
+    # start of the state interval (first scan that saw this state)
     scan_time   = Column(DateTime, nullable=False)
+    # end of the interval, extended in place while the state is unchanged
+    last_seen   = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # last interval per address (persistence), per-address history
+        Index("ix_history_ip_scan_time", "ip", "scan_time"),
+        # retention's cutoff search
+        Index("ix_history_scan_time", "scan_time"),
+        # GET /api/history's window: intervals that ended after the cutoff
+        Index("ix_history_last_seen", "last_seen"),
+    )
+
+class IPAvailability(Base):
+    """Hourly / daily rollup of one address's scan results (see app.services.rollups)."""
+    __tablename__ = "ip_availability"
+    ip          = Column(String(45), primary_key=True)
+    period      = Column(String(5), primary_key=True)     # hour / day
+    bucket      = Column(DateTime, primary_key=True)      # start of the hour / day (UTC)
+    samples     = Column(Integer, nullable=False, default=0)
+    up_samples  = Column(Integer, nullable=False, default=0)
+    first_up    = Column(DateTime, nullable=True)
+    last_up     = Column(DateTime, nullable=True)
+    # distinct MACs seen in the bucket, comma-separated
+    macs        = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_ip_availability_period_bucket", "period", "bucket"),
+    )
+
+class RangeAvailability(Base):
+    """Hourly / daily rollup of a range's scan results."""
+    __tablename__ = "range_availability"
+    cidr        = Column(String(50), primary_key=True)
+    period      = Column(String(5), primary_key=True)
+    bucket      = Column(DateTime, primary_key=True)
+    samples     = Column(Integer, nullable=False, default=0)
+    up_samples  = Column(Integer, nullable=False, default=0)
+    # distinct addresses seen Up in the bucket
+    up_hosts    = Column(Integer, nullable=False, default=0)
+    first_up    = Column(DateTime, nullable=True)
+    last_up     = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_range_availability_period_bucket", "period", "bucket"),
+    )
 
 class IPRange(Base, TimestampMixin):
     __tablename__ = "ip_ranges"
@@ -126,3 +190,81 @@ class IPRange(Base, TimestampMixin):
     id        = Column(Integer, primary_key=True)
     cidr      = Column(String(50), nullable=False, unique=True)
     active    = Column(Boolean, nullable=False, default=True)
+    # scheduled scans: seconds between sweeps (NULL = manual only);
+    # higher priority ranges are started first when several are due
+    scan_interval    = Column(Integer, nullable=True)
+    scan_priority    = Column(Integer, nullable=False, default=0, server_default="0")
+    last_run_at      = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    next_run_at      = Column(DateTime, nullable=True, index=True)
+    # probe packets per second for this range (NULL = PROBE_RANGE_PPS)
+    max_pps          = Column(Integer, nullable=True)
+    # scanned by remote agents of this site instead of the API host (NULL = local)
+    agent_site       = Column(String(50), nullable=True)
+
+
+class ScanRun(Base):
+    """Timing and outcome of one local sweep of a range (see app.services.metrics)."""
+    __tablename__ = "scan_runs"
+
+    id               = Column(Integer, primary_key=True, autoincrement=True)
+    cidr             = Column(String(50), nullable=False)
+    status           = Column(String(10), nullable=False)   # completed / failed / cancelled
+    error            = Column(Text, nullable=True)
+    started_at       = Column(DateTime, nullable=False)
+    finished_at      = Column(DateTime, nullable=False)
+    hosts_total      = Column(Integer, nullable=False, default=0)
+    hosts_probed     = Column(Integer, nullable=False, default=0)
+    hosts_up         = Column(Integer, nullable=False, default=0)
+    rows_written     = Column(Integer, nullable=False, default=0)
+    dns_lookups      = Column(Integer, nullable=False, default=0)
+    dns_unresolved   = Column(Integer, nullable=False, default=0)
+    # wall-clock time, then time spent in each phase (phases of consecutive
+    # chunks overlap, so they can add up to more than the total)
+    seconds_total    = Column(Float, nullable=False, default=0.0)
+    seconds_probe    = Column(Float, nullable=False, default=0.0)
+    seconds_recheck  = Column(Float, nullable=False, default=0.0)
+    seconds_mac      = Column(Float, nullable=False, default=0.0)
+    seconds_fallback = Column(Float, nullable=False, default=0.0)
+    seconds_owners   = Column(Float, nullable=False, default=0.0)
+    seconds_dns      = Column(Float, nullable=False, default=0.0)
+    seconds_persist  = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("ix_scan_runs_cidr_started", "cidr", "started_at"),
+    )
+
+
+class ScanCheckpoint(Base):
+    """How far the current (or interrupted) local sweep of a range has got."""
+    __tablename__ = "scan_checkpoints"
+
+    cidr        = Column(String(50), primary_key=True)
+    chunk_size  = Column(Integer, nullable=False)
+    chunks_done = Column(Integer, nullable=False, default=0)
+    started_at  = Column(DateTime, nullable=False)
+    updated_at  = Column(DateTime, nullable=False)
+    # the sweep holding the checkpoint, and when it last showed signs of life
+    owner        = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+
+class ScanShard(Base):
+    """A slice of a range queued for (and leased by) a remote scan agent."""
+    __tablename__ = "scan_shards"
+
+    id               = Column(Integer, primary_key=True, autoincrement=True)
+    range_cidr       = Column(String(50), nullable=False, index=True)
+    cidr             = Column(String(50), nullable=False)
+    site             = Column(String(50), nullable=False)
+    status           = Column(String(10), nullable=False, default="pending")  # pending / leased / done / failed
+    attempts         = Column(Integer, nullable=False, default=0)
+    lease_owner      = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    error            = Column(Text, nullable=True)
+    created_at       = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    finished_at      = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_scan_shards_queue", "site", "status", "lease_expires_at"),
+    )
@@ -6,12 +6,12 @@ from sqlalchemy import select, delete, update
 from app.database import get_db
 from app.models import Admin
 from app.schemas.admins import AdminCreate, AdminPasswordUpdate
-from app.utils.security import require_admin, hash_password
+from app.utils.security import require_admin_write, hash_password
 
 router = APIRouter(
     prefix="/api/admins",
     tags=["admins"],
-    dependencies=[Depends(require_admin)]
+    dependencies=[Depends(require_admin_write)]
 )
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -39,7 +39,7 @@ async def create_admin(
 async def delete_admin(
     admin_id: int,
     db: AsyncSession = Depends(get_db),
-    current_admin: Admin = Depends(require_admin)
+    current_admin: Admin = Depends(require_admin_write)
 ):
     # Prevent self-deletion
     if current_admin.id == admin_id:
@@ -0,0 +1,121 @@
+# app/routers/agents.py
+
+import datetime
+import ipaddress
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db, get_read_db
+from app.models import ScanShard
+from app.schemas.agents import (
+    LeaseRequest, ShardLease, ShardResults, ShardFailure, ScanShardRead,
+)
+from app.services.scanner import store_results
+from app.services.shards import lease_shards, renew_lease, finish_shard, release_shard
+from app.utils.security import require_agent, require_admin
+
+router = APIRouter(prefix="/api/agents", tags=["agents"])
+
+
+async def _leased_shard(db: AsyncSession, shard_id: int, agent: str) -> ScanShard:
+    shard = await db.get(ScanShard, shard_id, with_for_update=True)
+    if not shard:
+        raise HTTPException(status_code=404, detail="Shard not found")
+    if shard.status != "leased" or shard.lease_owner != agent:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Shard is not leased to this agent",
+        )
+    return shard
+
+
+@router.post(
+    "/lease",
+    response_model=List[ShardLease],
+    dependencies=[Depends(require_agent)],
+    summary="Lease pending shards for an agent's site",
+)
+async def lease(req: LeaseRequest, db: AsyncSession = Depends(get_db)) -> Any:
+    shards = await lease_shards(db, req.agent, req.site, req.max_shards)
+    await db.commit()
+    return shards
+
+
+@router.post(
+    "/shards/{shard_id}/results",
+    dependencies=[Depends(require_agent)],
+    summary="Report a batch of probe results for a leased shard",
+)
+async def report_results(
+    shard_id: int,
+    body: ShardResults,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Persist a batch exactly like a local sweep (owner/DNS names, vendors,
+    live_monitor + history) and renew the lease; `final` closes the shard.
+    """
+    shard = await _leased_shard(db, shard_id, body.agent)
+    net = ipaddress.ip_network(shard.cidr, strict=False)
+
+    results: dict[str, dict] = {}
+    for h in body.hosts:
+        try:
+            if ipaddress.ip_address(h.ip) not in net:
+                raise ValueError
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{h.ip} is not in shard {shard.cidr}",
+            )
+        results[h.ip] = h.dict(exclude_none=True, exclude={"ip"})
+
+    stored = 0
+    if results:
+        stats = await store_results(
+            db, shard.cidr, results, datetime.datetime.utcnow(), range_cidr=shard.range_cidr,
+        )
+        stored = stats.rows
+
+    if body.final:
+        await finish_shard(db, shard, "done")
+    else:
+        renew_lease(shard)
+    await db.commit()
+    return {"stored": stored, "status": shard.status}
+
+
+@router.post(
+    "/shards/{shard_id}/fail",
+    dependencies=[Depends(require_agent)],
+    summary="Give a leased shard back (requeued until out of attempts)",
+)
+async def report_failure(
+    shard_id: int,
+    body: ShardFailure,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    shard = await _leased_shard(db, shard_id, body.agent)
+    await release_shard(db, shard, body.error)
+    await db.commit()
+    return {"status": shard.status}
+
+
+@router.get(
+    "/shards",
+    response_model=List[ScanShardRead],
+    dependencies=[Depends(require_admin)],
+    summary="Recent agent shards (admin only)",
+)
+async def list_shards(
+    status_: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(200, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+) -> Any:
+    stmt = select(ScanShard).order_by(ScanShard.id.desc()).limit(limit)
+    if status_:
+        stmt = stmt.where(ScanShard.status == status_)
+    return (await db.execute(stmt)).scalars().all()
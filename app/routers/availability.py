@@ -0,0 +1,74 @@
+# app/routers/availability.py
+
+from typing import List
+from datetime import datetime, timedelta
+import ipaddress
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.schemas.availability import IPAvailabilityRead, RangeAvailabilityRead
+from app.services.hosts import host_count
+from app.services.rollups import ip_series, range_series
+from app.utils.security import require_viewer_or_admin
+
+router = APIRouter(prefix="/availability", tags=["availability"])
+
+Period = Query("hour", regex="^(hour|day)$", description="Bucket size: hour or day")
+
+
+@router.get(
+    "/ip/{ip}",
+    response_model=List[IPAvailabilityRead],
+    dependencies=[Depends(require_viewer_or_admin)],
+    summary="Hourly/daily up ratio, first/last Up and MACs of one address",
+)
+async def ip_availability(
+    ip: str,
+    period: str = Period,
+    days: int = Query(7, ge=1, le=730, description="Number of days to look back"),
+    db: AsyncSession = Depends(get_read_db),
+) -> List[IPAvailabilityRead]:
+    """
+    GET /api/availability/ip/192.168.6.10?period=day&days=30
+
+    Served from the ip_availability rollup, not from raw history, so it
+    covers periods history no longer keeps.
+    """
+    try:
+        ip = str(ipaddress.ip_address(ip))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid IP address")
+    since = datetime.utcnow() - timedelta(days=days)
+    return [IPAvailabilityRead.from_orm(r) for r in await ip_series(db, ip, period, since)]
+
+
+@router.get(
+    "/range",
+    response_model=List[RangeAvailabilityRead],
+    dependencies=[Depends(require_viewer_or_admin)],
+    summary="Hourly/daily up ratio and Up host count of a range",
+)
+async def range_availability(
+    cidr: str = Query(..., description="CIDR block, e.g. 192.168.6.0/24"),
+    period: str = Period,
+    days: int = Query(7, ge=1, le=730, description="Number of days to look back"),
+    db: AsyncSession = Depends(get_read_db),
+) -> List[RangeAvailabilityRead]:
+    """
+    GET /api/availability/range?cidr=192.168.6.0/24&period=day&days=30
+
+    `up_hosts` is the number of distinct addresses seen Up in the bucket,
+    out of `hosts` addresses in the range.
+    """
+    try:
+        cidr = str(ipaddress.ip_network(cidr, strict=False))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid CIDR format")
+    since = datetime.utcnow() - timedelta(days=days)
+    hosts = host_count(cidr)
+    return [
+        RangeAvailabilityRead.from_orm(r).copy(update={"hosts": hosts})
+        for r in await range_series(db, cidr, period, since)
+    ]
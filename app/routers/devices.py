@@ -1,21 +1,23 @@
 # app/routers/devices.py
 
-from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from app.snipe import get_hardware_id
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Device, Admin, IP, OwnerType
 from app.schemas.devices import DeviceCreate, DeviceRead
+from app.schemas.pagination import Page, DataTablesPage
+from app.utils.pagination import PageParams, page_params, paginate, page_response, prefix_match
 from app.utils.security import (
-    require_admin,
+    require_admin_write,
     require_viewer_or_admin,
     get_current_admin,
 )
 import csv, io
 from fastapi import UploadFile, File, status, Depends
-from typing import List
+from typing import List, Optional, Union
 from app.config import settings
 router = APIRouter(prefix="/devices", tags=["devices"])
 
@@ -27,7 +29,7 @@ router = APIRouter(prefix="/devices", tags=["devices"])
     dependencies=[Depends(require_viewer_or_admin)],
     summary="List distinct account names",
 )
-async def list_accounts(db: AsyncSession = Depends(get_db)):
+async def list_accounts(db: AsyncSession = Depends(get_read_db)):
     rows = await db.execute(select(Device.account_name).distinct())
     return [r[0] for r in rows.all()]
 
@@ -38,7 +40,7 @@ async def list_accounts(db: AsyncSession = Depends(get_db)):
     dependencies=[Depends(require_viewer_or_admin)],
     summary="List distinct locations",
 )
-async def list_locations(db: AsyncSession = Depends(get_db)):
+async def list_locations(db: AsyncSession = Depends(get_read_db)):
     rows = await db.execute(select(Device.location).distinct())
     return [r[0] for r in rows.all()]
 
@@ -80,43 +82,66 @@ async def _enrich(dev: Device, db: AsyncSession) -> DeviceRead:
 
 
 
+async def _list_item(d: Device, db: AsyncSession) -> dict:
+    enriched = await _enrich(d, db)
+
+    # 1) grab the IP row so we can cache/peek its snipe_id
+    ip = await _get_ip_row(db, d.id)
+
+    # 2) if we haven’t cached it yet, look it up now and persist
+    if ip and ip.snipe_id is None:
+        hw = get_hardware_id(ip.asset_tag or "")
+        if hw:
+            ip.snipe_id = hw
+            await db.commit()
+    # 3) now either way read it
+    hw_id = ip.snipe_id if ip else None
+
+    # 4) build the URL from that cached value
+    item = enriched.dict()
+    item["snipe_url"] = (
+        f"{settings.SNIPE_UI}/hardware/{hw_id}"
+        if hw_id else None
+    )
+    return item
+
+
 # ─────────── routes ───────────
 @router.get(
     "/",
-    response_model=list[DeviceRead],
+    response_model=Union[list[DeviceRead], Page[DeviceRead], DataTablesPage[DeviceRead]],
     dependencies=[Depends(require_viewer_or_admin)],
 )
-async def list_devices(db: AsyncSession = Depends(get_db)):
+async def list_devices(
+    account_name: Optional[str] = Query(None, description="Exact account name"),
+    location: Optional[str] = Query(None, description="Exact location"),
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends(page_params),
+):
+    """
+    All devices, or with `limit` / `cursor` / DataTables' `draw` one page:
+    sort by `account_name` (default), `hostname` or `id`; `q` searches
+    hostname prefixes.
+    """
     # 1) fetch raw Device rows
-    rows = (await db.execute(select(Device))).scalars().all()
-
-    out = []
-    for d in rows:
-        enriched = await _enrich(d, db)
-
-        # 1) grab the IP row so we can cache/peek its snipe_id
-        ip = await _get_ip_row(db, d.id)
-
-        # 2) if we haven’t cached it yet, look it up now and persist
-        if ip and ip.snipe_id is None:
-            hw = get_hardware_id(ip.asset_tag or "")
-            if hw:
-                ip.snipe_id = hw
-                await db.commit()
-        # 3) now either way read it
-        hw_id = ip.snipe_id if ip else None
-
-        # 4) build the URL from that cached value
-        item = enriched.dict()
-        item["snipe_url"] = (
-            f"{settings.SNIPE_UI}/hardware/{hw_id}"
-            if hw_id else None
-        )
-
-        out.append(item)
-
-
-    return out
+    stmt = select(Device)
+    if account_name:
+        stmt = stmt.where(Device.account_name == account_name)
+    if location:
+        stmt = stmt.where(Device.location == location)
+
+    if not page.paged:
+        rows = (await db.execute(stmt)).scalars().all()
+        return [await _list_item(d, db) for d in rows]
+
+    result = await paginate(
+        db, stmt, page,
+        key=Device.id,
+        sorts={"account_name": Device.account_name, "hostname": Device.hostname, "id": Device.id},
+        default="account_name",
+        search=lambda q: prefix_match(Device.hostname, q),
+    )
+    return page_response(page, result, [await _list_item(d, db) for d in result.items])
 
 
 @router.get(
@@ -137,7 +162,7 @@ async def get_device(
 @router.post(
     "/",
     response_model=DeviceRead,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
 )
 async def create_device(
     payload: DeviceCreate,
@@ -187,7 +212,7 @@ async def create_device(
 @router.put(
     "/{dev_id}",
     response_model=DeviceRead,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
 )
 async def update_device(
     dev_id: int,
@@ -261,7 +286,7 @@ async def update_device(
 @router.delete(
     "/{dev_id}",
     status_code=204,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
 )
 async def delete_device(dev_id: int, db: AsyncSession = Depends(get_db)):
     dev = await db.get(Device, dev_id)
@@ -281,7 +306,7 @@ async def delete_device(dev_id: int, db: AsyncSession = Depends(get_db)):
 @router.post(
     "/import",
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
     summary="Bulk-import devices from CSV"
 )
 async def import_devices(
@@ -1,22 +1,24 @@
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Union
 from datetime import datetime, timedelta
-import ipaddress
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import History, IPRange
 from app.schemas.history import HistoryRead, HistoryCreate
-from app.utils.security import require_viewer_or_admin, require_admin
+from app.schemas.pagination import Page, DataTablesPage
+from app.utils.netaddr import in_cidr
+from app.utils.pagination import PageParams, page_params, paginate, page_response, prefix_match
+from app.utils.security import require_viewer_or_admin, require_admin_write
 
 router = APIRouter(prefix="/history", tags=["history"])
 
 
 @router.get(
     "/",
-    response_model=List[HistoryRead],
+    response_model=Union[List[HistoryRead], Page[HistoryRead], DataTablesPage[HistoryRead]],
     dependencies=[Depends(require_viewer_or_admin)],
     summary="List scan history, filtered by days/range/ip"
 )
@@ -24,36 +26,87 @@ async def list_history(
     days: int = Query(14, ge=1, description="Number of days to look back"),
     range: Optional[str] = Query(None, description="CIDR to filter by"),
     ip: Optional[str]    = Query(None, description="Exact IP to filter by"),
-    db: AsyncSession      = Depends(get_db),
-) -> List[History]:
+    expand: bool         = Query(True, description="Expand state intervals into start/end points"),
+    status_: Optional[str] = Query(None, alias="status", description="Up or Down"),
+    db: AsyncSession      = Depends(get_read_db),
+    page: PageParams      = Depends(page_params),
+):
     """
     GET /api/history?days=14&range=192.168.6.0/24&ip=192.168.6.10
+
+    History rows are state intervals [scan_time, last_seen]. With
+    `expand` (the default) each interval is returned as a point at its
+    start plus, when it lasted, a point at its end; otherwise the raw
+    interval rows are returned.
+
+    With `limit` / `cursor` / DataTables' `draw`, one page of intervals
+    (expanded as above) is returned instead of all of them: sort by
+    `scan_time` (default, newest first), `last_seen`, `ip` or `id`; `q`
+    searches address prefixes.
     """
     cutoff = datetime.utcnow() - timedelta(days=days)
-    stmt = select(History).where(History.scan_time >= cutoff)
+    # intervals that ended within the window; last_seen is indexed
+    stmt = select(History).where(History.last_seen >= cutoff)
 
     filters = []
 
     if range:
-        net = ipaddress.ip_network(range, strict=False)
-        # build prefix like "192.168.6."
-        prefix = ".".join(str(net.network_address).split(".")[:3]) + "."
-        filters.append(History.ip.like(f"{prefix}%"))
+        filters.append(in_cidr(History.ip_bin, range))
 
     if ip:
         filters.append(History.ip == ip)
 
+    if status_:
+        filters.append(History.status == status_)
+
     if filters:
         stmt = stmt.where(and_(*filters))
 
-    result = await db.execute(stmt.order_by(History.scan_time.desc()))
-    return result.scalars().all()
+    if page.paged:
+        result = await paginate(
+            db, stmt, page,
+            key=History.id,
+            sorts={
+                "scan_time": History.scan_time,
+                "last_seen": History.last_seen,
+                "ip":        History.ip_bin,
+                "id":        History.id,
+            },
+            default="-scan_time",
+            search=lambda q: prefix_match(History.ip, q),
+        )
+        rows = [HistoryRead.from_orm(h) for h in result.items]
+        if expand:
+            # keep the page's order; each interval's points stay together
+            rows = [p for h in rows for p in expand_intervals([h], cutoff)]
+        return page_response(page, result, rows)
+
+    result = await db.execute(stmt.order_by(History.last_seen.desc()))
+    rows = [HistoryRead.from_orm(h) for h in result.scalars().all()]
+    if not expand:
+        return rows
+    return expand_intervals(rows, cutoff)
+
+
+def expand_intervals(rows: List[HistoryRead], cutoff: datetime) -> List[HistoryRead]:
+    """
+    Turn interval rows into timestamped points, newest first, dropping
+    points that fall before `cutoff`.
+    """
+    points: list[HistoryRead] = []
+    for h in rows:
+        if h.scan_time >= cutoff:
+            points.append(h)
+        if h.last_seen and h.last_seen > h.scan_time:
+            points.append(h.copy(update={"scan_time": h.last_seen}))
+    points.sort(key=lambda p: p.scan_time, reverse=True)
+    return points
 
 
 @router.post(
     "/",
     response_model=HistoryRead,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
     status_code=status.HTTP_201_CREATED,
     summary="(Admin) Create a new history entry"
 )
@@ -61,7 +114,10 @@ async def create_history(
     payload: HistoryCreate,
     db: AsyncSession = Depends(get_db),
 ) -> History:
-    hist = History(**payload.dict())
+    data = payload.dict()
+    # a single observation: the interval ends where it starts
+    data["last_seen"] = data["last_seen"] or data["scan_time"]
+    hist = History(**data)
     db.add(hist)
     await db.commit()
     await db.refresh(hist)
@@ -76,7 +132,7 @@ async def create_history(
 )
 async def read_history(
     id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> History:
     q = await db.execute(select(History).where(History.id == id))
     hist = q.scalars().first()
@@ -2,18 +2,22 @@
 # --------------------------------------------------------------------------- #
 #  Global & user-scoped CRUD for IP entries                                   #
 # --------------------------------------------------------------------------- #
-from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from typing import List          
+from typing import List, Optional, Union
 from fastapi import status  
 from app.database import get_db
 from app.config import settings
 from app.snipe   import get_hardware_id
-from app.models import IP, User, Device, Server, Admin, OwnerType
+from app.models import IP, Admin, OwnerType
 from app.schemas.ips import IPCreate, IPRead, IPUserCreate
-from app.utils.security import require_viewer_or_admin, require_admin
+from app.schemas.pagination import Page, DataTablesPage
+from app.utils.netaddr import in_cidr
+from app.utils.pagination import PageParams, page_params, paginate, page_response, prefix_match
+from app.utils.security import require_viewer_or_admin, require_admin_write
+from app.services.owners import IPOwner, owner_of, owners_by_ip_id
 
 router = APIRouter(prefix="/ips", tags=["ips"])
 
@@ -21,16 +25,19 @@ router = APIRouter(prefix="/ips", tags=["ips"])
 # ─── NEW: list ALL user-scoped IPs ───────────────────────────── #
 @router.get(
     "/users",
-    response_model=list[IPRead],
+    response_model=Union[list[IPRead], Page[IPRead], DataTablesPage[IPRead]],
     dependencies=[Depends(require_viewer_or_admin)],
     summary="List *all* IP entries whose owner_type is 'user'"
 )
-async def list_all_user_ips(db: AsyncSession = Depends(get_db)):
-    q = await db.execute(
-        select(IP).where(IP.owner_type == OwnerType.user)
-    )
-    rows = q.scalars().all()
-    return [await enrich_row(ip, db) for ip in rows]
+async def list_all_user_ips(
+    range: Optional[str] = Query(None, description="CIDR to filter by"),
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends(page_params),
+):
+    stmt = select(IP).where(IP.owner_type == OwnerType.user)
+    if range:
+        stmt = stmt.where(in_cidr(IP.ip_bin, range))
+    return await list_page(db, stmt, page, OwnerType.user)
 
 
 # ─────────────────────────────  HELPERS  ──────────────────────────────────── #
@@ -38,42 +45,26 @@ async def list_all_user_ips(db: AsyncSession = Depends(get_db)):
 from app.config import settings
 from app.snipe   import get_hardware_id
 
-async def enrich_row(ip: IP, db: AsyncSession) -> IPRead:
+async def enrich_row(ip: IP, db: AsyncSession, owner: IPOwner | None = None) -> IPRead:
     """
     Build an `IPRead` object and include:
       - owner_username / owner_naos_id for users,
-      - hostname for devices/servers,
+      - hostname for devices, server_name for servers,
       - plus the admin username who last updated,
       - and snipe_url if asset_tag exists in Snipe-IT (cached).
+    Listings pass `owner` pre-resolved (see app.services.owners);
+    otherwise it is looked up here.
     """
     updater = await db.get(Admin, ip.updated_by) if ip.updated_by else None
     if ip.department is None:
         ip.department = ""
 
-    if ip.owner_type == OwnerType.user:
-        owner = await db.get(User, ip.owner_id)
-        if not owner:
-            raise HTTPException(404, "Owner user not found")
-        owner_username = owner.username
-        owner_naos_id  = owner.naos_id
-
-    elif ip.owner_type == OwnerType.device:
-        owner = await db.get(Device, ip.owner_id)
-        if not owner:
-            raise HTTPException(404, "Owner device not found")
-        owner_username = owner.hostname
-        owner_naos_id  = None
-
-    elif ip.owner_type == OwnerType.server:
-        owner = await db.get(Server, ip.owner_id)
-        if not owner:
-            raise HTTPException(404, "Owner server not found")
-        owner_username = owner.hostname
-        owner_naos_id  = None
-
-    else:
-        owner_username = None
-        owner_naos_id  = None
+    if owner is None:
+        owner = await owner_of(db, ip.id)
+    if owner is None or owner.name is None:
+        raise HTTPException(404, f"Owner {ip.owner_type.value} not found")
+    owner_username = owner.name
+    owner_naos_id  = owner.naos_id
 
     # 1) Base Pydantic conversion
     base = IPRead.from_orm(ip)
@@ -102,22 +93,52 @@ async def enrich_row(ip: IP, db: AsyncSession) -> IPRead:
         "snipe_url":            snipe_url,
     })
 
+async def list_page(
+    db: AsyncSession, stmt, page: PageParams, owner_type: OwnerType | None = None,
+):
+    """
+    Every row of `stmt` enriched, or one page of them (sort by `id`,
+    the default, or `ip`; `q` searches address prefixes).
+    """
+    if not page.paged:
+        rows = (await db.execute(stmt)).scalars().all()
+        owners = await owners_by_ip_id(db, owner_type)
+        return [await enrich_row(ip, db, owners.get(ip.id)) for ip in rows]
+
+    result = await paginate(
+        db, stmt, page,
+        key=IP.id,
+        sorts={"id": IP.id, "ip": IP.ip_bin},
+        default="id",
+        search=lambda q: prefix_match(IP.ip_address, q),
+    )
+    owners = await owners_by_ip_id(db, ip_ids=[ip.id for ip in result.items])
+    return page_response(page, result, [await enrich_row(ip, db, owners.get(ip.id)) for ip in result.items])
+
 # ─────────────────────────  GLOBAL IP CRUD  ──────────────────────────────── #
 
-@router.get("/", response_model=list[IPRead],
+@router.get("/", response_model=Union[list[IPRead], Page[IPRead], DataTablesPage[IPRead]],
             dependencies=[Depends(require_viewer_or_admin)])
-async def list_ips(db: AsyncSession = Depends(get_db)):
-    q = await db.execute(select(IP))
-    rows = q.scalars().all()
-    return [await enrich_row(ip, db) for ip in rows]
+async def list_ips(
+    owner_type: Optional[OwnerType] = Query(None, description="user, device or server"),
+    range: Optional[str] = Query(None, description="CIDR to filter by"),
+    db: AsyncSession = Depends(get_db),
+    page: PageParams = Depends(page_params),
+):
+    stmt = select(IP)
+    if owner_type is not None:
+        stmt = stmt.where(IP.owner_type == owner_type)
+    if range:
+        stmt = stmt.where(in_cidr(IP.ip_bin, range))
+    return await list_page(db, stmt, page, owner_type)
 
 
 @router.post("/", response_model=IPRead,
-             dependencies=[Depends(require_admin)])
+             dependencies=[Depends(require_admin_write)])
 async def create_ip(
     payload: IPCreate,
     db: AsyncSession = Depends(get_db),
-    admin=Depends(require_admin),
+    admin=Depends(require_admin_write),
 ):
     """Create a standalone IP entry."""
     ip = IP(**payload.dict(), updated_by=admin.id)
@@ -142,12 +163,12 @@ async def read_ip(ip_id: int, db: AsyncSession = Depends(get_db)):
 
 
 @router.put("/{ip_id}", response_model=IPRead,
-            dependencies=[Depends(require_admin)])
+            dependencies=[Depends(require_admin_write)])
 async def update_ip(
     ip_id: int,
     payload: IPCreate,
     db: AsyncSession = Depends(get_db),
-    admin=Depends(require_admin),
+    admin=Depends(require_admin_write),
 ):
     """Update any IP entry by ID."""
     ip = await db.get(IP, ip_id)
@@ -167,7 +188,7 @@ async def update_ip(
     return await enrich_row(ip, db)
 
 
-@router.delete("/{ip_id}", dependencies=[Depends(require_admin)])
+@router.delete("/{ip_id}", dependencies=[Depends(require_admin_write)])
 async def delete_ip(ip_id: int, db: AsyncSession = Depends(get_db)):
     """Delete an IP entry by ID."""
     ip = await db.get(IP, ip_id)
@@ -184,7 +205,7 @@ async def delete_ip(ip_id: int, db: AsyncSession = Depends(get_db)):
 
 
 @router.delete("/users/{user_id}/ips/{ip_id}",
-               dependencies=[Depends(require_admin)])
+               dependencies=[Depends(require_admin_write)])
 async def delete_user_ip(
     user_id: int = Path(..., description="User ID"),
     ip_id: int = Path(..., description="IP entry ID"),
@@ -1,18 +1,29 @@
 # app/routers/live.py
 
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Union
+import asyncio
 import ipaddress
+import json
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Body, status
-from sqlalchemy import select, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import LiveMonitor, IPRange
-from app.schemas.live import LiveMonitorRead
-from app.utils.security import require_viewer_or_admin, require_admin
-from app.services.scanner import scan_nets
+from app.schemas.live import LiveMonitorRead, ScanJobRead
+from app.schemas.pagination import Page, DataTablesPage
+from app.utils.netaddr import in_any_cidr
+from app.utils.pagination import PageParams, page_params, paginate, page_response, prefix_match
+from app.utils.security import require_viewer_or_admin, require_admin, require_admin_write
+from app.services.jobs import scan_jobs
+from app.services.resolver import resolver
+from app.services.ratelimit import probe_rates
+from app.services.events import broker
+from app.services.shards import enqueue_range
 
 router = APIRouter(prefix="/live",      tags=["live"])
 
@@ -23,19 +34,26 @@ class ScanRequest(BaseModel):
 
 @router.get(
     "/",
-    response_model=List[LiveMonitorRead],
+    response_model=Union[List[LiveMonitorRead], Page[LiveMonitorRead], DataTablesPage[LiveMonitorRead]],
     dependencies=[Depends(require_viewer_or_admin)],
     summary="List live-monitor entries (optionally filtered by CIDRs)"
 )
 @router.get("", include_in_schema=False)
 async def list_live(
-    db: AsyncSession        = Depends(get_db),
+    db: AsyncSession        = Depends(get_read_db),
     nets: Optional[List[str]] = Query(
         None,
         description="List of CIDR ranges to limit results "
                     "(e.g. ?nets=192.168.6.0/24&nets=10.0.0.0/8)"
     ),
-) -> List[LiveMonitorRead]:
+    status_: Optional[str] = Query(None, alias="status", description="Up or Down"),
+    page: PageParams = Depends(page_params),
+):
+    """
+    Without paging parameters, every entry as an array. With `limit` /
+    `cursor` / DataTables' `draw`, one page (see app.utils.pagination):
+    sort by `ip` (default) or `status`, `q` searches address prefixes.
+    """
     # if the user didn’t pass any nets, load *all* active CIDRs
     if not nets:
         q = await db.execute(select(IPRange).where(IPRange.active == True))
@@ -43,21 +61,28 @@ async def list_live(
 
     stmt = select(LiveMonitor)
     if nets:
-        filters = []
-        for cidr in nets:
-            net = ipaddress.ip_network(cidr, strict=False)
-            prefix = ".".join(str(net.network_address).split(".")[:3]) + "."
-            filters.append(LiveMonitor.ip.like(f"{prefix}%"))
-        stmt = stmt.where(or_(*filters))
+        stmt = stmt.where(in_any_cidr(LiveMonitor.ip_bin, nets))
+    if status_:
+        stmt = stmt.where(LiveMonitor.status == status_)
 
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    if not page.paged:
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    result = await paginate(
+        db, stmt, page,
+        key=LiveMonitor.ip,
+        sorts={"ip": LiveMonitor.ip_bin, "status": LiveMonitor.status},
+        default="ip",
+        search=lambda q: prefix_match(LiveMonitor.ip, q),
+    )
+    return page_response(page, result, [LiveMonitorRead.from_orm(r) for r in result.items])
 
 
 
 @router.post(
     "/scan",
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
     status_code=status.HTTP_202_ACCEPTED,
     summary="Trigger a network scan (admin only)"
 )
@@ -66,8 +91,11 @@ async def trigger_scan(
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
-    Kick off a network scan over the given CIDRs.
+    Queue a background scan over the given CIDRs and return its job id.
     If `req.nets` is empty, scans all active ranges from the database.
+    A request for the same ranges as a scan still in progress joins it.
+    Ranges assigned to an agent site are queued for remote agents instead
+    (`agent_ranges`); `job_id` is null when there is nothing to scan here.
     """
     nets = req.nets or []
     if not nets:
@@ -80,5 +108,155 @@ async def trigger_scan(
             detail="No CIDR ranges configured for scanning."
         )
 
-    await scan_nets(nets, db)
-    return {"detail": "Scan started", "ranges_scanned": nets}
+    q = await db.execute(
+        select(IPRange.cidr, IPRange.agent_site)
+        .where(IPRange.cidr.in_(nets), IPRange.agent_site.isnot(None))
+    )
+    agent_sites = dict(q.all())
+    for cidr, site in agent_sites.items():
+        await enqueue_range(db, cidr, site)
+    await db.commit()
+
+    local = [cidr for cidr in nets if cidr not in agent_sites]
+    if not local:
+        return {
+            "detail":         "Queued for scan agents",
+            "job_id":         None,
+            "ranges_scanned": [],
+            "agent_ranges":   list(agent_sites),
+        }
+
+    job, created = await scan_jobs.submit(local)
+    return {
+        "detail":         "Scan started" if created else "Scan already in progress",
+        "job_id":         job.id,
+        "ranges_scanned": job.nets,
+        "agent_ranges":   list(agent_sites),
+    }
+
+
+# seconds between SSE keep-alive comments on an idle stream
+_KEEPALIVE = 15.0
+
+
+def _event_in(event: dict, networks: list) -> bool:
+    """Whether a live event concerns one of `networks` (job/resync events always do)."""
+    if event["type"] == "host":
+        addr = ipaddress.ip_address(event["ip"])
+        return any(addr in net for net in networks)
+    if event["type"] == "phase":
+        net = ipaddress.ip_network(event["cidr"], strict=False)
+        return any(net.overlaps(n) for n in networks)
+    return True
+
+
+@router.get(
+    "/stream",
+    dependencies=[Depends(require_viewer_or_admin)],
+    summary="Server-Sent Events stream of host status changes and scan progress",
+)
+async def stream_live(
+    request: Request,
+    nets: Optional[List[str]] = Query(
+        None,
+        description="Only send host/phase events within these CIDRs",
+    ),
+) -> StreamingResponse:
+    """
+    Named SSE events:
+      - `host`:   {ip, cidr, status, last_checked, ...} when a host changes state
+      - `phase`:  {cidr, phase} as each range moves through the scan
+      - `job`:    the scan job (same shape as GET /scan/{job_id}) when it starts/ends
+      - `resync`: the client fell behind; reload everything
+    """
+    try:
+        networks = [ipaddress.ip_network(n, strict=False) for n in nets or []]
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    async def events():
+        queue = broker.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if networks and not _event_in(event, networks):
+                    continue
+                data = json.dumps(jsonable_encoder(event))
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/scan",
+    response_model=List[ScanJobRead],
+    dependencies=[Depends(require_viewer_or_admin)],
+    summary="List recent scan jobs"
+)
+async def list_scan_jobs() -> Any:
+    jobs = sorted(scan_jobs.jobs.values(), key=lambda j: j.created_at, reverse=True)
+    return [j.as_dict() for j in jobs]
+
+
+@router.get(
+    "/scan/{job_id}",
+    response_model=ScanJobRead,
+    dependencies=[Depends(require_viewer_or_admin)],
+    summary="Progress of a scan job"
+)
+async def read_scan_job(job_id: str) -> Any:
+    job = scan_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job.as_dict()
+
+
+@router.delete(
+    "/scan/{job_id}",
+    response_model=ScanJobRead,
+    dependencies=[Depends(require_admin_write)],
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Cancel a running scan job (admin only)"
+)
+async def cancel_scan_job(job_id: str) -> Any:
+    job = scan_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    if job.finished:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Scan job already {job.status}"
+        )
+    scan_jobs.cancel(job_id)
+    return job.as_dict()
+
+
+@router.get(
+    "/resolver",
+    dependencies=[Depends(require_admin)],
+    summary="Reverse-DNS cache counters (admin only)"
+)
+async def resolver_stats() -> Any:
+    return resolver.stats()
+
+
+@router.get(
+    "/probe_rates",
+    dependencies=[Depends(require_admin)],
+    summary="Probe rate caps and achieved packets/sec (admin only)"
+)
+async def probe_rate_stats() -> Any:
+    return probe_rates.stats()
@@ -1,16 +1,20 @@
 # app/routers/map.py
 
+import json
 import os
 from ipaddress import ip_network
 
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
-from app.models import IPRange, IP, History, User, Device, Server
+from app.database import get_read_db
+from app.models import IPRange, History
+from app.services.hosts import iter_host_chunks
+from app.services.owners import owners_by_address
+from app.utils.netaddr import in_cidr
 from app.utils.security import require_viewer_or_admin
 
 # locate your templates folder just like in ui.py
@@ -20,6 +24,9 @@ templates = Jinja2Templates(directory=TEMPLATE_DIR)
 
 router = APIRouter(tags=["map"])
 
+# addresses per streamed fragment of /api/ip_map
+_STREAM_CHUNK = 4096
+
 
 @router.get(
     "/map",
@@ -28,7 +35,7 @@ router = APIRouter(tags=["map"])
 )
 async def view_map(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Render the IP Map page, injecting `nets` as a list of active CIDR strings.
@@ -50,7 +57,7 @@ async def view_map(
 )
 async def get_ip_map(
     range: str = Query(..., description="CIDR block, e.g. 192.168.6.0/24"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Return JSON array of every host IP in the given CIDR:
@@ -72,25 +79,18 @@ async def get_ip_map(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid CIDR format")
 
-    # 3) fetch all assigned IPs in this block
-    prefix = ".".join(str(network.network_address).split(".")[:3])
-    assigned_q = await db.execute(
-        select(IP).where(IP.ip_address.like(f"{prefix}.%"))
+    # 3) fetch all assigned IPs in this block, with owner names
+    assigned = await owners_by_address(db, range)
+
+    # 4) IPs in this block that history has seen up
+    hist = (
+        select(History.ip)
+        .where(in_cidr(History.ip_bin, range), History.status == "Up")
+        .distinct()
     )
-    assigned = {ip.ip_address: ip for ip in assigned_q.scalars().all()}
-
-    # 4) fetch active-on-network IPs from history (status == "up")
-    hist_q = await db.execute(select(History).order_by(History.scan_time.desc()))
-    active = {
-        h.ip
-        for h in hist_q.scalars().all()
-        if getattr(h, "status", "").lower() == "up"
-    }
-
-    # 5) build the response
-    data: list[dict] = []
-    for addr in network.hosts():
-        ip_str = str(addr)
+    active = set((await db.execute(hist)).scalars())
+
+    def entry(ip_str: str) -> str:
         parts = ip_str.split(".")
         short = f"{parts[2]}.{parts[3]}"
 
@@ -102,20 +102,7 @@ async def get_ip_map(
         if ip_str in assigned:
             ent = assigned[ip_str]
             kind = ent.owner_type.name.title()
-
-            # lookup the real owner name
-            if kind == "User":
-                usr = await db.get(User, ent.owner_id)
-                name = usr.username or getattr(usr, "full_name", None) or f"User {ent.owner_id}"
-            elif kind == "Device":
-                dev = await db.get(Device, ent.owner_id)
-                name = dev.hostname or f"Device {ent.owner_id}"
-            elif kind == "Server":
-                srv = await db.get(Server, ent.owner_id)
-                name = srv.server_name or f"Server {ent.owner_id}"
-            else:
-                name = f"{kind} {ent.owner_id}"
-
+            name = ent.name or f"{kind} {ent.owner_id}"
             taken = True
 
         elif ip_str in active:
@@ -123,7 +110,7 @@ async def get_ip_map(
             name = ""
             taken = False
 
-        data.append({
+        return json.dumps({
             "ip":    ip_str,
             "short": short,
             "taken": taken,
@@ -131,4 +118,13 @@ async def get_ip_map(
             "name":  name,
         })
 
-    return JSONResponse(content=data)
+    # 5) stream the response; a /16 is ~65k entries, so don't build it in
+    #    memory. One fragment per host chunk: an async generator runs on the
+    #    event loop, and per-host fragments would cost a write each.
+    async def entries():
+        yield "["
+        for n, (_sub, hosts) in enumerate(iter_host_chunks(range, _STREAM_CHUNK)):
+            yield ("," if n else "") + ",".join(map(entry, hosts))
+        yield "]"
+
+    return StreamingResponse(entries(), media_type="application/json")
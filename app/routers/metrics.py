@@ -0,0 +1,24 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.services.metrics import render_prometheus
+from app.utils.security import require_metrics_token
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_metrics_token)],
+    summary="Scan timings and probe counters in Prometheus text format",
+)
+async def metrics(db: AsyncSession = Depends(get_read_db)) -> PlainTextResponse:
+    return PlainTextResponse(
+        await render_prometheus(db),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -3,16 +3,16 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import IPRange
 from app.schemas.ranges import RangeCreate, RangeRead, RangeUpdate
-from app.utils.security import require_admin
+from app.utils.security import require_admin, require_admin_write
 
 router = APIRouter(prefix="/api/ranges", tags=["ranges"])
 
 
 @router.get("", response_model=list[RangeRead], dependencies=[Depends(require_admin)])
-async def list_ranges(db: AsyncSession = Depends(get_db)):
+async def list_ranges(db: AsyncSession = Depends(get_read_db)):
     q = await db.execute(select(IPRange).order_by(IPRange.id))
     return q.scalars().all()
 
@@ -21,10 +21,16 @@ async def list_ranges(db: AsyncSession = Depends(get_db)):
     "",
     response_model=RangeRead,
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
 )
 async def create_range(r: RangeCreate, db: AsyncSession = Depends(get_db)):
-    new = IPRange(cidr=r.cidr)
+    new = IPRange(
+        cidr=r.cidr,
+        scan_interval=r.scan_interval,
+        scan_priority=r.scan_priority,
+        max_pps=r.max_pps,
+        agent_site=r.agent_site,
+    )
     db.add(new)
     await db.commit()
     await db.refresh(new)
@@ -34,13 +40,22 @@ async def create_range(r: RangeCreate, db: AsyncSession = Depends(get_db)):
 @router.put(
     "/{rid}",
     response_model=RangeRead,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
 )
 async def update_range(
     rid: int, u: RangeUpdate, db: AsyncSession = Depends(get_db)
 ):
-    # 1) apply the update
-    stmt = update(IPRange).where(IPRange.id == rid).values(active=u.active)
+    # 1) apply the update (only the fields that were sent)
+    values = u.dict(exclude_unset=True)
+    for field in ("active", "scan_priority"):
+        if values.get(field, 0) is None:
+            del values[field]
+    if "scan_interval" in values:
+        # let the scheduler pick a fresh, jittered first run
+        values["next_run_at"] = None
+    if not values:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    stmt = update(IPRange).where(IPRange.id == rid).values(**values)
     res = await db.execute(stmt)
     if res.rowcount == 0:
         raise HTTPException(status_code=404, detail="Not found")
@@ -59,7 +74,7 @@ async def update_range(
 @router.delete(
     "/{rid}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
 )
 async def delete_range(rid: int, db: AsyncSession = Depends(get_db)):
     ip_range = await db.get(IPRange, rid)
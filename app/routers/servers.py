@@ -13,7 +13,7 @@ from sqlalchemy.exc import IntegrityError
 from typing import List
 from app.config import settings
 from app.snipe import get_hardware_id
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Server, IP, OwnerType, Admin
 from app.schemas.server import (
     ServerCreate,
@@ -23,7 +23,7 @@ from app.schemas.server import (
     IPReadServer
 )
 from app.utils.security import (
-    require_admin,
+    require_admin_write,
     require_viewer_or_admin,
     get_current_admin
 )
@@ -35,14 +35,14 @@ router = APIRouter(prefix="/servers", tags=["servers"])
 
 @router.get("", response_model=List[ServerRead],
             dependencies=[Depends(require_viewer_or_admin)])
-async def list_servers(db: AsyncSession = Depends(get_db)):
+async def list_servers(db: AsyncSession = Depends(get_read_db)):
     rows = (await db.execute(select(Server))).scalars().all()
     return [ServerRead.from_orm(s) for s in rows]
 
 
 @router.post("", response_model=ServerRead,
              status_code=status.HTTP_201_CREATED,
-             dependencies=[Depends(require_admin)])
+             dependencies=[Depends(require_admin_write)])
 async def create_server(
     payload: ServerCreate,
     db: AsyncSession = Depends(get_db)
@@ -63,7 +63,7 @@ async def create_server(
 
 
 @router.put("/{srv_id}", response_model=ServerRead,
-            dependencies=[Depends(require_admin)])
+            dependencies=[Depends(require_admin_write)])
 async def update_server(
     srv_id: int,
     payload: ServerCreate,
@@ -88,7 +88,7 @@ async def update_server(
 
 @router.delete("/{srv_id}",
                status_code=status.HTTP_204_NO_CONTENT,
-               dependencies=[Depends(require_admin)])
+               dependencies=[Depends(require_admin_write)])
 async def delete_server(
     srv_id: int,
     db: AsyncSession = Depends(get_db)
@@ -221,7 +221,7 @@ async def list_server_ips(
     "/{srv_id}/ips",
     response_model=List[IPReadServer],
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
     summary="Add one or more IPs to a server"
 )
 async def add_server_ips(
@@ -272,7 +272,7 @@ async def add_server_ips(
 
 
 @router.put("/{srv_id}/ips/{ip_id}", response_model=IPReadServer,
-            dependencies=[Depends(require_admin)])
+            dependencies=[Depends(require_admin_write)])
 async def update_server_ip(
     payload:   IPServerCreate,
     srv_id:    int = Path(..., description="Server ID"),
@@ -304,7 +304,7 @@ async def update_server_ip(
 @router.delete(
     "/{srv_id}/ips/{ip_id}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(require_admin)]
+    dependencies=[Depends(require_admin_write)]
 )
 async def delete_server_ip(
     srv_id: int = Path(..., description="Server ID"),
@@ -7,8 +7,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.utils.security import require_viewer_or_admin, require_admin
-from app.database import get_db
+from app.database import get_read_db
 from app.models import IPRange, Admin
+from app.services.metrics import last_runs, PHASES
 
 # resolve the templates directory
 TOP = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -94,7 +95,7 @@ async def servers_page(
 )
 async def history_page(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(require_viewer_or_admin),
 ) -> HTMLResponse:
     nets = await load_active_nets(db)
@@ -111,7 +112,7 @@ async def history_page(
 )
 async def live_page(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(require_viewer_or_admin),
 ) -> HTMLResponse:
     nets = await load_active_nets(db)
@@ -128,7 +129,7 @@ async def live_page(
 )
 async def map_page(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(require_viewer_or_admin),
 ) -> HTMLResponse:
     nets = await load_active_nets(db)
@@ -145,7 +146,7 @@ async def map_page(
 )
 async def admin_dashboard(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(require_admin),
 ) -> HTMLResponse:
     ranges = (await db.execute(select(IPRange))).scalars().all()
@@ -154,5 +155,7 @@ async def admin_dashboard(
         "request": request,
         "ranges": ranges,
         "admins": admins,
+        "scan_runs": await last_runs(db),
+        "phases": PHASES,
         "current_user": current_user
     })
@@ -1,44 +1,66 @@
 from fastapi import (
     APIRouter, Depends, HTTPException,
-    Path, status, UploadFile, File
+    Path, Query, status, UploadFile, File
 )
-from sqlalchemy import select
+from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 import csv, io
-from typing import List
+from typing import List, Optional, Union
 from app.config import settings
 from app.snipe import get_hardware_id
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User, IP, OwnerType, Admin
 from app.schemas.users import UserCreate, UserRead
 from app.schemas.ips import IPRead, IPUserCreate
+from app.schemas.pagination import Page, DataTablesPage
+from app.utils.pagination import PageParams, page_params, paginate, page_response, prefix_match
 from app.utils.security import (
-    require_admin, require_viewer_or_admin, get_current_admin
+    require_admin_write, require_viewer_or_admin, get_current_admin
 )
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 # ─────────────────────────  BASIC USER CRUD  ───────────────────────── #
 
-@router.get("", response_model=List[UserRead],
+def _as_userread(u: User) -> UserRead:
+    if u.department is None:
+        u.department = ""
+    return UserRead.from_orm(u)
+
+
+@router.get("", response_model=Union[List[UserRead], Page[UserRead], DataTablesPage[UserRead]],
             dependencies=[Depends(require_viewer_or_admin)])
-@router.get("/", response_model=List[UserRead],
+@router.get("/", response_model=Union[List[UserRead], Page[UserRead], DataTablesPage[UserRead]],
             dependencies=[Depends(require_viewer_or_admin)],
             include_in_schema=False)
-async def list_users(db: AsyncSession = Depends(get_db)):
-    rows = (await db.execute(select(User))).scalars().all()
-    out: list[UserRead] = []
-    for u in rows:
-        if u.department is None:
-            u.department = ""
-        out.append(UserRead.from_orm(u))
-    return out
+async def list_users(
+    db: AsyncSession = Depends(get_read_db),
+    page: PageParams = Depends(page_params),
+):
+    """
+    All users, or with `limit` / `cursor` / DataTables' `draw` one page:
+    sort by `id` (default), `username` or `naos_id`; `q` searches
+    username and NAOS ID prefixes.
+    """
+    stmt = select(User)
+    if not page.paged:
+        rows = (await db.execute(stmt)).scalars().all()
+        return [_as_userread(u) for u in rows]
+
+    result = await paginate(
+        db, stmt, page,
+        key=User.id,
+        sorts={"id": User.id, "username": User.username, "naos_id": User.naos_id},
+        default="id",
+        search=lambda q: or_(prefix_match(User.username, q), prefix_match(User.naos_id, q)),
+    )
+    return page_response(page, result, [_as_userread(u) for u in result.items])
 
 @router.post("", response_model=UserRead,
              status_code=status.HTTP_201_CREATED,
-             dependencies=[Depends(require_admin)])
+             dependencies=[Depends(require_admin_write)])
 async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
     user = User(**payload.dict())
     db.add(user)
@@ -49,13 +71,13 @@ async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
 # allow trailing-slash variant so JS POST /api/users/ works
 @router.post("/", response_model=UserRead,
              status_code=status.HTTP_201_CREATED,
-             dependencies=[Depends(require_admin)],
+             dependencies=[Depends(require_admin_write)],
              include_in_schema=False)
 async def create_user_slash(payload: UserCreate, db: AsyncSession = Depends(get_db)):
     return await create_user(payload, db)
 
 @router.put("/{user_id}", response_model=UserRead,
-            dependencies=[Depends(require_admin)])
+            dependencies=[Depends(require_admin_write)])
 async def update_user(user_id: int, payload: UserCreate,
                       db: AsyncSession = Depends(get_db)):
     user = await db.get(User, user_id)
@@ -68,7 +90,7 @@ async def update_user(user_id: int, payload: UserCreate,
     return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT,
-               dependencies=[Depends(require_admin)])
+               dependencies=[Depends(require_admin_write)])
 async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
     user = await db.get(User, user_id)
     if not user:
@@ -79,7 +101,7 @@ async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
 # ─────────────────────────  CSV IMPORT  ─────────────────────────────── #
 
 @router.post("/import", status_code=status.HTTP_201_CREATED,
-             dependencies=[Depends(require_admin)])
+             dependencies=[Depends(require_admin_write)])
 async def import_users(file: UploadFile = File(...),
                        db:   AsyncSession = Depends(get_db)):
     reader = csv.DictReader(io.StringIO((await file.read()).decode()))
@@ -167,7 +189,7 @@ async def list_user_ips(user_id: int = Path(...),
     "/{user_id}/ips",
     response_model=List[IPRead],
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(require_admin)],
+    dependencies=[Depends(require_admin_write)],
     summary="Add one or more IPs to a user"
 )
 async def add_user_ips(
@@ -224,7 +246,7 @@ async def add_user_ips(
 
 
 @router.put("/{user_id}/ips/{ip_id}", response_model=IPRead,
-            dependencies=[Depends(require_admin)])
+            dependencies=[Depends(require_admin_write)])
 async def update_user_ip(
     entry:   IPUserCreate,
     user_id: int = Path(...),
@@ -253,7 +275,7 @@ async def update_user_ip(
 
 @router.delete("/{user_id}/ips/{ip_id}",
                status_code=status.HTTP_204_NO_CONTENT,
-               dependencies=[Depends(require_admin)])
+               dependencies=[Depends(require_admin_write)])
 async def delete_user_ip(user_id: int = Path(...), ip_id: int = Path(...),
                          db: AsyncSession = Depends(get_db)):
     ip = await db.get(IP, ip_id)
@@ -0,0 +1,58 @@
+# app/schemas/agents.py
+
+from pydantic import BaseModel, Field, constr
+from datetime import datetime
+from typing import List, Optional
+
+
+class LeaseRequest(BaseModel):
+    agent: constr(strip_whitespace=True, min_length=1, max_length=100)
+    site: constr(strip_whitespace=True, min_length=1, max_length=50)
+    max_shards: int = Field(1, ge=1, le=64)
+
+
+class ShardLease(BaseModel):
+    id: int
+    cidr: str
+    range_cidr: str
+    lease_expires_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class AgentHost(BaseModel):
+    ip: str
+    status: constr(regex=r"^(Up|Down)$")
+    rtt_ms: Optional[float] = None
+    mac_address: Optional[str] = None
+    hostname: Optional[str] = None
+
+
+class ShardResults(BaseModel):
+    agent: constr(strip_whitespace=True, min_length=1, max_length=100)
+    hosts: List[AgentHost] = []
+    # last batch for this shard: closes it
+    final: bool = False
+
+
+class ShardFailure(BaseModel):
+    agent: constr(strip_whitespace=True, min_length=1, max_length=100)
+    error: str
+
+
+class ScanShardRead(BaseModel):
+    id: int
+    range_cidr: str
+    cidr: str
+    site: str
+    status: str
+    attempts: int
+    lease_owner: Optional[str]
+    lease_expires_at: Optional[datetime]
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,38 @@
+# app/schemas/availability.py
+
+from pydantic import BaseModel, validator
+from datetime import datetime
+from typing import List, Optional
+
+
+class AvailabilityBucket(BaseModel):
+    bucket: datetime
+    samples: int
+    up_samples: int
+    first_up: Optional[datetime] = None
+    last_up: Optional[datetime] = None
+    # up_samples / samples
+    up_ratio: float = 0.0
+
+    @validator("up_ratio", always=True)
+    def compute_up_ratio(cls, v, values):
+        samples = values.get("samples") or 0
+        return values.get("up_samples", 0) / samples if samples else 0.0
+
+    class Config:
+        orm_mode = True
+
+
+class IPAvailabilityRead(AvailabilityBucket):
+    # distinct MACs seen in the bucket
+    macs: List[str] = []
+
+    @validator("macs", pre=True)
+    def split_macs(cls, v):
+        return v.split(",") if isinstance(v, str) else (v or [])
+
+
+class RangeAvailabilityRead(AvailabilityBucket):
+    # distinct addresses seen Up in the bucket, out of `hosts`
+    up_hosts: int
+    hosts: int = 0
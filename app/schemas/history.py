@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class HistoryBase(BaseModel):
     ip: str
@@ -8,6 +9,8 @@ class HistoryBase(BaseModel):
     vendor: str
     status: str
     scan_time: datetime
+    # end of the state interval; defaults to scan_time on create
+    last_seen: Optional[datetime] = None
 
 class HistoryCreate(HistoryBase):
     pass
@@ -2,6 +2,7 @@
 
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Dict, Optional
 
 class LiveMonitorRead(BaseModel):
     ip: str
@@ -14,3 +15,17 @@ class LiveMonitorRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class ScanJobRead(BaseModel):
+    job_id: str
+    status: str
+    phase: str
+    ranges: Dict[str, str]
+    hosts_total: int
+    hosts_probed: int
+    eta_seconds: Optional[float]
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
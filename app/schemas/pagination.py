@@ -0,0 +1,24 @@
+# app/schemas/pagination.py
+
+from pydantic.generics import GenericModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Page(GenericModel, Generic[T]):
+    items: List[T]
+    # pass back as ?cursor= for the following page; None on the last one
+    next_cursor: Optional[str] = None
+    # rows matching the filters, counted up to PAGE_COUNT_LIMIT
+    total: int
+    total_exact: bool
+
+
+class DataTablesPage(GenericModel, Generic[T]):
+    """DataTables server-side processing response."""
+    draw: int
+    recordsTotal: int
+    recordsFiltered: int
+    data: List[T]
+    next_cursor: Optional[str] = None
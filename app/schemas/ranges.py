@@ -1,18 +1,44 @@
 # app/schemas/ranges.py
-from pydantic import BaseModel, constr
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, constr, conint
+
+# shortest allowed scan interval, in seconds
+ScanInterval = conint(ge=30)
+# per-range probe rate cap, packets per second
+MaxPps = conint(ge=1)
 
 class RangeBase(BaseModel):
     cidr: constr(strip_whitespace=True, min_length=1)
 
 class RangeCreate(RangeBase):
-    pass
+    scan_interval: Optional[ScanInterval] = None
+    scan_priority: int = 0
+    max_pps: Optional[MaxPps] = None
+    agent_site: Optional[constr(strip_whitespace=True, min_length=1, max_length=50)] = None
 
 class RangeRead(RangeBase):
     id: int
     active: bool
+    scan_interval: Optional[int] = None
+    scan_priority: int = 0
+    last_run_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    next_run_at: Optional[datetime] = None
+    max_pps: Optional[int] = None
+    agent_site: Optional[str] = None
 
     class Config:
         orm_mode = True
 
 class RangeUpdate(BaseModel):
-    active: bool
+    # only the fields that are sent are changed;
+    # scan_interval=null turns scheduled scans off
+    active: Optional[bool] = None
+    scan_interval: Optional[ScanInterval] = None
+    scan_priority: Optional[int] = None
+    # max_pps=null falls back to the default per-range cap
+    max_pps: Optional[MaxPps] = None
+    # scan from remote agents of this site; null scans from the API host
+    agent_site: Optional[constr(strip_whitespace=True, min_length=1, max_length=50)] = None
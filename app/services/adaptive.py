@@ -0,0 +1,83 @@
+# app/services/adaptive.py
+"""
+Adaptive probing (ADAPTIVE_PROBING=true).
+
+Instead of probing every address of a range with full effort on every
+sweep, the scanner plans each sweep from the state already in
+`live_monitor`:
+
+    Up, recently Down, unknown    probed every sweep, with nmap fallback
+    dormant (Down / never Up for  probed only every ADAPTIVE_DORMANT_INTERVAL
+    ADAPTIVE_DORMANT_AFTER)       seconds, ICMP only
+
+A dormant address that shows up in the kernel neighbour table is probed
+right away regardless. Hosts that were Up but stay silent are re-checked
+immediately by probe_hosts (its `recheck` set) so a lost echo doesn't
+mark them Down. Skipped hosts get no row, so their `live_monitor` state
+and `last_checked` stay as of their last real probe.
+"""
+
+import datetime
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import LiveMonitor
+from app.utils.netaddr import in_cidr
+
+
+class HostState(NamedTuple):
+    status: str
+    last_checked: datetime.datetime
+    last_up: datetime.datetime | None
+
+
+class ProbePlan(NamedTuple):
+    probe: list[str]      # hosts to probe this sweep, in range order
+    thorough: set[str]    # of those, the ones that also get the nmap fallback
+    skipped: int          # dormant hosts left alone this sweep
+
+
+async def load_host_states(db: AsyncSession, cidr: str) -> dict[str, HostState]:
+    """Current live_monitor state of every address in `cidr`."""
+    stmt = (
+        select(LiveMonitor.ip, LiveMonitor.status, LiveMonitor.last_checked, LiveMonitor.last_up)
+        .where(in_cidr(LiveMonitor.ip_bin, cidr))
+    )
+    return {
+        ip: HostState(status, last_checked, last_up)
+        for ip, status, last_checked, last_up in (await db.execute(stmt)).all()
+    }
+
+
+def is_dormant(state: HostState, now: datetime.datetime) -> bool:
+    if state.status == "Up":
+        return False
+    if state.last_up is None:
+        # never seen Up: dormant once we have checked it at least once
+        return True
+    return (now - state.last_up).total_seconds() >= settings.adaptive_dormant_after
+
+
+def plan_probes(
+    hosts: Iterable[str],
+    states: dict[str, HostState],
+    neighbours: dict[str, str],
+    now: datetime.datetime,
+) -> ProbePlan:
+    probe: list[str] = []
+    thorough: set[str] = set()
+    skipped = 0
+    for ip in hosts:
+        state = states.get(ip)
+        if state is None or not is_dormant(state, now) or ip in neighbours:
+            probe.append(ip)
+            thorough.add(ip)
+        elif (now - state.last_checked).total_seconds() >= settings.adaptive_dormant_interval:
+            probe.append(ip)
+        else:
+            skipped += 1
+    return ProbePlan(probe, thorough, skipped)
+
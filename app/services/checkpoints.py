@@ -0,0 +1,183 @@
+# app/services/checkpoints.py
+"""
+Resume points for local sweeps.
+
+scan_cidr commits a range chunk by chunk (see app.services.hosts); after
+each chunk it records in `scan_checkpoints`, in the same transaction, how
+many chunks of the range are done. A sweep that dies halfway (restart,
+crash, failed job) leaves its row behind, and the next sweep of the
+range, whether re-triggered by hand, by the scheduler or on startup,
+skips the chunks already stored. The row is removed when a sweep
+completes.
+
+A checkpoint only applies to the same SCAN_CHUNK_SIZE, and one older
+than SCAN_CHECKPOINT_MAX_AGE is ignored: the sweep starts over.
+
+The row also names the sweep that holds it (`owner`: host, pid and a
+per-sweep token), which refreshes `heartbeat_at` with every chunk and
+every SCAN_CHECKPOINT_STALE_AFTER / 3 seconds in between. A checkpoint
+whose heartbeat is younger than SCAN_CHECKPOINT_STALE_AFTER belongs to a
+live sweep: `start_sweep` refuses to start a second sweep of the range
+and `claim_interrupted` leaves it alone. A sweep that fails clears its
+heartbeat, so it can be resumed right away.
+"""
+
+import datetime
+import logging
+import os
+import socket
+import uuid
+
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import ScanCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+class SweepInProgress(RuntimeError):
+    """Another live sweep holds the range's checkpoint."""
+
+
+def sweep_owner() -> str:
+    """A new owner token for one sweep."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _stale_cutoff(now: datetime.datetime) -> datetime.datetime:
+    return now - datetime.timedelta(seconds=settings.scan_checkpoint_stale_after)
+
+
+async def start_sweep(db: AsyncSession, cidr: str, chunk_size: int, owner: str) -> int:
+    """
+    Take the checkpoint of `cidr` for the sweep `owner` and return the
+    number of leading chunks an interrupted sweep already stored. Raises
+    SweepInProgress if a live sweep holds it. Commits.
+    """
+    now = datetime.datetime.utcnow()
+    cp = (await db.execute(
+        select(ScanCheckpoint).where(ScanCheckpoint.cidr == cidr).with_for_update()
+    )).scalar_one_or_none()
+    if cp is None:
+        db.add(ScanCheckpoint(
+            cidr=cidr, chunk_size=chunk_size, chunks_done=0, started_at=now, updated_at=now,
+            owner=owner, heartbeat_at=now,
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # another sweep created it in the meantime
+            await db.rollback()
+            raise SweepInProgress(f"{cidr} is already being swept")
+        return 0
+
+    if cp.heartbeat_at is not None and cp.heartbeat_at >= _stale_cutoff(now):
+        held_by = cp.owner
+        await db.rollback()
+        raise SweepInProgress(f"{cidr} is already being swept by {held_by}")
+
+    age = (now - cp.updated_at).total_seconds()
+    if cp.chunk_size == chunk_size and age <= settings.scan_checkpoint_max_age:
+        resume_at = cp.chunks_done
+        logger.info("%s: resuming after %d stored chunk(s)", cidr, resume_at)
+    else:
+        resume_at = 0
+        cp.chunk_size, cp.chunks_done, cp.started_at = chunk_size, 0, now
+    cp.owner, cp.heartbeat_at, cp.updated_at = owner, now, now
+    await db.commit()
+    return resume_at
+
+
+async def heartbeat(db: AsyncSession, cidr: str, owner: str) -> bool:
+    """Refresh the heartbeat of `owner`'s sweep; False if it lost the checkpoint. Not committed."""
+    res = await db.execute(
+        update(ScanCheckpoint)
+        .where(ScanCheckpoint.cidr == cidr, ScanCheckpoint.owner == owner)
+        .values(heartbeat_at=datetime.datetime.utcnow())
+    )
+    return res.rowcount == 1
+
+
+async def release_checkpoint(db: AsyncSession, cidr: str, owner: str) -> None:
+    """Mark `owner`'s failed sweep as no longer live, keeping its resume point. Not committed."""
+    await db.execute(
+        update(ScanCheckpoint)
+        .where(ScanCheckpoint.cidr == cidr, ScanCheckpoint.owner == owner)
+        .values(heartbeat_at=None)
+    )
+
+
+async def save_checkpoint(
+    db: AsyncSession,
+    cidr: str,
+    chunk_size: int,
+    chunks_done: int,
+    started_at: datetime.datetime,
+    owner: str,
+) -> None:
+    """Record that the first `chunks_done` chunks of `cidr` are stored. Not committed."""
+    now = datetime.datetime.utcnow()
+    ins = mysql_insert(ScanCheckpoint.__table__).values(
+        cidr=cidr,
+        chunk_size=chunk_size,
+        chunks_done=chunks_done,
+        started_at=started_at,
+        updated_at=now,
+        owner=owner,
+        heartbeat_at=now,
+    )
+    await db.execute(ins.on_duplicate_key_update({
+        "chunk_size":   ins.inserted.chunk_size,
+        "chunks_done":  ins.inserted.chunks_done,
+        "updated_at":   ins.inserted.updated_at,
+        "owner":        ins.inserted.owner,
+        "heartbeat_at": ins.inserted.heartbeat_at,
+    }))
+
+
+async def clear_checkpoint(db: AsyncSession, cidr: str) -> None:
+    """Forget the resume point of a completed sweep. Not committed."""
+    await db.execute(delete(ScanCheckpoint).where(ScanCheckpoint.cidr == cidr))
+
+
+async def live_sweeps(db: AsyncSession, cidrs: list[str]) -> set[str]:
+    """Those of `cidrs` whose checkpoint is held by a live sweep."""
+    if not cidrs:
+        return set()
+    q = await db.execute(
+        select(ScanCheckpoint.cidr).where(
+            ScanCheckpoint.cidr.in_(cidrs),
+            ScanCheckpoint.heartbeat_at >= _stale_cutoff(datetime.datetime.utcnow()),
+        )
+    )
+    return set(q.scalars().all())
+
+
+async def claim_interrupted(db: AsyncSession) -> list[str]:
+    """
+    CIDRs of recent interrupted sweeps (no live heartbeat), each claimed
+    by bumping its `updated_at` so that only one of several API workers
+    resumes it. Not committed.
+    """
+    now = datetime.datetime.utcnow()
+    cutoff = now - datetime.timedelta(seconds=settings.scan_checkpoint_max_age)
+    q = await db.execute(
+        select(ScanCheckpoint).where(
+            ScanCheckpoint.updated_at >= cutoff,
+            or_(ScanCheckpoint.heartbeat_at.is_(None), ScanCheckpoint.heartbeat_at < _stale_cutoff(now)),
+        )
+    )
+    claimed: list[str] = []
+    for cp in q.scalars().all():
+        res = await db.execute(
+            update(ScanCheckpoint)
+            .where(ScanCheckpoint.cidr == cp.cidr, ScanCheckpoint.updated_at == cp.updated_at)
+            .values(updated_at=datetime.datetime.utcnow())
+        )
+        if res.rowcount == 1:
+            claimed.append(cp.cidr)
+    return claimed
@@ -0,0 +1,59 @@
+# app/services/events.py
+"""
+In-process publish/subscribe for live scan updates.
+
+The scanner publishes small dict events as it goes:
+
+    {"type": "host",  "cidr": ..., "ip": ..., "status": "Up"/"Down", ...}
+    {"type": "phase", "cidr": ..., "phase": ...}
+    {"type": "job",   ...ScanJob.as_dict()}
+
+and GET /api/live/stream relays them to browsers as Server-Sent Events.
+Each subscriber gets its own bounded queue; a subscriber that falls that
+far behind is sent a "resync" event (reload everything) and its backlog
+is dropped, so one slow client never holds up a scan.
+
+Events only reach subscribers of the same API worker process. Scans run
+in the shared scan worker (app.services.worker) forward their events
+through `forward_to` to every API process connected to it.
+"""
+
+import asyncio
+from typing import Callable
+
+# events buffered per subscriber before it is told to resync
+_QUEUE_SIZE = 1000
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue] = set()
+        self._forward: Callable[[dict], None] | None = None
+
+    def forward_to(self, sink: Callable[[dict], None] | None) -> None:
+        """Send every published event to `sink` instead of local subscribers."""
+        self._forward = sink
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        self._subscribers.discard(q)
+
+    def publish(self, event: dict) -> None:
+        if self._forward is not None:
+            self._forward(event)
+            return
+        for q in self._subscribers:
+            try:
+                q.put_nowait(event)
+            except asyncio.QueueFull:
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait({"type": "resync"})
+
+
+# Module-level singleton, like `settings`
+broker = EventBroker()
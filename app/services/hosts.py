@@ -0,0 +1,57 @@
+# app/services/hosts.py
+"""
+Lazy host enumeration.
+
+`ip_network(cidr).hosts()` is lazy, but every caller used to turn it into
+a list of strings up front; for a /16 that's ~65k strings before any work
+starts. These helpers walk a range as consecutive sub-networks, yielding
+one bounded chunk of address strings at a time, so memory use follows the
+chunk size rather than the prefix length. Each chunk comes with its
+sub-network, which callers use to scope their DB queries to the chunk.
+"""
+
+import ipaddress
+from typing import Iterator
+
+
+def host_count(cidr: str) -> int:
+    """Number of addresses `ip_network(cidr).hosts()` yields, without enumerating them."""
+    net = ipaddress.ip_network(cidr, strict=False)
+    if net.version == 4:
+        return net.num_addresses - 2 if net.prefixlen < 31 else net.num_addresses
+    return net.num_addresses - 1 if net.prefixlen < 127 else net.num_addresses
+
+
+def _excluded(net: ipaddress._BaseNetwork) -> set[int]:
+    """Addresses of `net` that `net.hosts()` leaves out."""
+    if net.version == 4:
+        if net.prefixlen >= 31:
+            return set()
+        return {int(net.network_address), int(net.broadcast_address)}
+    # IPv6: the subnet-router anycast address
+    return set() if net.prefixlen >= 127 else {int(net.network_address)}
+
+
+def iter_host_chunks(cidr: str, chunk_size: int) -> Iterator[tuple[str, list[str]]]:
+    """
+    Yield (sub_cidr, hosts) for consecutive sub-networks of `cidr` holding
+    at most `chunk_size` addresses each; together the chunks list exactly
+    the addresses `ip_network(cidr).hosts()` would, in the same order.
+    """
+    net  = ipaddress.ip_network(cidr, strict=False)
+    bits = max(chunk_size, 1).bit_length() - 1          # largest 2**bits <= chunk_size
+    new_prefix = max(net.prefixlen, net.max_prefixlen - bits)
+    skip = _excluded(net)
+    addr = ipaddress.ip_address
+    subnets = [net] if new_prefix == net.prefixlen else net.subnets(new_prefix=new_prefix)
+    for sub in subnets:
+        first, last = int(sub.network_address), int(sub.broadcast_address)
+        hosts = [str(addr(i)) for i in range(first, last + 1) if i not in skip]
+        if hosts:
+            yield str(sub), hosts
+
+
+def iter_hosts(cidr: str, chunk_size: int = 4096) -> Iterator[str]:
+    """Every host address of `cidr` as a string, generated chunk by chunk."""
+    for _sub, hosts in iter_host_chunks(cidr, chunk_size):
+        yield from hosts
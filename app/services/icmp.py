@@ -0,0 +1,235 @@
+# app/services/icmp.py
+"""
+In-process ICMP echo sweeper for the scanner's probe stage.
+
+One socket per address family is opened for the whole sweep and echo
+requests are pipelined through it: at most `batch_size` requests are in
+flight at once, replies are matched back to hosts by sequence number (and
+by identifier on raw sockets), and each host ends up with its round-trip
+time in milliseconds, or None when no reply arrived within `timeout`.
+
+Unprivileged datagram ICMP sockets are tried first (Linux allows them for
+groups listed in `net.ipv4.ping_group_range`); raw sockets are the fallback
+when the process has CAP_NET_RAW. If neither can be opened, `IcmpUnavailable`
+is raised so the caller can fall back to the `ping` binary.
+"""
+
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+import time
+from typing import Awaitable, Callable, Iterable
+
+ICMP_ECHO_REQUEST  = 8
+ICMP_ECHO_REPLY    = 0
+ICMP6_ECHO_REQUEST = 128
+ICMP6_ECHO_REPLY   = 129
+
+_HEADER  = struct.Struct("!BBHHH")
+_PAYLOAD = b"naos-ip-map-sweep"
+
+
+class IcmpUnavailable(RuntimeError):
+    """Neither a datagram nor a raw ICMP socket could be opened."""
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _open_socket(family: int) -> tuple[socket.socket, bool]:
+    """
+    Return (socket, is_raw). Datagram sockets are preferred because
+    they need no privileges and the kernel filters replies for us.
+    """
+    proto = socket.IPPROTO_ICMP if family == socket.AF_INET else socket.IPPROTO_ICMPV6
+    for kind in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            sock = socket.socket(family, kind, proto)
+        except OSError:
+            continue
+        sock.setblocking(False)
+        return sock, kind == socket.SOCK_RAW
+    raise IcmpUnavailable(
+        "cannot open an ICMP socket (check net.ipv4.ping_group_range or CAP_NET_RAW)"
+    )
+
+
+def _build_echo(family: int, ident: int, seq: int) -> bytes:
+    if family == socket.AF_INET6:
+        # the kernel fills in the ICMPv6 checksum (it covers the pseudo-header)
+        return _HEADER.pack(ICMP6_ECHO_REQUEST, 0, 0, ident, seq) + _PAYLOAD
+    header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = _checksum(header + _PAYLOAD)
+    return _HEADER.pack(ICMP_ECHO_REQUEST, 0, csum, ident, seq) + _PAYLOAD
+
+
+def _parse_reply(family: int, data: bytes, raw: bool) -> tuple[int, int] | None:
+    """Return (ident, seq) for an echo reply, None for anything else."""
+    if family == socket.AF_INET and raw:
+        # raw IPv4 sockets hand us the IP header as well
+        data = data[(data[0] & 0x0F) * 4:] if data else data
+    if len(data) < _HEADER.size:
+        return None
+    icmp_type, _code, _csum, ident, seq = _HEADER.unpack_from(data)
+    expected = ICMP_ECHO_REPLY if family == socket.AF_INET else ICMP6_ECHO_REPLY
+    if icmp_type != expected:
+        return None
+    return ident, seq
+
+
+class _EchoSweep:
+    """Pipelined echo sweep over a single socket for one address family."""
+
+    def __init__(
+        self,
+        family: int,
+        timeout: float,
+        batch_size: int,
+        shared_window: asyncio.Semaphore | None = None,
+        on_done: Callable[[str, float | None], None] | None = None,
+        pace: Callable[[], Awaitable[None]] | None = None,
+    ):
+        self.family  = family
+        self.timeout = timeout
+        self.sock, self.raw = _open_socket(family)
+        # datagram sockets get their identifier rewritten by the kernel,
+        # so it only matters (and is only checked) on raw sockets
+        self.ident   = os.getpid() & 0xFFFF
+        self.pending: dict[int, tuple[str, float]] = {}
+        self.results: dict[str, float | None] = {}
+        self._slots   = asyncio.Semaphore(max(1, min(batch_size, 0xFFFF)))
+        # in-flight budget shared with sweeps of other ranges; asyncio
+        # semaphores wake waiters FIFO, so concurrent sweeps interleave
+        self._shared  = shared_window
+        self._on_done = on_done
+        self._pace    = pace
+        self._drained = asyncio.Event()
+        self._sending = True
+
+    def _finish(self, seq: int, rtt: float | None) -> None:
+        ip, _sent = self.pending.pop(seq)
+        self.results[ip] = rtt
+        self._slots.release()
+        if self._shared is not None:
+            self._shared.release()
+        if self._on_done is not None:
+            self._on_done(ip, rtt)
+        if not self._sending and not self.pending:
+            self._drained.set()
+
+    def _expire(self, seq: int, ip: str) -> None:
+        entry = self.pending.get(seq)
+        if entry and entry[0] == ip:
+            self._finish(seq, None)
+
+    async def _receive(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            data, addr = await loop.sock_recvfrom(self.sock, 2048)
+            parsed = _parse_reply(self.family, data, self.raw)
+            if parsed is None:
+                continue
+            ident, seq = parsed
+            if self.raw and ident != self.ident:
+                continue
+            entry = self.pending.get(seq)
+            if not entry:
+                continue
+            ip, sent = entry
+            src = addr[0].split("%", 1)[0]
+            if ipaddress.ip_address(src) != ipaddress.ip_address(ip):
+                continue
+            self._finish(seq, (time.monotonic() - sent) * 1000.0)
+
+    async def run(self, hosts: list[str]) -> dict[str, float | None]:
+        loop = asyncio.get_running_loop()
+        receiver = asyncio.create_task(self._receive())
+        try:
+            for i, ip in enumerate(hosts):
+                await self._slots.acquire()
+                if self._shared is not None:
+                    await self._shared.acquire()
+                if self._pace is not None:
+                    try:
+                        await self._pace()
+                    except BaseException:
+                        # not pending yet, so the cleanup below won't release it
+                        if self._shared is not None:
+                            self._shared.release()
+                        raise
+                # the window is smaller than the sequence space, so a
+                # wrapped sequence number is never still pending
+                seq = i & 0xFFFF
+                self.pending[seq] = (ip, time.monotonic())
+                try:
+                    await loop.sock_sendto(
+                        self.sock, _build_echo(self.family, self.ident, seq), (ip, 0)
+                    )
+                except OSError:
+                    # unroutable / rejected locally: definitely not reachable
+                    self._finish(seq, None)
+                    continue
+                loop.call_later(self.timeout, self._expire, seq, ip)
+
+            self._sending = False
+            if self.pending:
+                await self._drained.wait()
+        finally:
+            receiver.cancel()
+            try:
+                await receiver
+            except asyncio.CancelledError:
+                pass
+            self.sock.close()
+            # on cancellation, hand back shared slots still held by pending echoes
+            if self._shared is not None:
+                for _ in self.pending:
+                    self._shared.release()
+            self.pending.clear()
+        return self.results
+
+
+async def icmp_sweep(
+    hosts: Iterable[str],
+    timeout: float = 1.0,
+    batch_size: int = 256,
+    retries: int = 0,
+    shared_window: asyncio.Semaphore | None = None,
+    on_done: Callable[[str, float | None], None] | None = None,
+    pace: Callable[[], Awaitable[None]] | None = None,
+) -> dict[str, float | None]:
+    """
+    Send one ICMP echo to every host and return {ip: rtt_ms or None}.
+    Hosts that stay silent are re-probed up to `retries` more times.
+    `shared_window`, when given, additionally caps echoes in flight
+    across every sweep that shares it. `on_done(ip, rtt)` is called as
+    each host's first attempt completes (for progress reporting), and
+    `pace()` is awaited before every echo sent (rate limiting).
+    Raises IcmpUnavailable if no ICMP socket can be opened.
+    """
+    by_family: dict[int, list[str]] = {}
+    for ip in hosts:
+        fam = socket.AF_INET6 if ipaddress.ip_address(ip).version == 6 else socket.AF_INET
+        by_family.setdefault(fam, []).append(ip)
+
+    results: dict[str, float | None] = {}
+    for family, todo in by_family.items():
+        for attempt in range(retries + 1):
+            if not todo:
+                break
+            sweep = _EchoSweep(
+                family, timeout, batch_size, shared_window,
+                on_done if attempt == 0 else None,
+                pace,
+            )
+            results.update(await sweep.run(todo))
+            todo = [ip for ip in todo if results.get(ip) is None]
+    return results
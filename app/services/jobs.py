@@ -0,0 +1,234 @@
+# app/services/jobs.py
+"""
+Background scan jobs.
+
+POST /api/live/scan hands its ranges to `scan_jobs.submit()`, which starts
+`scan_nets` in the background and returns immediately with a job id.
+Progress (phase, hosts probed, ETA) is read back from the job's
+ScanProgress, jobs can be cancelled, and a request for exactly the same
+set of ranges while a scan of them is still running joins that job
+instead of starting a second one.
+
+The registry lives where the jobs run. With SCAN_WORKER=process (the
+default) that is the host's shared scan worker (app.services.worker):
+`scan_jobs` is a `SharedScanJobs`, which submits and cancels jobs there
+and keeps a mirror of the worker's registry that the worker updates as
+jobs progress, so every API process can report on (and deduplicate
+against) every job. With SCAN_WORKER=inline, single-process deployments
+only, `scan_jobs` is a plain `ScanJobManager` running jobs on the API
+event loop.
+"""
+
+import asyncio
+import datetime
+import logging
+import uuid
+
+from app.config import settings
+from app.services.events import broker
+from app.services.scanner import scan_nets, ScanProgress
+from app.services.worker import scan_worker, ScanWorkerClient
+
+logger = logging.getLogger(__name__)
+
+# finished jobs kept around for status polling
+_KEEP_FINISHED = 50
+
+
+class ScanJob:
+    def __init__(self, nets: list[str]):
+        self.id          = uuid.uuid4().hex
+        self.nets        = nets
+        self.status      = "queued"   # queued / running / completed / failed / cancelled
+        self.error: str | None = None
+        self.progress    = ScanProgress(nets)
+        self.created_at  = datetime.datetime.utcnow()
+        self.started_at: datetime.datetime | None  = None
+        self.finished_at: datetime.datetime | None = None
+        self.task: asyncio.Task | None = None
+        self._done = asyncio.Event()
+
+    @classmethod
+    def restore(cls, state: dict) -> "ScanJob":
+        """A mirror of a job running elsewhere, from its as_dict()."""
+        job = cls(list(state["ranges"]))
+        job.id         = state["job_id"]
+        job.created_at = state["created_at"]
+        job.apply(state)
+        return job
+
+    def apply(self, state: dict) -> None:
+        """Bring a mirrored job up to date with its as_dict()."""
+        self.status      = state["status"]
+        self.error       = state["error"]
+        self.started_at  = state["started_at"]
+        self.finished_at = state["finished_at"]
+        self.progress.ranges       = dict(state["ranges"])
+        self.progress.hosts_total  = state["hosts_total"]
+        self.progress.hosts_probed = state["hosts_probed"]
+        if self.finished:
+            self._done.set()
+
+    def finish(self, status: str, error: str | None = None) -> None:
+        self.status      = status
+        self.error       = error
+        self.finished_at = datetime.datetime.utcnow()
+        self._done.set()
+
+    async def wait(self) -> None:
+        """Return once the job has finished, whatever the outcome."""
+        await self._done.wait()
+
+    @property
+    def key(self) -> frozenset:
+        return frozenset(self.nets)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def eta_seconds(self) -> float | None:
+        """Linear estimate from the probe rate so far."""
+        p = self.progress
+        if self.finished:
+            return 0.0
+        if not self.started_at or not p.hosts_probed:
+            return None
+        elapsed = (datetime.datetime.utcnow() - self.started_at).total_seconds()
+        remaining = max(p.hosts_total - p.hosts_probed, 0)
+        return elapsed * remaining / p.hosts_probed
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id":       self.id,
+            "status":       self.status,
+            "phase":        self.progress.phase,
+            "ranges":       dict(self.progress.ranges),
+            "hosts_total":  self.progress.hosts_total,
+            "hosts_probed": self.progress.hosts_probed,
+            "eta_seconds":  self.eta_seconds(),
+            "error":        self.error,
+            "created_at":   self.created_at,
+            "started_at":   self.started_at,
+            "finished_at":  self.finished_at,
+        }
+
+
+class ScanJobManager:
+    """Registry of the scan jobs run by this process."""
+
+    def __init__(self):
+        self.jobs: dict[str, ScanJob] = {}
+        self._active: dict[frozenset, ScanJob] = {}
+
+    async def submit(self, nets: list[str]) -> tuple[ScanJob, bool]:
+        """
+        Start a scan of `nets` (or join an identical running one).
+        Returns (job, created).
+        """
+        key = frozenset(nets)
+        job = self._active.get(key)
+        if job is not None and not job.finished:
+            return job, False
+
+        # keep the caller's order: earlier ranges get the scan budget first
+        job = ScanJob(list(dict.fromkeys(nets)))
+        self.jobs[job.id] = job
+        self._active[key] = job
+        job.task = asyncio.create_task(self._run(job))
+        self._forget_old()
+        return job, True
+
+    def get(self, job_id: str) -> ScanJob | None:
+        return self.jobs.get(job_id)
+
+    def running(self) -> list[ScanJob]:
+        return [j for j in self.jobs.values() if not j.finished]
+
+    def scanning(self, cidr: str) -> bool:
+        """True if an unfinished job includes `cidr`."""
+        return any(cidr in job.nets for job in self.running())
+
+    def cancel(self, job_id: str) -> ScanJob | None:
+        job = self.jobs.get(job_id)
+        if job is not None and not job.finished and job.task is not None:
+            job.task.cancel()
+        return job
+
+    async def _run(self, job: ScanJob) -> None:
+        job.status = "running"
+        job.started_at = datetime.datetime.utcnow()
+        broker.publish({"type": "job", **job.as_dict()})
+        status, error = "failed", None
+        try:
+            outcomes = await scan_nets(job.nets, progress=job.progress)
+            failed = [c for c, o in outcomes.items() if isinstance(o, BaseException)]
+            if failed:
+                error = f"{len(failed)} range(s) failed: {', '.join(failed)}"
+            else:
+                status = "completed"
+        except asyncio.CancelledError:
+            status = "cancelled"
+        except Exception as exc:
+            logger.exception("scan job %s failed", job.id)
+            error = str(exc)
+        finally:
+            job.finish(status, error)
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+            broker.publish({"type": "job", **job.as_dict()})
+
+    def _forget_old(self) -> None:
+        finished = [j for j in self.jobs.values() if j.finished]
+        finished.sort(key=lambda j: j.finished_at)
+        for job in finished[:-_KEEP_FINISHED]:
+            del self.jobs[job.id]
+
+
+class SharedScanJobs(ScanJobManager):
+    """
+    The scan worker's job registry as seen from an API process: submit
+    and cancel go to the worker (which deduplicates), and `jobs` mirrors
+    its jobs, including those other API processes submitted.
+    """
+
+    def __init__(self, worker: ScanWorkerClient):
+        super().__init__()
+        self._worker = worker
+        worker.on_jobs = self._sync
+
+    async def submit(self, nets: list[str]) -> tuple[ScanJob, bool]:
+        state, created = await self._worker.request("submit", list(dict.fromkeys(nets)))
+        return self._mirror(state), created
+
+    def cancel(self, job_id: str) -> ScanJob | None:
+        job = self.jobs.get(job_id)
+        if job is not None and not job.finished:
+            self._worker.notify("cancel", job_id)
+        return job
+
+    def _mirror(self, state: dict) -> ScanJob:
+        job = self.jobs.get(state["job_id"])
+        if job is None:
+            job = self.jobs[state["job_id"]] = ScanJob.restore(state)
+        else:
+            job.apply(state)
+        return job
+
+    def _sync(self, states: list[dict], snapshot: bool) -> None:
+        for state in states:
+            self._mirror(state)
+        if snapshot:
+            # the worker's whole registry: unfinished jobs it doesn't know
+            # died with the worker that ran them
+            known = {state["job_id"] for state in states}
+            for job in self.running():
+                if job.id not in known:
+                    job.finish("failed", "scan worker exited")
+        self._forget_old()
+
+
+# Module-level singleton, like `settings`
+scan_jobs: ScanJobManager = (
+    ScanJobManager() if settings.scan_worker == "inline" else SharedScanJobs(scan_worker)
+)
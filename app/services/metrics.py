@@ -0,0 +1,181 @@
+# app/services/metrics.py
+"""
+Per-phase instrumentation of local sweeps.
+
+scan_cidr fills a `RunMetrics` as it goes: seconds spent in each phase
+(probe sweep, re-check of hosts that went silent, neighbour table read,
+fallback probe, owner lookup, reverse DNS, DB write), host counts, DNS
+outcomes and rows written. `_scan_range` stores it as a `scan_runs` row
+when the range finishes or fails, so the numbers outlive the process
+that did the sweep (including scan worker processes).
+
+`render_prometheus` turns the most recent run of every range, plus the
+in-process probe rate, DNS cache and retention counters, into the Prometheus text
+exposition format served at GET /metrics; `last_runs` feeds the admin
+dashboard.
+"""
+
+import datetime
+import time
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ScanRun
+from app.services.ratelimit import probe_rates
+from app.services.resolver import resolver
+from app.services.retention import pruner
+
+# timed phases, in pipeline order; each maps to a scan_runs.seconds_<phase> column
+PHASES = ("probe", "recheck", "mac", "fallback", "owners", "dns", "persist")
+
+
+class RunMetrics:
+    def __init__(self, cidr: str, hosts_total: int = 0):
+        self.cidr           = cidr
+        self.started_at     = datetime.datetime.utcnow()
+        self._start         = time.perf_counter()
+        self.seconds: dict[str, float] = {}
+        self.hosts_total    = hosts_total
+        self.hosts_probed   = 0
+        self.hosts_up       = 0
+        self.rows_written   = 0
+        self.dns_lookups    = 0
+        self.dns_unresolved = 0
+
+    def to_row(self, status: str, error: str | None = None) -> ScanRun:
+        return ScanRun(
+            cidr=self.cidr,
+            status=status,
+            error=error,
+            started_at=self.started_at,
+            finished_at=datetime.datetime.utcnow(),
+            hosts_total=self.hosts_total,
+            hosts_probed=self.hosts_probed,
+            hosts_up=self.hosts_up,
+            rows_written=self.rows_written,
+            dns_lookups=self.dns_lookups,
+            dns_unresolved=self.dns_unresolved,
+            seconds_total=time.perf_counter() - self._start,
+            **{f"seconds_{p}": self.seconds.get(p, 0.0) for p in PHASES},
+        )
+
+
+async def last_runs(db: AsyncSession) -> list[ScanRun]:
+    """The most recent scan_runs row of every range, by CIDR."""
+    latest = (
+        select(ScanRun.cidr, func.max(ScanRun.started_at).label("started_at"))
+        .group_by(ScanRun.cidr)
+        .subquery()
+    )
+    q = await db.execute(
+        select(ScanRun)
+        .join(latest, (ScanRun.cidr == latest.c.cidr) & (ScanRun.started_at == latest.c.started_at))
+        .order_by(ScanRun.cidr)
+    )
+    return q.scalars().all()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class _Exposition:
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def metric(self, name: str, kind: str, help_: str, samples) -> None:
+        self.lines.append(f"# HELP {name} {help_}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {float(value):g}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+async def render_prometheus(db: AsyncSession) -> str:
+    runs = await last_runs(db)
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    by_status = (await db.execute(
+        select(ScanRun.status, func.count(ScanRun.id))
+        .where(ScanRun.started_at >= since)
+        .group_by(ScanRun.status)
+    )).all()
+
+    out = _Exposition()
+    out.metric(
+        "ipmap_scan_runs_24h", "gauge", "Range sweeps started in the last 24 hours.",
+        (({"status": status}, n) for status, n in by_status),
+    )
+    out.metric(
+        "ipmap_scan_last_timestamp_seconds", "gauge", "Start of the range's most recent sweep.",
+        (({"cidr": r.cidr}, r.started_at.replace(tzinfo=datetime.timezone.utc).timestamp()) for r in runs),
+    )
+    out.metric(
+        "ipmap_scan_last_success", "gauge", "1 if the range's most recent sweep completed.",
+        (({"cidr": r.cidr}, r.status == "completed") for r in runs),
+    )
+    out.metric(
+        "ipmap_scan_last_duration_seconds", "gauge", "Wall-clock time of the range's most recent sweep.",
+        (({"cidr": r.cidr}, r.seconds_total) for r in runs),
+    )
+    out.metric(
+        "ipmap_scan_last_phase_seconds", "gauge",
+        "Time spent per phase in the range's most recent sweep (phases overlap across chunks).",
+        (({"cidr": r.cidr, "phase": p}, getattr(r, f"seconds_{p}")) for r in runs for p in PHASES),
+    )
+    out.metric(
+        "ipmap_scan_last_hosts", "gauge", "Hosts in, probed by and found up by the most recent sweep.",
+        (
+            ({"cidr": r.cidr, "kind": kind}, getattr(r, f"hosts_{kind}"))
+            for r in runs for kind in ("total", "probed", "up")
+        ),
+    )
+    out.metric(
+        "ipmap_scan_last_rows_written", "gauge", "live_monitor/history rows written by the most recent sweep.",
+        (({"cidr": r.cidr}, r.rows_written) for r in runs),
+    )
+    out.metric(
+        "ipmap_scan_last_dns_lookups", "gauge", "Reverse lookups made (and left unresolved) by the most recent sweep.",
+        (
+            ({"cidr": r.cidr, "result": result}, value)
+            for r in runs
+            for result, value in (("resolved", r.dns_lookups - r.dns_unresolved), ("unresolved", r.dns_unresolved))
+        ),
+    )
+
+    rates = probe_rates.stats()
+    out.metric(
+        "ipmap_probe_packets_total", "counter", "Probe packets sent by this process, by range.",
+        (({"cidr": cidr}, r["packets"]) for cidr, r in rates["ranges"].items()),
+    )
+    out.metric(
+        "ipmap_probe_rate_pps", "gauge", "Probe packets per second over the last 10 seconds.",
+        [({}, rates["global"]["achieved_pps"])],
+    )
+    out.metric(
+        "ipmap_probe_rate_limit_pps", "gauge", "Global probe rate cap (0 = unlimited).",
+        [({}, rates["global"]["limit_pps"])],
+    )
+    dns = resolver.stats()
+    out.metric(
+        "ipmap_dns_cache_total", "counter", "Reverse-DNS cache outcomes of the scans (the scan worker's cache).",
+        (({"result": k}, dns[k]) for k in ("hits", "negative_hits", "misses", "nxdomain", "timeouts", "errors")),
+    )
+    retention = pruner.stats()
+    out.metric(
+        "ipmap_retention_pruned_rows_total", "counter", "Rows removed by retention in this process, by table.",
+        (({"table": table}, r["total_rows"]) for table, r in retention.items()),
+    )
+    out.metric(
+        "ipmap_retention_last_pass_seconds", "gauge", "Duration of the last retention pass, by table.",
+        (({"table": table}, r["last_seconds"]) for table, r in retention.items()),
+    )
+    return out.text()
@@ -0,0 +1,94 @@
+# app/services/neighbours.py
+"""
+Kernel neighbour-table snapshot.
+
+Instead of forking `arp -n <ip>` per host, the scanner reads the whole
+neighbour table once per sweep (after the ICMP phase has populated it)
+and does MAC lookups against the resulting dict. Both sources are plain
+paths so tests can point them at fixture files.
+"""
+
+import re
+import subprocess
+
+ARP_TABLE_PATH = "/proc/net/arp"
+
+# /proc/net/arp flag for an incomplete entry (no reply to the ARP request)
+_ATF_COM = 0x2
+
+_MAC_RE = re.compile(r"^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
+_NULL_MAC = "00:00:00:00:00:00"
+
+
+def parse_arp_table(text: str) -> dict[str, str]:
+    """
+    Parse the contents of /proc/net/arp:
+
+        IP address  HW type  Flags  HW address         Mask  Device
+        10.0.0.1    0x1      0x2    aa:bb:cc:dd:ee:ff  *     eth0
+    """
+    table: dict[str, str] = {}
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        ip, _hw_type, flags, mac = fields[:4]
+        try:
+            complete = int(flags, 16) & _ATF_COM
+        except ValueError:
+            continue
+        if complete and _MAC_RE.match(mac) and mac != _NULL_MAC:
+            table[ip] = mac.upper()
+    return table
+
+
+def parse_ip_neigh(text: str) -> dict[str, str]:
+    """
+    Parse `ip -6 neigh show` output:
+
+        fe80::1 dev eth0 lladdr aa:bb:cc:dd:ee:ff router REACHABLE
+    """
+    table: dict[str, str] = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if "lladdr" not in fields or "FAILED" in fields or "INCOMPLETE" in fields:
+            continue
+        idx = fields.index("lladdr")
+        if idx + 1 < len(fields) and _MAC_RE.match(fields[idx + 1]):
+            table[fields[0]] = fields[idx + 1].upper()
+    return table
+
+
+def _read_ip_neigh(path: str | None) -> str:
+    # Linux exposes no /proc file for the IPv6 neighbour cache, so the
+    # live snapshot costs exactly one `ip` fork per sweep.
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            return fh.read()
+    try:
+        return subprocess.check_output(
+            ["ip", "-6", "neigh", "show"], stderr=subprocess.DEVNULL
+        ).decode()
+    except Exception:
+        return ""
+
+
+def read_neighbour_table(
+    arp_path: str = ARP_TABLE_PATH,
+    v6_path: str | None = None,
+    include_v6: bool = False,
+) -> dict[str, str]:
+    """
+    Snapshot the neighbour table into {ip: MAC (upper-case)}.
+    `v6_path` points at a saved `ip -6 neigh show` dump; when unset the
+    command is run once (only if `include_v6` is true).
+    """
+    table: dict[str, str] = {}
+    try:
+        with open(arp_path, encoding="utf-8") as fh:
+            table.update(parse_arp_table(fh.read()))
+    except OSError:
+        pass
+    if include_v6 or v6_path:
+        table.update(parse_ip_neigh(_read_ip_neigh(v6_path)))
+    return table
@@ -0,0 +1,170 @@
+# app/services/oui.py
+"""
+Compact, memory-mapped OUI vendor index.
+
+The Wireshark `manuf` file bundled with the `manuf` package is compiled
+once into a small binary index:
+
+    header   magic, entry count, blob size, bitmap of prefix lengths used
+    keys     sorted uint64: (MAC prefix, zero-padded to 48 bits) << 8 | prefix bits
+    offsets  uint32 per key into the name blob
+    blob     NUL-terminated short vendor names
+
+Every uvicorn worker maps the same file read-only instead of parsing the
+text database into per-process dicts. A lookup is a longest-prefix match
+(/36, then /28, then /24, plus the few other lengths the file uses), each
+a binary search over the keys, and an LRU sits in front of it.
+
+Build it ahead of time with `python -m app.services.oui`; otherwise it is
+(re)built on first use whenever the source file is newer than the index.
+"""
+
+import bisect
+import importlib.util
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from functools import lru_cache
+
+from app.config import settings
+
+# the index is a machine-local cache written in native byte order
+_MAGIC  = b"OUIl" if sys.byteorder == "little" else b"OUIb"
+# 24 bytes, so the uint64 keys that follow stay 8-byte aligned
+_HEADER = struct.Struct("=4sIIIQ")
+_SEP_RE = re.compile(r"[-:.]")
+
+
+def default_source_path() -> str:
+    """Path of the `manuf` text database shipped inside the manuf package."""
+    spec = importlib.util.find_spec("manuf")
+    if spec is None or not spec.submodule_search_locations:
+        raise FileNotFoundError("manuf package is not installed")
+    return os.path.join(list(spec.submodule_search_locations)[0], "manuf")
+
+
+def _key(value: int, nbits: int) -> int:
+    mask = ((1 << nbits) - 1) << (48 - nbits)
+    return ((value & mask) << 8) | nbits
+
+
+def parse_manuf(path: str) -> dict[int, str]:
+    """Parse a Wireshark manuf file into {key: short vendor name}."""
+    entries: dict[int, str] = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            fields = [f.strip() for f in line.replace("\t\t", "\t").split("\t")]
+            if len(fields) < 2:
+                continue
+            prefix, _, bits = fields[0].partition("/")
+            digits = _SEP_RE.sub("", prefix)
+            if not digits:
+                continue
+            nbits = int(bits) if bits else min(48, 4 * len(digits))
+            entries[_key(int(digits.ljust(12, "0")[:12], 16), nbits)] = fields[1]
+    return entries
+
+
+def compile_index(source: str, dest: str) -> int:
+    """Write the binary index for `source` to `dest` atomically; return entry count."""
+    entries = parse_manuf(source)
+    keys    = array("Q", sorted(entries))
+    offsets = array("I")
+    blob    = bytearray()
+    lengths = 0
+    for key in keys:
+        offsets.append(len(blob))
+        blob += entries[key].encode("utf-8") + b"\x00"
+        lengths |= 1 << (key & 0xFF)
+
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(_MAGIC, len(keys), len(blob), 0, lengths))
+        fh.write(keys.tobytes())
+        fh.write(offsets.tobytes())
+        fh.write(blob)
+    os.replace(tmp, dest)
+    return len(keys)
+
+
+class OuiIndex:
+    """Read-only view over a compiled index file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, _blob_len, _reserved, lengths = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not an OUI index for this platform")
+        view = memoryview(self._map)
+        keys_at  = _HEADER.size
+        offs_at  = keys_at + 8 * count
+        self._blob_at = offs_at + 4 * count
+        self._keys    = view[keys_at:offs_at].cast("Q")
+        self._offsets = view[offs_at:self._blob_at].cast("I")
+        # longest prefix first, as the manuf parser does
+        self._lengths = [n for n in range(48, 0, -1) if lengths >> n & 1]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _name_at(self, i: int) -> str:
+        start = self._blob_at + self._offsets[i]
+        end   = self._map.find(b"\x00", start)
+        return self._map[start:end].decode("utf-8")
+
+    def lookup(self, mac: str) -> str | None:
+        digits = _SEP_RE.sub("", mac)
+        if len(digits) != 12:
+            return None
+        try:
+            value = int(digits, 16)
+        except ValueError:
+            return None
+        for nbits in self._lengths:
+            key = _key(value, nbits)
+            i = bisect.bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                return self._name_at(i)
+        return None
+
+
+_index: OuiIndex | None = None
+
+
+def _index_is_stale(source: str, dest: str) -> bool:
+    try:
+        return os.path.getmtime(dest) < os.path.getmtime(source)
+    except OSError:
+        return True
+
+
+def get_index() -> OuiIndex:
+    """Map the index, compiling it first if it is missing or out of date."""
+    global _index
+    if _index is None:
+        source = settings.oui_source_path or default_source_path()
+        dest   = settings.oui_index_path
+        if _index_is_stale(source, dest):
+            compile_index(source, dest)
+        _index = OuiIndex(dest)
+    return _index
+
+
+@lru_cache(maxsize=8192)
+def lookup_vendor(mac: str) -> str | None:
+    """Short vendor name for a MAC address, or None if unknown."""
+    return get_index().lookup(mac.upper())
+
+
+if __name__ == "__main__":
+    src = settings.oui_source_path or default_source_path()
+    n = compile_index(src, settings.oui_index_path)
+    print(f"Compiled {n} OUI prefixes from {src} into {settings.oui_index_path}")
@@ -0,0 +1,90 @@
+# app/services/owners.py
+"""
+Set-based resolution of IP assignments to their owners' display names.
+
+One query joins `ips` to users/devices/servers, so callers that need
+owner names for a whole range (the scanner's hostname override, the IP
+map, the IP listings) no longer issue one lookup per address.
+"""
+
+from typing import NamedTuple
+
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import IP, OwnerType, User, Device, Server
+from app.utils.netaddr import in_cidr
+
+
+class IPOwner(NamedTuple):
+    ip_id:      int
+    ip_address: str
+    owner_type: OwnerType
+    owner_id:   int
+    # display name: username / device hostname / server name;
+    # None when the owner row no longer exists
+    name:       str | None
+    naos_id:    str | None
+
+
+async def load_ip_owners(
+    db: AsyncSession,
+    cidr: str | None = None,
+    owner_type: OwnerType | None = None,
+    ip_id: int | None = None,
+    ip_ids: list[int] | None = None,
+) -> list[IPOwner]:
+    """Return every assignment (optionally within `cidr`, of one owner type, or of some rows)."""
+    stmt = (
+        select(
+            IP.id, IP.ip_address, IP.owner_type, IP.owner_id,
+            User.username, Device.hostname, Server.server_name, User.naos_id,
+        )
+        .outerjoin(User,   and_(IP.owner_type == OwnerType.user,   IP.owner_id == User.id))
+        .outerjoin(Device, and_(IP.owner_type == OwnerType.device, IP.owner_id == Device.id))
+        .outerjoin(Server, and_(IP.owner_type == OwnerType.server, IP.owner_id == Server.id))
+        .order_by(IP.id)
+    )
+    if cidr:
+        stmt = stmt.where(in_cidr(IP.ip_bin, cidr))
+    if owner_type is not None:
+        stmt = stmt.where(IP.owner_type == owner_type)
+    if ip_id is not None:
+        stmt = stmt.where(IP.id == ip_id)
+    if ip_ids is not None:
+        stmt = stmt.where(IP.id.in_(ip_ids))
+
+    owners: list[IPOwner] = []
+    for row_id, addr, kind, owner_id, username, hostname, server_name, naos_id in (await db.execute(stmt)).all():
+        owners.append(IPOwner(
+            ip_id      = row_id,
+            ip_address = addr,
+            owner_type = kind,
+            owner_id   = owner_id,
+            name       = username or hostname or server_name,
+            naos_id    = naos_id,
+        ))
+    return owners
+
+
+async def owners_by_address(db: AsyncSession, cidr: str | None = None) -> dict[str, IPOwner]:
+    """{ip_address: owner}; if an address is assigned twice the oldest row wins."""
+    out: dict[str, IPOwner] = {}
+    for owner in await load_ip_owners(db, cidr):
+        out.setdefault(owner.ip_address, owner)
+    return out
+
+
+async def owners_by_ip_id(
+    db: AsyncSession,
+    owner_type: OwnerType | None = None,
+    ip_ids: list[int] | None = None,
+) -> dict[int, IPOwner]:
+    """{ips.id: owner}, for enriching IP listings (or one page of one)."""
+    return {o.ip_id: o for o in await load_ip_owners(db, owner_type=owner_type, ip_ids=ip_ids)}
+
+
+async def owner_of(db: AsyncSession, ip_id: int) -> IPOwner | None:
+    """Owner of a single `ips` row."""
+    owners = await load_ip_owners(db, ip_id=ip_id)
+    return owners[0] if owners else None
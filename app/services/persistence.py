@@ -0,0 +1,159 @@
+# app/services/persistence.py
+"""
+Set-based persistence stage for scan results.
+
+Rows are written in chunks of `settings.scan_db_chunk_size`: one
+multi-row `INSERT ... ON DUPLICATE KEY UPDATE` into live_monitor and one
+multi-row INSERT into history per chunk, instead of two statements per IP.
+
+With `settings.history_mode == "transitions"` history only grows when a
+host's state (status, MAC, hostname or vendor) changes: each history row
+is an interval [scan_time, last_seen] whose end is pushed forward by a
+single bulk UPDATE while the state stays the same.
+"""
+
+import logging
+import time
+from typing import NamedTuple
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app.config import settings
+from app.models import LiveMonitor, History
+
+logger = logging.getLogger(__name__)
+
+
+class PersistStats(NamedTuple):
+    rows:    int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+# the columns whose change opens a new history interval
+STATE_FIELDS = ("status", "mac_address", "hostname", "vendor")
+
+
+def _chunks(rows: list, size: int):
+    size = max(1, size)
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+async def upsert_live_rows(db: AsyncSession, rows: list[dict], chunk_size: int) -> int:
+    """
+    Upsert live_monitor rows. Each row carries: ip, hostname, mac_address,
+    vendor, status, last_checked, last_up.
+    """
+    for chunk in _chunks(rows, chunk_size):
+        ins = mysql_insert(LiveMonitor.__table__).values(chunk)
+        await db.execute(ins.on_duplicate_key_update({
+            "hostname":     ins.inserted.hostname,
+            "mac_address":  ins.inserted.mac_address,
+            "vendor":       ins.inserted.vendor,
+            "status":       ins.inserted.status,
+            "last_checked": ins.inserted.last_checked,
+            # keep the last time the host was Up while it is Down
+            "last_up":      func.coalesce(ins.inserted.last_up, LiveMonitor.__table__.c.last_up),
+        }))
+    return len(rows)
+
+
+def _history_row(r: dict) -> dict:
+    return {
+        "ip":          r["ip"],
+        "hostname":    r["hostname"],
+        "mac_address": r["mac_address"],
+        "vendor":      r["vendor"],
+        "status":      r["status"],
+        "scan_time":   r["last_checked"],
+        "last_seen":   r["last_checked"],
+    }
+
+
+async def insert_history_rows(db: AsyncSession, rows: list[dict], chunk_size: int) -> int:
+    """Append one history row per scanned IP, chunked into multi-row INSERTs."""
+    history = [_history_row(r) for r in rows]
+    for chunk in _chunks(history, chunk_size):
+        await db.execute(mysql_insert(History.__table__).values(chunk))
+    return len(history)
+
+
+async def load_open_intervals(db: AsyncSession, ips: list[str], chunk_size: int) -> dict[str, tuple]:
+    """
+    Return {ip: (history.id, status, mac_address, hostname, vendor)} for the
+    most recent history row of each IP.
+    """
+    latest: dict[str, tuple] = {}
+    for chunk in _chunks(ips, chunk_size):
+        last_ids = (
+            select(func.max(History.id).label("id"))
+            .where(History.ip.in_(chunk))
+            .group_by(History.ip)
+            .subquery()
+        )
+        q = await db.execute(
+            select(History.id, History.ip, *(getattr(History, f) for f in STATE_FIELDS))
+            .join(last_ids, History.id == last_ids.c.id)
+        )
+        for hid, ip, *state in q.all():
+            latest[ip] = (hid, *state)
+    return latest
+
+
+async def record_history_transitions(db: AsyncSession, rows: list[dict], chunk_size: int) -> int:
+    """
+    Open a new interval for every IP whose state changed since its last
+    history row, and extend the last interval in place for the rest.
+    """
+    latest = await load_open_intervals(db, [r["ip"] for r in rows], chunk_size)
+
+    opened: list[dict] = []
+    extend: dict[str, list[int]] = {}
+    for r in rows:
+        prev = latest.get(r["ip"])
+        if prev and tuple(prev[1:]) == tuple(r[f] for f in STATE_FIELDS):
+            extend.setdefault(r["last_checked"], []).append(prev[0])
+        else:
+            opened.append(_history_row(r))
+
+    for chunk in _chunks(opened, chunk_size):
+        await db.execute(mysql_insert(History.__table__).values(chunk))
+    for seen, ids in extend.items():
+        for chunk in _chunks(ids, chunk_size):
+            await db.execute(
+                update(History)
+                .where(History.id.in_(chunk))
+                .values(last_seen=seen)
+                .execution_options(synchronize_session=False)
+            )
+    return len(opened) + sum(len(ids) for ids in extend.values())
+
+
+async def persist_scan_rows(
+    db: AsyncSession,
+    rows: list[dict],
+    chunk_size: int | None = None,
+) -> PersistStats:
+    """
+    Write one sweep's rows to live_monitor and history and report
+    throughput. Nothing is committed here; the caller owns the transaction.
+    """
+    chunk_size = chunk_size or settings.scan_db_chunk_size
+    started = time.perf_counter()
+    written  = await upsert_live_rows(db, rows, chunk_size)
+    if settings.history_mode == "snapshot":
+        written += await insert_history_rows(db, rows, chunk_size)
+    else:
+        written += await record_history_transitions(db, rows, chunk_size)
+    stats = PersistStats(written, time.perf_counter() - started)
+    logger.info(
+        "persisted %d rows in %.3fs (%.0f rows/s, chunk=%d)",
+        stats.rows, stats.seconds, stats.rows_per_sec, chunk_size,
+    )
+    return stats
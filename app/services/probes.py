@@ -0,0 +1,359 @@
+# app/services/probes.py
+"""
+Probe stage of a sweep: find out which hosts answer, and their MACs.
+
+Liveness checks are pluggable `ProbeBackend`s:
+
+    icmp    pipelined ICMP echo (ping binary when no ICMP socket)
+    tcp     TCP connect to a few common ports (a refusal counts as Up)
+    arp     passive: whatever is in the kernel neighbour table
+    nmap    nmap -sn -PR (ARP ping; only useful on the local segment)
+
+plus `SimulatedBackend` (app.services.simnet) for benchmarks. A sweep
+uses one primary backend, an optional fallback for the hosts that stayed
+silent, and a MAC source; see `probe_hosts`.
+
+Every backend that sends packets awaits its `pacer` (if any) before each
+one, which is how global and per-range rate caps are enforced (see
+app.services.ratelimit). nmap paces itself between whole batches and is
+also given the cap as --max-rate.
+
+This module deliberately takes every tunable as an argument and imports
+nothing that needs app settings or the database, so the same code runs
+inside the API's scanner and in a headless scan agent (app.agent) on
+another L2 segment.
+"""
+
+import abc
+import asyncio
+import contextlib
+import inspect
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Collection, Iterable
+
+import nmap
+
+from app.services.icmp import icmp_sweep, IcmpUnavailable
+from app.services.neighbours import read_neighbour_table, ARP_TABLE_PATH
+
+
+def ping_host(ip: str, timeout: int = 1) -> bool:
+    return subprocess.run(
+        ["ping", "-c", "1", "-W", str(timeout), ip],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    ).returncode == 0
+
+
+Pace = Callable[[int], Awaitable[None]]
+
+
+@contextlib.contextmanager
+def timed(timings: dict[str, float] | None, phase: str):
+    """Add the time spent in the block to timings[phase] (no-op without `timings`)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+
+async def _ping_sweep(hosts: list[str], pace: Pace | None = None) -> dict[str, float | None]:
+    """
+    Fallback probe used when no ICMP socket can be opened: one `ping`
+    process per host. RTT is not measured on this path, so Up hosts
+    report 0.0.
+    """
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=80) as ex:
+        futures = []
+        for ip in hosts:
+            if pace is not None:
+                await pace(1)
+            futures.append(loop.run_in_executor(ex, ping_host, ip))
+        ups = await asyncio.gather(*futures, return_exceptions=True)
+    return {ip: 0.0 if up is True else None for ip, up in zip(hosts, ups)}
+
+
+def nmap_probe(ips: list[str], max_rate: float = 0.0) -> dict[str, dict]:
+    nm = nmap.PortScanner()
+    nm.scan(
+        hosts=" ".join(ips),
+        arguments=(
+            "-sn -PR -n -T4 "
+            "--max-retries 1 --host-timeout 200ms "
+            "-r --privileged"
+            + (f" --max-rate {max_rate:g}" if max_rate > 0 else "")
+        )
+    )
+    results: dict[str, dict] = {}
+    for host in nm.all_hosts():
+        info = nm[host]
+        mac = info.get("addresses", {}).get("mac")
+        results[host] = {
+            "status":     "Up",
+            "hostname":   info.hostname() or None,
+            "mac_address": mac,
+            "raw_vendor": info.get("vendor", {}) or {}
+        }
+    return results
+
+
+OnDone = Callable[[str, float | None], None]
+
+
+class ProbeBackend(abc.ABC):
+    """
+    One way of telling whether hosts are up. `probe` returns a record per
+    host: {"status": "Up"/"Down", "rtt_ms": float | None}, plus
+    "mac_address" / "hostname" / "raw_vendor" when the method learns them.
+    `on_done(ip, rtt)` is called as each host's result is known.
+    """
+
+    name = "base"
+    # awaited with the number of packets about to be sent; set by make_backend
+    pacer: Pace | None = None
+
+    async def pace(self, n: int = 1) -> None:
+        if self.pacer is not None:
+            await self.pacer(n)
+
+    @abc.abstractmethod
+    async def probe(self, hosts: list[str], on_done: OnDone | None = None) -> dict[str, dict]:
+        ...
+
+    def mac_table(self, include_v6: bool = False) -> dict[str, str]:
+        """IP -> MAC for hosts this backend can see at layer 2 (none by default)."""
+        return {}
+
+
+def _records(rtts: dict[str, float | None]) -> dict[str, dict]:
+    return {
+        ip: {"status": "Up" if rtt is not None else "Down", "rtt_ms": rtt}
+        for ip, rtt in rtts.items()
+    }
+
+
+class IcmpBackend(ProbeBackend):
+    name = "icmp"
+
+    def __init__(
+        self,
+        timeout: float = 1.0,
+        batch_size: int = 256,
+        retries: int = 0,
+        shared_window: asyncio.Semaphore | None = None,
+    ):
+        self.timeout       = timeout
+        self.batch_size    = batch_size
+        self.retries       = retries
+        self.shared_window = shared_window
+
+    async def probe(self, hosts: list[str], on_done: OnDone | None = None) -> dict[str, dict]:
+        try:
+            rtts = await icmp_sweep(
+                hosts,
+                timeout=self.timeout,
+                batch_size=self.batch_size,
+                retries=self.retries,
+                shared_window=self.shared_window,
+                on_done=on_done,
+                pace=self.pace,
+            )
+        except IcmpUnavailable:
+            rtts = await _ping_sweep(hosts, self.pacer)
+            if on_done is not None:
+                for ip, rtt in rtts.items():
+                    on_done(ip, rtt)
+        return _records(rtts)
+
+
+class TcpConnectBackend(ProbeBackend):
+    """
+    Up if any of `ports` accepts or actively refuses a connection (the
+    RST proves the host is there); works without ICMP or root.
+    """
+
+    name = "tcp"
+
+    def __init__(
+        self,
+        ports: Iterable[int] = (22, 80, 443, 445, 3389),
+        timeout: float = 1.0,
+        concurrency: int = 256,
+        shared_window: asyncio.Semaphore | None = None,
+    ):
+        self.ports         = tuple(ports)
+        self.timeout       = timeout
+        self.concurrency   = concurrency
+        self.shared_window = shared_window
+
+    async def _connect(self, ip: str, port: int) -> float | None:
+        await self.pace()
+        start = time.monotonic()
+        try:
+            _reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port), timeout=self.timeout
+            )
+        except ConnectionRefusedError:
+            return (time.monotonic() - start) * 1000.0
+        except (asyncio.TimeoutError, OSError):
+            return None
+        writer.close()
+        return (time.monotonic() - start) * 1000.0
+
+    async def _probe_one(self, ip: str, slots: asyncio.Semaphore) -> float | None:
+        async with slots:
+            if self.shared_window is not None:
+                await self.shared_window.acquire()
+            try:
+                for port in self.ports:
+                    rtt = await self._connect(ip, port)
+                    if rtt is not None:
+                        return rtt
+                return None
+            finally:
+                if self.shared_window is not None:
+                    self.shared_window.release()
+
+    async def probe(self, hosts: list[str], on_done: OnDone | None = None) -> dict[str, dict]:
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def one(ip: str) -> float | None:
+            rtt = await self._probe_one(ip, slots)
+            if on_done is not None:
+                on_done(ip, rtt)
+            return rtt
+
+        rtts = await asyncio.gather(*(one(ip) for ip in hosts))
+        return _records(dict(zip(hosts, rtts)))
+
+
+class ArpTableBackend(ProbeBackend):
+    """
+    Passive: hosts with a complete kernel neighbour entry are Up. Sends
+    nothing itself (so there is nothing to pace), and only sees hosts
+    something else talked to recently; mostly useful as the MAC source
+    and as a cheap first pass.
+    """
+
+    name = "arp"
+
+    def __init__(self, arp_path: str = ARP_TABLE_PATH, v6_path: str | None = None):
+        self.arp_path = arp_path
+        self.v6_path  = v6_path
+
+    def mac_table(self, include_v6: bool = False) -> dict[str, str]:
+        return read_neighbour_table(self.arp_path, self.v6_path, include_v6=include_v6)
+
+    async def probe(self, hosts: list[str], on_done: OnDone | None = None) -> dict[str, dict]:
+        table = self.mac_table(include_v6=any(":" in ip for ip in hosts))
+        results: dict[str, dict] = {}
+        for ip in hosts:
+            mac = table.get(ip)
+            results[ip] = {"status": "Up" if mac else "Down", "rtt_ms": None}
+            if mac:
+                results[ip]["mac_address"] = mac
+            if on_done is not None:
+                on_done(ip, 0.0 if mac else None)
+        return results
+
+
+class NmapBackend(ProbeBackend):
+    """nmap ARP ping; the scanner's default fallback for silent hosts."""
+
+    name = "nmap"
+
+    async def probe(self, hosts: list[str], on_done: OnDone | None = None) -> dict[str, dict]:
+        # unpaced: one nmap run; paced: about a second's worth of hosts per run
+        max_rate = getattr(self.pacer, "rate", 0.0)
+        step = max(int(max_rate), 1) if max_rate > 0 else max(len(hosts), 1)
+        found: dict[str, dict] = {}
+        for i in range(0, len(hosts), step):
+            batch = hosts[i:i + step]
+            await self.pace(len(batch))
+            found.update(await asyncio.to_thread(nmap_probe, batch, max_rate))
+        results: dict[str, dict] = {}
+        for ip in hosts:
+            rec = results[ip] = {"status": "Down", "rtt_ms": None}
+            if ip in found:
+                rec.update(found[ip])
+            if on_done is not None:
+                on_done(ip, 0.0 if ip in found else None)
+        return results
+
+
+BACKENDS: dict[str, type[ProbeBackend]] = {
+    cls.name: cls for cls in (IcmpBackend, TcpConnectBackend, ArpTableBackend, NmapBackend)
+}
+
+
+def make_backend(name: str, pacer: Pace | None = None, **options) -> ProbeBackend:
+    """Instantiate a backend by name, passing only the options it accepts."""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown probe backend {name!r} (choose from {', '.join(BACKENDS)})")
+    params = inspect.signature(cls).parameters
+    backend = cls(**{k: v for k, v in options.items() if k in params})
+    backend.pacer = pacer
+    return backend
+
+
+async def probe_hosts(
+    hosts: Iterable[str],
+    backend: ProbeBackend,
+    *,
+    fallback: ProbeBackend | None = None,
+    macs: ProbeBackend | None = None,
+    include_v6: bool = False,
+    recheck: Collection[str] = (),
+    thorough: Collection[str] | None = None,
+    on_probe: OnDone | None = None,
+    on_fallback: Callable[[], None] | None = None,
+    timings: dict[str, float] | None = None,
+) -> dict[str, dict]:
+    """
+    Probe `hosts` and return {ip: {"status", "rtt_ms", ...}}, plus
+    "mac_address" / "hostname" / "raw_vendor" where known:
+
+      1. `backend` sweep (`on_probe(ip, rtt)` per host);
+      2. hosts in `recheck` (previously Up) that stayed silent get a
+         second sweep straight away, before they are called Down;
+      3. one `macs.mac_table()` snapshot for MAC addresses;
+      4. `fallback` for silent hosts in `thorough` (all of them when
+         None), announced through `on_fallback()`.
+
+    Seconds spent in each step are added to `timings` under "probe",
+    "recheck", "mac" and "fallback".
+    """
+    hosts = list(hosts)
+    with timed(timings, "probe"):
+        results = await backend.probe(hosts, on_probe)
+
+    if flips := [ip for ip in hosts if results[ip]["status"] == "Down" and ip in recheck]:
+        with timed(timings, "recheck"):
+            again = await backend.probe(flips)
+        results.update({ip: rec for ip, rec in again.items() if rec["status"] == "Up"})
+
+    if macs is not None:
+        with timed(timings, "mac"):
+            table = macs.mac_table(include_v6)
+        for ip, mac in table.items():
+            if ip in results and "mac_address" not in results[ip]:
+                results[ip]["mac_address"] = mac
+
+    down_ips = [
+        ip for ip, rec in results.items()
+        if rec["status"] == "Down" and (thorough is None or ip in thorough)
+    ]
+    if down_ips and fallback is not None:
+        if on_fallback is not None:
+            on_fallback()
+        with timed(timings, "fallback"):
+            found = await fallback.probe(down_ips)
+        results.update({ip: rec for ip, rec in found.items() if rec["status"] == "Up"})
+    return results
@@ -0,0 +1,189 @@
+# app/services/ratelimit.py
+"""
+Probe rate control.
+
+Every packet a sweep sends (ICMP echo, TCP SYN, ping, a batch handed to
+nmap, a PTR query) first takes a token from a `TokenBucket`. A bucket
+refills at `rate` tokens per second up to `burst`, so traffic is capped at
+`rate` packets per second on average and never bursts beyond `burst`.
+Tokens may be taken on credit: a large request (an nmap batch) drives the
+bucket negative and the debt is paid off, in time, by whoever asks next.
+Waiters are served in arrival order.
+
+A `Pacer` takes from several buckets at once (the global cap and the
+range's own cap) and counts what it lets through in `RateMeter`s, which
+report the achieved rate. `ProbeRates` holds the process-wide buckets;
+the scanner configures the `probe_rates` singleton from settings.
+
+Every scan job on a host runs in the one shared scan worker
+(app.services.worker), so its buckets cap all concurrent jobs together,
+whichever API worker submitted them; the worker relays its packet counts
+to the API processes' meters (`totals` / `record`).
+
+Like app.services.probes this module needs no settings, so scan agents
+can pace themselves with the same classes. A rate of 0 means unlimited.
+"""
+
+import asyncio
+import collections
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float = 0.0, burst: float | None = None):
+        self._lock: asyncio.Lock | None = None
+        self._lock_loop = None
+        self.configure(rate, burst)
+
+    def configure(self, rate: float, burst: float | None = None) -> None:
+        self.rate   = max(float(rate or 0.0), 0.0)
+        # default burst: a tenth of a second's worth of tokens
+        self.burst  = float(burst) if burst else max(self.rate / 10.0, 1.0)
+        self.tokens = self.burst
+        self._stamp = time.monotonic()
+
+    def _mutex(self) -> asyncio.Lock:
+        # one lock per event loop (each worker process runs its own)
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def take(self, n: float = 1.0) -> None:
+        """Wait until `n` tokens are available (at once, or on credit) and take them."""
+        if self.rate <= 0:
+            return
+        async with self._mutex():
+            self._refill()
+            self.tokens -= n
+            if self.tokens < 0:
+                # holding the lock keeps later callers queued behind the debt
+                await asyncio.sleep(-self.tokens / self.rate)
+
+
+class RateMeter:
+    """Packets let through: running total plus the rate over the last `window` seconds."""
+
+    def __init__(self, window: float = 10.0):
+        self.window = window
+        self.total  = 0
+        self._bins: collections.deque[list] = collections.deque()   # [second, count]
+
+    def record(self, n: int = 1) -> None:
+        self.total += n
+        second = int(time.monotonic())
+        if self._bins and self._bins[-1][0] == second:
+            self._bins[-1][1] += n
+        else:
+            self._bins.append([second, n])
+        self._trim(second)
+
+    def _trim(self, second: int) -> None:
+        while self._bins and self._bins[0][0] <= second - self.window:
+            self._bins.popleft()
+
+    def rate(self) -> float:
+        self._trim(int(time.monotonic()))
+        return sum(count for _second, count in self._bins) / self.window
+
+
+class Pacer:
+    """Callable pacing hook: `await pacer(n)` before sending `n` packets."""
+
+    def __init__(self, *buckets: TokenBucket, meters: tuple[RateMeter, ...] = ()):
+        self.buckets = buckets
+        self.meters  = meters
+
+    @property
+    def rate(self) -> float:
+        """Effective cap in packets per second (0 when unlimited)."""
+        rates = [b.rate for b in self.buckets if b.rate > 0]
+        return min(rates) if rates else 0.0
+
+    async def __call__(self, n: int = 1) -> None:
+        for bucket in self.buckets:
+            await bucket.take(n)
+        for meter in self.meters:
+            meter.record(n)
+
+
+class ProbeRates:
+    """Process-wide global cap plus one bucket per range, with achieved-rate meters."""
+
+    def __init__(self):
+        self.global_bucket = TokenBucket()
+        self.range_rate    = 0.0
+        self.range_burst: float | None = None
+        self.meter         = RateMeter()
+        self.dns_meter     = RateMeter()
+        self._ranges: dict[str, tuple[TokenBucket, RateMeter]] = {}
+        self.dns = Pacer(self.global_bucket, meters=(self.meter, self.dns_meter))
+
+    def configure(
+        self,
+        global_pps: float,
+        global_burst: float | None = None,
+        range_pps: float = 0.0,
+        range_burst: float | None = None,
+    ) -> None:
+        self.global_bucket.configure(global_pps, global_burst)
+        self.range_rate  = range_pps
+        self.range_burst = range_burst
+        self._ranges.clear()
+
+    def for_range(self, cidr: str, pps: float | None = None) -> Pacer:
+        """Pacer for probes of `cidr`: the global cap and the range's (or the default) cap."""
+        rate = pps if pps is not None else self.range_rate
+        entry = self._ranges.get(cidr)
+        if entry is None:
+            entry = self._ranges[cidr] = (TokenBucket(rate, self.range_burst), RateMeter())
+        elif entry[0].rate != rate:
+            entry[0].configure(rate, self.range_burst)
+        bucket, meter = entry
+        # the range's own cap first, so a throttled range holds no global tokens
+        return Pacer(bucket, self.global_bucket, meters=(self.meter, meter))
+
+    def totals(self) -> dict[str, int]:
+        """Packets sent so far per range, with PTR queries under ""."""
+        return {"": self.dns_meter.total, **{c: m.total for c, (_b, m) in self._ranges.items()}}
+
+    def record(self, cidr: str, n: int) -> None:
+        """Count `n` packets sent elsewhere (the scan worker) for `cidr`, or "" for DNS."""
+        if cidr:
+            if cidr not in self._ranges:
+                self._ranges[cidr] = (TokenBucket(self.range_rate, self.range_burst), RateMeter())
+            self._ranges[cidr][1].record(n)
+        else:
+            self.dns_meter.record(n)
+        self.meter.record(n)
+
+    def stats(self) -> dict:
+        return {
+            "global": {
+                "limit_pps":    self.global_bucket.rate,
+                "achieved_pps": self.meter.rate(),
+                "packets":      self.meter.total,
+            },
+            "dns": {
+                "achieved_qps": self.dns_meter.rate(),
+                "queries":      self.dns_meter.total,
+            },
+            "ranges": {
+                cidr: {
+                    "limit_pps":    bucket.rate,
+                    "achieved_pps": meter.rate(),
+                    "packets":      meter.total,
+                }
+                for cidr, (bucket, meter) in self._ranges.items()
+            },
+        }
+
+
+# Module-level singleton; unlimited until configured (see app.services.scanner)
+probe_rates = ProbeRates()
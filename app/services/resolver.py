@@ -0,0 +1,162 @@
+# app/services/resolver.py
+"""
+Reverse-DNS resolver with a TTL cache.
+
+Lookups run concurrently from the event loop (bounded by a semaphore),
+each with its own timeout. Answers are cached for `dns_cache_ttl`
+seconds; NXDOMAIN answers and timeouts are cached as misses for
+`dns_negative_ttl` seconds, so repeat sweeps barely touch DNS. Concurrent
+lookups of the same address share a single query. Queries that do go out
+count against the global probe rate cap (app.services.ratelimit).
+
+Sweeps resolve in the shared scan worker (app.services.worker), whose
+cache lives as long as the worker does; it relays its counters to the
+API processes (`record`), so their stats report the scans' lookups.
+"""
+
+import asyncio
+import socket
+import time
+from typing import Awaitable, Callable, Iterable
+
+from app.config import settings
+from app.services.ratelimit import probe_rates
+
+
+class ReverseResolver:
+    def __init__(
+        self,
+        ttl: float,
+        negative_ttl: float,
+        timeout: float,
+        concurrency: int,
+        max_entries: int = 65536,
+        getnameinfo: Callable[[str], Awaitable[str]] | None = None,
+        pace: Callable[[int], Awaitable[None]] | None = None,
+    ):
+        self.ttl          = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout      = timeout
+        self.concurrency  = concurrency
+        self.max_entries  = max_entries
+        # ip -> name, raising socket.gaierror when there is none; defaults
+        # to the system resolver (swapped out by the simulated network)
+        self._getnameinfo = getnameinfo or self._system_getnameinfo
+        self._pace = pace
+        self._cache: dict[str, tuple[str | None, float]] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._sem: asyncio.Semaphore | None = None
+        self._sem_loop = None
+        self.counters = {
+            "hits":          0,
+            "negative_hits": 0,
+            "misses":        0,
+            "nxdomain":      0,
+            "timeouts":      0,
+            "errors":        0,
+        }
+        # size of the cache that `record`ed lookups were served from
+        self._recorded_entries = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # one semaphore per event loop (each worker process runs its own)
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.concurrency)
+            self._sem_loop = loop
+        return self._sem
+
+    def _store(self, ip: str, name: str | None) -> None:
+        ttl = self.ttl if name else self.negative_ttl
+        self._cache.pop(ip, None)
+        self._cache[ip] = (name, time.monotonic() + ttl)
+        while len(self._cache) > self.max_entries:
+            # dicts keep insertion order: drop the oldest entry
+            self._cache.pop(next(iter(self._cache)))
+
+    def cached(self, ip: str) -> tuple[bool, str | None]:
+        """Return (found, name) from the cache without querying DNS."""
+        entry = self._cache.get(ip)
+        if entry is None:
+            return False, None
+        name, expires = entry
+        if expires < time.monotonic():
+            del self._cache[ip]
+            return False, None
+        return True, name
+
+    @staticmethod
+    async def _system_getnameinfo(ip: str) -> str:
+        loop = asyncio.get_running_loop()
+        host, _port = await loop.getnameinfo((ip, 0), socket.NI_NAMEREQD)
+        return host
+
+    async def _query(self, ip: str) -> str | None:
+        async with self._semaphore():
+            if self._pace is not None:
+                await self._pace(1)
+            try:
+                host = await asyncio.wait_for(self._getnameinfo(ip), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.counters["timeouts"] += 1
+                return None
+            except socket.gaierror:
+                self.counters["nxdomain"] += 1
+                return None
+            except OSError:
+                self.counters["errors"] += 1
+                return None
+        return host
+
+    async def lookup(self, ip: str) -> str | None:
+        found, name = self.cached(ip)
+        if found:
+            self.counters["hits" if name else "negative_hits"] += 1
+            return name
+
+        if ip in self._inflight:
+            return await asyncio.shield(self._inflight[ip])
+
+        self.counters["misses"] += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[ip] = fut
+        try:
+            name = await self._query(ip)
+        except BaseException:
+            fut.cancel()
+            raise
+        finally:
+            del self._inflight[ip]
+        self._store(ip, name)
+        fut.set_result(name)
+        return name
+
+    async def resolve_many(self, ips: Iterable[str]) -> dict[str, str | None]:
+        ips = list(ips)
+        names = await asyncio.gather(*(self.lookup(ip) for ip in ips))
+        return dict(zip(ips, names))
+
+    def record(self, counters: dict[str, int], entries: int) -> None:
+        """Count lookups done elsewhere (the scan worker), whose cache holds `entries` names."""
+        for key, n in counters.items():
+            self.counters[key] += n
+        self._recorded_entries = entries
+
+    def stats(self) -> dict:
+        lookups = sum(self.counters[k] for k in ("hits", "negative_hits", "misses"))
+        hits    = self.counters["hits"] + self.counters["negative_hits"]
+        return {
+            **self.counters,
+            "entries":  len(self._cache) + self._recorded_entries,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+# Module-level singleton shared by all scans in this process (the scan worker's)
+resolver = ReverseResolver(
+    ttl=settings.dns_cache_ttl,
+    negative_ttl=settings.dns_negative_ttl,
+    timeout=settings.dns_timeout,
+    concurrency=settings.dns_concurrency,
+    pace=probe_rates.dns,
+)
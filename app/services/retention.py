@@ -0,0 +1,196 @@
+# app/services/retention.py
+"""
+Background retention for history, scan_runs and availability rollups.
+
+Old rows used to go in one `DELETE ... WHERE scan_time < cutoff` at the
+end of every scan, which on a big history table held locks long enough
+to stall the scanner's own inserts and /api/history reads. Instead,
+`HistoryPruner` runs every RETENTION_INTERVAL seconds on its own, walks
+the table in primary-key windows of RETENTION_BATCH_SIZE ids and deletes
+the expired rows of each window in a short transaction of its own,
+pausing RETENTION_PAUSE seconds in between. Nothing it does shares a
+transaction with scan writes.
+
+The walk stops at the oldest row that is still inside the retention
+period by `scan_time` (found through the scan_time index): ids grow
+with insertion time, and an interval that started after the cutoff
+cannot have ended before it.
+
+Availability rollups (app.services.rollups) have their own, longer
+retention; having no id to walk, they are deleted in LIMITed batches
+by bucket.
+
+When several API workers run a pruner, a MySQL named lock lets one of
+them do each pass; the others skip it.
+"""
+
+import asyncio
+import datetime
+import logging
+import time
+from typing import NamedTuple
+
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models import History, ScanRun, IPAvailability, RangeAvailability
+
+logger = logging.getLogger(__name__)
+
+_LOCK_NAME = "ipmap_retention"
+
+
+class PruneStats(NamedTuple):
+    rows:    int
+    batches: int
+    seconds: float
+
+
+class HistoryPruner:
+    def __init__(
+        self,
+        session_factory: sessionmaker = AsyncSessionLocal,
+        lock_engine: AsyncEngine = engine,
+    ):
+        self.session_factory = session_factory
+        self.lock_engine     = lock_engine
+        self._task: asyncio.Task | None = None
+        # per table: last pass and running total of rows removed
+        self.last: dict[str, PruneStats] = {}
+        self.total_rows: dict[str, int] = {}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("retention pass failed")
+            await asyncio.sleep(settings.retention_interval)
+
+    async def run_once(self) -> dict[str, PruneStats] | None:
+        """One pass over every table; None if another worker holds the lock."""
+        now = datetime.datetime.utcnow()
+        async with self.lock_engine.connect() as conn:
+            got = await conn.scalar(text("SELECT GET_LOCK(:name, 0)"), {"name": _LOCK_NAME})
+            if not got:
+                return None
+            try:
+                history_cutoff = now - datetime.timedelta(days=settings.history_retention_days)
+                runs_cutoff    = now - datetime.timedelta(days=settings.scan_runs_retention_days)
+                results = {
+                    "history": await self.prune(
+                        History,
+                        History.last_seen < history_cutoff,
+                        History.scan_time, history_cutoff,
+                    ),
+                    "scan_runs": await self.prune(
+                        ScanRun,
+                        ScanRun.started_at < runs_cutoff,
+                        ScanRun.started_at, runs_cutoff,
+                    ),
+                }
+                for model in (IPAvailability, RangeAvailability):
+                    results[model.__tablename__] = await self.prune_rollups(model, now)
+            finally:
+                await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": _LOCK_NAME})
+        for table, stats in results.items():
+            self.last[table] = stats
+            self.total_rows[table] = self.total_rows.get(table, 0) + stats.rows
+            if stats.rows:
+                logger.info(
+                    "retention: pruned %d %s row(s) in %d batch(es), %.1fs",
+                    stats.rows, table, stats.batches, stats.seconds,
+                )
+        return results
+
+    async def prune(self, model, expired, kept_from, cutoff) -> PruneStats:
+        """
+        Delete rows of `model` matching `expired`, one id window per
+        transaction, up to the oldest row whose `kept_from` time is at or
+        after `cutoff`.
+        """
+        start = time.perf_counter()
+        async with self.session_factory() as db:
+            lo  = await db.scalar(select(func.min(model.id)))
+            end = await db.scalar(
+                select(model.id).where(kept_from >= cutoff).order_by(kept_from, model.id).limit(1)
+            )
+            if end is None:
+                end = await db.scalar(select(func.max(model.id)))
+                end = end + 1 if end is not None else None
+            await db.rollback()
+
+        rows = batches = 0
+        step = max(1, settings.retention_batch_size)
+        while lo is not None and lo < end:
+            hi = min(lo + step, end)
+            async with self.session_factory() as db:
+                res = await db.execute(
+                    delete(model)
+                    .where(model.id >= lo, model.id < hi, expired)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            rows += res.rowcount or 0
+            batches += 1
+            lo = hi
+            if lo < end:
+                await asyncio.sleep(settings.retention_pause)
+        return PruneStats(rows, batches, time.perf_counter() - start)
+
+    async def prune_rollups(self, model, now: datetime.datetime) -> PruneStats:
+        """Delete expired hourly and daily buckets of a rollup table, a LIMITed batch at a time."""
+        start = time.perf_counter()
+        rows = batches = 0
+        step = max(1, settings.retention_batch_size)
+        for period, days in (
+            ("hour", settings.rollup_hourly_retention_days),
+            ("day", settings.rollup_daily_retention_days),
+        ):
+            cutoff = now - datetime.timedelta(days=days)
+            while True:
+                async with self.session_factory() as db:
+                    res = await db.execute(
+                        delete(model)
+                        .where(model.period == period, model.bucket < cutoff)
+                        .with_dialect_options(mysql_limit=step)
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+                rows += res.rowcount or 0
+                batches += 1
+                if (res.rowcount or 0) < step:
+                    break
+                await asyncio.sleep(settings.retention_pause)
+        return PruneStats(rows, batches, time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {
+            table: {
+                "last_rows":    stats.rows,
+                "last_batches": stats.batches,
+                "last_seconds": stats.seconds,
+                "total_rows":   self.total_rows.get(table, 0),
+            }
+            for table, stats in self.last.items()
+        }
+
+
+# Module-level singleton, started with the app
+pruner = HistoryPruner()
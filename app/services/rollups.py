@@ -0,0 +1,162 @@
+# app/services/rollups.py
+"""
+Hourly and daily availability rollups.
+
+Answering "how often was this host up" or "how full was this range" from
+raw history means reading every interval row. Instead, `update_rollups`
+runs with every batch of scan results as it is stored (local sweeps per
+chunk, agent results per POST; same transaction as the live_monitor
+write) and folds it into two small tables, one row per hour and per day:
+
+  ip_availability      per address: samples, Up samples, first/last Up,
+                       distinct MACs seen
+  range_availability   per range: samples, Up samples, distinct Up
+                       addresses, first/last Up
+
+Everything is an additive upsert, so buckets fill in incrementally and
+scans of different ranges never contend for the same rows. Rollups are
+kept for ROLLUP_HOURLY_RETENTION_DAYS / ROLLUP_DAILY_RETENTION_DAYS by
+the background pruner (app.services.retention), independently of how
+long raw history is kept.
+"""
+
+import datetime
+
+from sqlalchemy import select, func, case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import IPAvailability, RangeAvailability
+
+PERIODS = ("hour", "day")
+
+_MAX_MACS_LEN = 255
+
+
+def bucket_start(when: datetime.datetime, period: str) -> datetime.datetime:
+    """Start of the hour / day containing `when`."""
+    start = when.replace(minute=0, second=0, microsecond=0)
+    return start.replace(hour=0) if period == "day" else start
+
+
+def _chunks(items: list, size: int):
+    size = max(1, size)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _merge_macs(old, new):
+    """SQL: `old` MAC list with `new` appended unless present (or the column is full)."""
+    return case(
+        (new.is_(None), old),
+        (old.is_(None), new),
+        (func.find_in_set(new, old) > 0, old),
+        (func.char_length(old) + func.char_length(new) < _MAX_MACS_LEN, func.concat(old, ",", new)),
+        else_=old,
+    )
+
+
+async def update_rollups(
+    db: AsyncSession,
+    cidr: str,
+    rows: list[dict],
+    when: datetime.datetime,
+) -> None:
+    """
+    Fold scan rows (build_rows() output, all from one scan of addresses in
+    range `cidr`, taken at `when`) into the hourly and daily rollups. Not
+    committed.
+    """
+    if not rows:
+        return
+    up_ips = [r["ip"] for r in rows if r["status"] == "Up"]
+    ip_t, range_t = IPAvailability.__table__, RangeAvailability.__table__
+
+    for period in PERIODS:
+        bucket = bucket_start(when, period)
+
+        # addresses of this batch already counted as Up in the bucket
+        seen_up: set[str] = set()
+        for chunk in _chunks(up_ips, settings.scan_db_chunk_size):
+            q = await db.execute(
+                select(IPAvailability.ip).where(
+                    IPAvailability.period == period,
+                    IPAvailability.bucket == bucket,
+                    IPAvailability.ip.in_(chunk),
+                    IPAvailability.up_samples > 0,
+                )
+            )
+            seen_up.update(q.scalars())
+
+        values = []
+        for r in rows:
+            up  = r["status"] == "Up"
+            mac = r["mac_address"] if r["mac_address"] not in (None, "", "N/A") else None
+            values.append({
+                "ip":         r["ip"],
+                "period":     period,
+                "bucket":     bucket,
+                "samples":    1,
+                "up_samples": int(up),
+                "first_up":   when if up else None,
+                "last_up":    when if up else None,
+                "macs":       mac,
+            })
+        for chunk in _chunks(values, settings.scan_db_chunk_size):
+            ins = mysql_insert(ip_t).values(chunk)
+            await db.execute(ins.on_duplicate_key_update({
+                "samples":    ip_t.c.samples + ins.inserted.samples,
+                "up_samples": ip_t.c.up_samples + ins.inserted.up_samples,
+                "first_up":   func.coalesce(ip_t.c.first_up, ins.inserted.first_up),
+                "last_up":    func.coalesce(ins.inserted.last_up, ip_t.c.last_up),
+                "macs":       _merge_macs(ip_t.c.macs, ins.inserted.macs),
+            }))
+
+        ins = mysql_insert(range_t).values(
+            cidr=cidr,
+            period=period,
+            bucket=bucket,
+            samples=len(rows),
+            up_samples=len(up_ips),
+            up_hosts=len(set(up_ips) - seen_up),
+            first_up=when if up_ips else None,
+            last_up=when if up_ips else None,
+        )
+        await db.execute(ins.on_duplicate_key_update({
+            "samples":    range_t.c.samples + ins.inserted.samples,
+            "up_samples": range_t.c.up_samples + ins.inserted.up_samples,
+            "up_hosts":   range_t.c.up_hosts + ins.inserted.up_hosts,
+            "first_up":   func.coalesce(range_t.c.first_up, ins.inserted.first_up),
+            "last_up":    func.coalesce(ins.inserted.last_up, range_t.c.last_up),
+        }))
+
+
+async def ip_series(
+    db: AsyncSession, ip: str, period: str, since: datetime.datetime,
+) -> list[IPAvailability]:
+    q = await db.execute(
+        select(IPAvailability)
+        .where(
+            IPAvailability.ip == ip,
+            IPAvailability.period == period,
+            IPAvailability.bucket >= bucket_start(since, period),
+        )
+        .order_by(IPAvailability.bucket)
+    )
+    return q.scalars().all()
+
+
+async def range_series(
+    db: AsyncSession, cidr: str, period: str, since: datetime.datetime,
+) -> list[RangeAvailability]:
+    q = await db.execute(
+        select(RangeAvailability)
+        .where(
+            RangeAvailability.cidr == cidr,
+            RangeAvailability.period == period,
+            RangeAvailability.bucket >= bucket_start(since, period),
+        )
+        .order_by(RangeAvailability.bucket)
+    )
+    return q.scalars().all()
@@ -3,153 +3,276 @@
 import asyncio
 import datetime
 import ipaddress
-import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import nmap
-import socket
+import logging
 import re
 import sys
 
-from manuf import MacParser
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, select
-from sqlalchemy.dialects.mysql import insert as mysql_insert
-
-
-from app.models import (
-    LiveMonitor,
-    History,
-    IP,            
-    OwnerType,     
-    User,          
-    Device,        
-    Server         
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select
+
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.neighbours import read_neighbour_table
+from app.services.probes import probe_hosts, make_backend, timed, ArpTableBackend, ProbeBackend
+from app.services.persistence import persist_scan_rows, PersistStats
+from app.services.owners import owners_by_address
+from app.services.resolver import resolver
+from app.services.oui import lookup_vendor
+from app.services.adaptive import load_host_states, plan_probes, HostState
+from app.services.events import broker
+from app.services.hosts import host_count, iter_host_chunks
+from app.services.checkpoints import (
+    start_sweep, save_checkpoint, clear_checkpoint, heartbeat, release_checkpoint, sweep_owner, SweepInProgress,
+)
+from app.services.ratelimit import probe_rates, Pacer
+from app.services.metrics import RunMetrics
+from app.services.rollups import update_rollups
+from app.models import IPRange
+
+logger = logging.getLogger(__name__)
+
+probe_rates.configure(
+    settings.probe_max_pps,
+    settings.probe_burst or None,
+    settings.probe_range_pps,
+    settings.probe_range_burst or None,
 )
-HISTORY_RETENTION_DAYS = 14
-
-# Build one parser instance (built‐in OUI data auto‐loaded)
-_mac_parser = MacParser()
 
 # Precompile MAC regex
 _MAC_RE = re.compile(r"^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
 
 
-def ping_host(ip: str, timeout: int = 1) -> bool:
-    return subprocess.run(
-        ["ping", "-c", "1", "-W", str(timeout), ip],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    ).returncode == 0
+# pipeline order of the per-range phases reported through ScanProgress:
+# "probing" while chunks are still being probed, "persisting" while the
+# last ones are named and written
+SCAN_PHASES = ("queued", "probing", "persisting", "done", "failed")
 
 
-def get_arp_mac(ip: str) -> str | None:
-    try:
-        out = subprocess.check_output(["arp", "-n", ip], stderr=subprocess.DEVNULL).decode()
-    except Exception:
-        return None
-    m = re.search(r"(([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2})", out)
-    return m.group(1).upper() if m else None
-
-
-def nmap_probe(ips: list[str]) -> dict[str, dict]:
-    nm = nmap.PortScanner()
-    nm.scan(
-        hosts=" ".join(ips),
-        arguments=(
-            "-sn -PR -n -T4 "
-            "--max-retries 1 --host-timeout 200ms "
-            "-r --privileged"
-        )
-    )
-    results: dict[str, dict] = {}
-    for host in nm.all_hosts():
-        info = nm[host]
-        mac = info.get("addresses", {}).get("mac")
-        results[host] = {
-            "status":     "Up",
-            "hostname":   info.hostname() or None,
-            "mac_address": mac,
-            "raw_vendor": info.get("vendor", {}) or {}
-        }
-    return results
-
-
-async def scan_cidr(cidr: str, db: AsyncSession) -> None:
-    now_dt  = datetime.datetime.utcnow()
-    now_str = now_dt.strftime("%Y-%m-%d %H:%M:%S")
+class ScanProgress:
+    """
+    Progress of one scan_nets run, updated in place by the scanner and
+    read by whoever started the run (see app.services.jobs).
+    """
 
-    net   = ipaddress.ip_network(cidr, strict=False)
-    hosts = [str(h) for h in net.hosts()]
-    results: dict[str, dict] = {}
+    def __init__(self, nets: list[str]):
+        self.ranges: dict[str, str] = {cidr: "queued" for cidr in nets}
+        self.hosts_total  = sum(host_count(cidr) for cidr in nets)
+        self.hosts_probed = 0
 
-        # 1) Parallel ping + ARP
-    with ThreadPoolExecutor(max_workers=80) as ex:
-        futures = {ex.submit(ping_host, ip): ip for ip in hosts}
-        for f in as_completed(futures):
-            ip = futures[f]
-            up = False
-            try:
-                up = f.result()
-            except:
-                pass
-            rec = results.setdefault(ip, {})
-            rec["status"]       = "Up" if up else "Down"
-            rec["last_checked"] = now_str if up else rec.get("last_checked", now_str)
-            mac = get_arp_mac(ip)
-            if mac:
-                rec["mac_address"] = mac
-
-        # 2) Nmap fallback
-    down_ips = [ip for ip, d in results.items() if d["status"] == "Down"]
-    if down_ips:
-        nm_data = nmap_probe(down_ips)
-        for ip, info in nm_data.items():
-            rec = results.setdefault(ip, {})
-            rec.update(info)
-            rec.setdefault("status", "Up")
-            rec.setdefault("last_checked", now_str)
+    def set_phase(self, cidr: str, phase: str) -> None:
+        self.ranges[cidr] = phase
 
-    # 2.5) Override hostname from DB assignment if present
-    for ip, rec in results.items():
-        if rec.get("status") != "Up":
-            continue
-
-        row    = await db.execute(select(IP).where(IP.ip_address == ip))
-        ip_rec = row.scalars().first()
-        if not ip_rec:
-            continue
-
-        if ip_rec.owner_type == OwnerType.user:
-            user = await db.get(User, ip_rec.owner_id)
-            rec["hostname"] = user.username if user else None
-        elif ip_rec.owner_type == OwnerType.device:
-            dev = await db.get(Device, ip_rec.owner_id)
-            rec["hostname"] = dev.hostname if dev else None
-        elif ip_rec.owner_type == OwnerType.server:
-            srv = await db.get(Server, ip_rec.owner_id)
-            rec["hostname"] = srv.server_name if srv else None
-
-    # 3) Parallel reverse‐DNS for any still‐missing Up hosts
-    to_lookup = [
-        ip for ip, rec in results.items()
-        if rec["status"] == "Up" and not rec.get("hostname")
-    ]
-    if to_lookup:
-        with ThreadPoolExecutor(max_workers=20) as ex:
-            futures = {ex.submit(socket.gethostbyaddr, ip): ip for ip in to_lookup}
-            for fut in as_completed(futures, timeout=5):
-                ip = futures[fut]
+    def probed(self, n: int = 1) -> None:
+        self.hosts_probed += n
+
+    @property
+    def phase(self) -> str:
+        """The least advanced phase across all ranges."""
+        if not self.ranges:
+            return "done"
+        return min(self.ranges.values(), key=SCAN_PHASES.index)
+
+
+def set_phase(progress: ScanProgress | None, cidr: str, phase: str) -> None:
+    """Record a range's phase on `progress` and announce it to live subscribers."""
+    if progress is not None:
+        progress.set_phase(cidr, phase)
+    broker.publish({"type": "phase", "cidr": cidr, "phase": phase})
+
+
+class ScanBudget:
+    """
+    Limits shared by every range of one scan_nets run. asyncio semaphores
+    hand out permits in FIFO order, so ranges scanned side by side take
+    turns instead of the first one starving the rest. Reverse-DNS is
+    capped process-wide by the resolver's own semaphore (DNS_CONCURRENCY).
+    """
+
+    def __init__(
+        self,
+        ranges: int | None = None,
+        probes: int | None = None,
+        db_writers: int | None = None,
+    ):
+        self.ranges     = asyncio.Semaphore(ranges or settings.scan_max_ranges)
+        self.probes     = asyncio.Semaphore(probes or settings.scan_probe_budget)
+        self.db_writers = asyncio.Semaphore(db_writers or settings.scan_db_writers)
+
+
+def probe_backends(
+    budget: ScanBudget | None = None,
+    pacer: Pacer | None = None,
+) -> tuple[ProbeBackend, ProbeBackend | None, ProbeBackend]:
+    """(primary, fallback, MAC source) backends as configured in settings, paced by `pacer`."""
+    options = dict(
+        timeout=settings.icmp_timeout,
+        batch_size=settings.icmp_batch_size,
+        concurrency=settings.icmp_batch_size,
+        retries=settings.icmp_retries,
+        shared_window=budget.probes if budget else None,
+        ports=[int(p) for p in settings.probe_tcp_ports.split(",") if p.strip()],
+        arp_path=settings.neighbour_table_path,
+        v6_path=settings.neighbour_v6_path,
+    )
+    primary  = make_backend(settings.probe_backend, pacer, **options)
+    fallback = None
+    if settings.probe_fallback != "none":
+        fallback = make_backend(settings.probe_fallback, pacer, **options)
+    macs = ArpTableBackend(settings.neighbour_table_path, settings.neighbour_v6_path)
+    return primary, fallback, macs
+
+
+async def scan_cidr(
+    cidr: str,
+    db: AsyncSession,
+    budget: ScanBudget | None = None,
+    progress: ScanProgress | None = None,
+    metrics: RunMetrics | None = None,
+) -> PersistStats:
+    """
+    Sweep `cidr` as a pipeline of host chunks (SCAN_CHUNK_SIZE addresses
+    each): while one chunk is named and persisted, the next is probed, with
+    at most SCAN_PIPELINE_DEPTH probed chunks waiting in between. Each
+    chunk is committed once stored, so neither memory nor the open
+    transaction grows with the size of the range.
+
+    Progress is checkpointed with every chunk; if an earlier sweep of
+    `cidr` was interrupted, the chunks it already stored are skipped, and
+    if another sweep of it is still live, SweepInProgress is raised
+    (see app.services.checkpoints). Phase timings and counts go to
+    `metrics` when given.
+    """
+    now_dt = datetime.datetime.utcnow()
+    net    = ipaddress.ip_network(cidr, strict=False)
+    chunk_size = settings.scan_chunk_size
+    # probe rate: the range's own cap (or PROBE_RANGE_PPS) under the global one
+    max_pps = await db.scalar(select(IPRange.max_pps).where(IPRange.cidr == cidr))
+    primary, fallback, macs = probe_backends(budget, probe_rates.for_range(cidr, max_pps))
+    owner = sweep_owner()
+    resume_at = await start_sweep(db, cidr, chunk_size, owner)
+    # the producer and the consumer share one session; never at the same time
+    db_lock = asyncio.Lock()
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=settings.scan_pipeline_depth)
+
+    async def probe_chunk(sub: str, hosts: list[str]) -> tuple[dict, dict]:
+        # 0) Last known state of the chunk, for adaptive planning and live deltas
+        async with db_lock:
+            states = await load_host_states(db, sub)
+            # don't hold a connection for the length of the sweep
+            await db.rollback()
+
+        def on_probe(ip: str, rtt: float | None) -> None:
+            if progress is not None:
+                progress.probed()
+            # newly Up hosts are announced as soon as they answer
+            if rtt is not None and (ip not in states or states[ip].status != "Up"):
+                broker.publish(host_event(cidr, ip, now_dt, status="Up", rtt_ms=rtt))
+
+        # Adaptive mode: leave dormant addresses alone until they're due
+        thorough = None
+        if settings.adaptive_probing:
+            plan = plan_probes(
+                hosts, states,
+                read_neighbour_table(
+                    settings.neighbour_table_path,
+                    settings.neighbour_v6_path,
+                    include_v6=net.version == 6,
+                ),
+                now_dt,
+            )
+            logger.info(
+                "%s: probing %d of %d hosts (%d dormant skipped)",
+                sub, len(plan.probe), len(hosts), plan.skipped,
+            )
+            hosts, thorough = plan.probe, plan.thorough
+            if progress is not None:
+                progress.probed(plan.skipped)
+
+        # 1) Probe sweep, re-check of hosts that went silent, neighbour
+        #    snapshot and fallback probe
+        results = await probe_hosts(
+            hosts,
+            primary,
+            fallback=fallback,
+            macs=macs,
+            include_v6=net.version == 6,
+            recheck={ip for ip, st in states.items() if st.status == "Up"},
+            thorough=thorough,
+            on_probe=on_probe,
+            timings=metrics.seconds if metrics is not None else None,
+        )
+        if metrics is not None:
+            metrics.hosts_probed += len(hosts)
+            metrics.hosts_up += sum(1 for rec in results.values() if rec["status"] == "Up")
+        return results, states
+
+    async def produce() -> None:
+        try:
+            for index, (sub, hosts) in enumerate(iter_host_chunks(cidr, chunk_size)):
+                if index < resume_at:
+                    if progress is not None:
+                        progress.probed(len(hosts))
+                    continue
+                results, states = await probe_chunk(sub, hosts)
+                await chunks.put((index, sub, results, states))
+        except Exception as exc:
+            await chunks.put(exc)
+            return
+        await chunks.put(None)
+
+    async def keep_alive() -> None:
+        # chunks refresh the heartbeat too, but a slow (rate-capped) one may take a while
+        while True:
+            await asyncio.sleep(settings.scan_checkpoint_stale_after / 3)
+            async with db_lock:
+                if not await heartbeat(db, cidr, owner):
+                    logger.warning("%s: checkpoint was taken over by another sweep", cidr)
+                await db.commit()
+
+    set_phase(progress, cidr, "probing")
+    producer = asyncio.create_task(produce())
+    pulse    = asyncio.create_task(keep_alive())
+    rows, seconds = 0, 0.0
+    try:
+        try:
+            # 2) Names, vendors, persistence and live deltas, chunk by chunk
+            while (item := await chunks.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                index, sub, results, states = item
+                async with db_lock:
+                    stats = await store_results(db, sub, results, now_dt, states, budget, metrics, cidr)
+                    await save_checkpoint(db, cidr, chunk_size, index + 1, now_dt, owner)
+                    await db.commit()
+                rows, seconds = rows + stats.rows, seconds + stats.seconds
+                if producer.done():
+                    set_phase(progress, cidr, "persisting")
+        finally:
+            for task in (producer, pulse):
+                task.cancel()
                 try:
-                    results[ip]["hostname"] = fut.result(timeout=0.1)[0]
-                except:
+                    await task
+                except asyncio.CancelledError:
                     pass
+    except BaseException:
+        # resumable right away rather than once the heartbeat goes stale
+        try:
+            await db.rollback()
+            await release_checkpoint(db, cidr, owner)
+            await db.commit()
+        except Exception:
+            logger.exception("%s: could not release the checkpoint", cidr)
+        raise
+    await clear_checkpoint(db, cidr)
+    await db.commit()
+    return PersistStats(rows, seconds)
 
-    # 3.5) Ensure every Up host has a hostname key
-    for rec in results.values():
-        if rec.get("status") == "Up" and not rec.get("hostname"):
-            rec["hostname"] = "Unknown"
 
-    # 4) Upsert into live_monitor and insert into history
+def build_rows(results: dict[str, dict], now_str: str) -> list[dict]:
+    """live_monitor/history rows (with vendors) from named probe results."""
+    rows: list[dict] = []
     for ip, rec in results.items():
         status_     = rec.get("status", "Down")
         mac_addr    = rec.get("mac_address")
@@ -160,73 +283,167 @@ async def scan_cidr(cidr: str, db: AsyncSession) -> None:
             vendor = next(iter(raw_vendors.values()), "Unknown")
         elif mac_addr and _MAC_RE.match(mac_addr):
             try:
-                vendor = _mac_parser.get_manuf(mac_addr) or "Unknown"
+                vendor = lookup_vendor(mac_addr) or "Unknown"
             except:
                 vendor = "Unknown"
         else:
             vendor = "Unknown"
 
-        # use .get() with default to avoid KeyError
-        hostname     = rec.get("hostname", "Unknown")
-        last_checked = now_str
-        last_up      = now_str if status_ == "Up" else None
-
-        # live_monitor upsert
-        ins = mysql_insert(LiveMonitor.__table__).values(
-            ip           = ip,
-            hostname     = hostname,
-            mac_address  = mac_addr or "N/A",
-            vendor       = vendor,
-            status       = status_,
-            last_checked = last_checked,
-            last_up      = last_up,
-        )
-        up = ins.on_duplicate_key_update({
-            "hostname":     ins.inserted.hostname,
-            "mac_address":  ins.inserted.mac_address,
-            "vendor":       ins.inserted.vendor,
-            "status":       ins.inserted.status,
-            "last_checked": ins.inserted.last_checked,
-            "last_up":      ins.inserted.last_up,
+        rows.append({
+            "ip":           ip,
+            # use .get() with default to avoid KeyError
+            "hostname":     rec.get("hostname", "Unknown"),
+            "mac_address":  mac_addr or "N/A",
+            "vendor":       vendor,
+            "status":       status_,
+            "last_checked": now_str,
+            "last_up":      now_str if status_ == "Up" else None,
         })
-        await db.execute(up)
-
-        # history insert
-        hist = mysql_insert(History.__table__).values(
-            ip          = ip,
-            hostname    = hostname,
-            mac_address = mac_addr or "N/A",
-            vendor      = vendor,
-            status      = status_,
-            scan_time   = last_checked,
-        )
-        await db.execute(hist)
+    return rows
+
 
+def host_event(cidr: str, ip: str, checked: datetime.datetime, **fields) -> dict:
+    checked_at = checked.replace(tzinfo=datetime.timezone.utc).isoformat()
+    return {"type": "host", "cidr": cidr, "ip": ip, "last_checked": checked_at, **fields}
 
-async def prune_history(db: AsyncSession) -> None:
+
+async def store_results(
+    db: AsyncSession,
+    cidr: str,
+    results: dict[str, dict],
+    now_dt: datetime.datetime,
+    states: dict[str, HostState] | None = None,
+    budget: ScanBudget | None = None,
+    metrics: RunMetrics | None = None,
+    range_cidr: str | None = None,
+) -> PersistStats:
     """
-    Remove history records older than HISTORY_RETENTION_DAYS.
-    Runs as its own transaction to avoid deadlocks.
+    Second half of a sweep, shared by the local scanner and results sent
+    in by scan agents: owner/DNS hostnames, vendors, the live_monitor /
+    history write and availability rollups (not committed) and live
+    events for changed hosts. `results` is probe_hosts() output for
+    hosts within `cidr`, a part of the configured range `range_cidr`
+    (default: `cidr` itself).
     """
-    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=HISTORY_RETENTION_DAYS)
-    await db.execute(
-        delete(History)
-        .where(History.scan_time < cutoff)
-    )
-    await db.commit()
+    timings = metrics.seconds if metrics is not None else None
+    now_str = now_dt.strftime("%Y-%m-%d %H:%M:%S")
+    if states is None:
+        states = await load_host_states(db, cidr)
 
+    # 2.5) Override hostname from DB assignment if present
+    with timed(timings, "owners"):
+        owners = await owners_by_address(db, cidr)
+    for ip, rec in results.items():
+        if rec.get("status") == "Up" and ip in owners:
+            rec["hostname"] = owners[ip].name
 
+    # 3) Cached, concurrent reverse‐DNS for any still‐missing Up hosts
+    to_lookup = [
+        ip for ip, rec in results.items()
+        if rec["status"] == "Up" and not rec.get("hostname")
+    ]
+    if to_lookup:
+        with timed(timings, "dns"):
+            names = await resolver.resolve_many(to_lookup)
+        if metrics is not None:
+            metrics.dns_lookups += len(to_lookup)
+            metrics.dns_unresolved += sum(1 for name in names.values() if not name)
+        for ip, name in names.items():
+            if name:
+                results[ip]["hostname"] = name
 
+    # 3.5) Ensure every Up host has a hostname key
+    for rec in results.values():
+        if rec.get("status") == "Up" and not rec.get("hostname"):
+            rec["hostname"] = "Unknown"
 
-    # 5) Prune old history
-    
+    # 4) Bulk upsert into live_monitor and insert into history
+    rows = build_rows(results, now_str)
 
-    await db.commit()
+    with timed(timings, "persist"):
+        if budget is None:
+            stats = await persist_scan_rows(db, rows)
+        else:
+            async with budget.db_writers:
+                stats = await persist_scan_rows(db, rows)
+        if settings.rollups_enabled:
+            await update_rollups(db, range_cidr or cidr, rows, now_dt)
+    if metrics is not None:
+        metrics.rows_written += stats.rows
+
+    # 5) Tell live subscribers which hosts changed state
+    for row in rows:
+        prev = states.get(row["ip"])
+        if prev is None or prev.status != row["status"]:
+            broker.publish(host_event(
+                cidr,
+                row["ip"],
+                now_dt,
+                status=row["status"],
+                hostname=row["hostname"],
+                mac_address=row["mac_address"],
+                vendor=row["vendor"],
+            ))
+    return stats
+
+
+async def _scan_range(
+    cidr: str,
+    budget: ScanBudget,
+    session_factory: sessionmaker,
+    progress: ScanProgress | None,
+) -> PersistStats:
+    async with budget.ranges:
+        metrics = RunMetrics(cidr, host_count(cidr))
+        async with session_factory() as db:
+            try:
+                stats = await scan_cidr(cidr, db, budget, progress, metrics)
+                await db.commit()
+            except SweepInProgress as exc:
+                # nothing done and nothing to record: the live sweep covers it
+                logger.info("skipping %s: %s", cidr, exc)
+                if progress is not None:
+                    progress.probed(host_count(cidr))
+                set_phase(progress, cidr, "done")
+                return PersistStats(0, 0.0)
+            except BaseException as exc:
+                await db.rollback()
+                set_phase(progress, cidr, "failed")
+                status = "cancelled" if isinstance(exc, asyncio.CancelledError) else "failed"
+                await _record_run(session_factory, metrics.to_row(status, repr(exc)))
+                raise
+        await _record_run(session_factory, metrics.to_row("completed"))
+    set_phase(progress, cidr, "done")
+    return stats
+
+
+async def _record_run(session_factory: sessionmaker, run) -> None:
+    """Store a scan_runs row in its own transaction; never fails the sweep."""
+    try:
+        async with session_factory() as db:
+            db.add(run)
+            await db.commit()
+    except Exception:
+        logger.exception("could not record scan run of %s", run.cidr)
 
-async def scan_nets(nets: list[str], db: AsyncSession) -> None:
-    for cidr in nets:
-        await scan_cidr(cidr, db)
-        await asyncio.sleep(0.5)
 
-    # 6) Prune old history in its own transaction
-    await prune_history(db)
+async def scan_nets(
+    nets: list[str],
+    session_factory: sessionmaker = AsyncSessionLocal,
+    progress: ScanProgress | None = None,
+) -> dict[str, PersistStats | BaseException]:
+    """
+    Scan several ranges concurrently under one shared ScanBudget. Each
+    range gets its own session and commits on its own, so a failing range
+    doesn't roll back the others. Returns per-range stats (or the error).
+    """
+    budget = ScanBudget()
+    outcomes = await asyncio.gather(
+        *(_scan_range(cidr, budget, session_factory, progress) for cidr in nets),
+        return_exceptions=True,
+    )
+    for cidr, outcome in zip(nets, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error("scan of %s failed: %r", cidr, outcome)
+    # old history is pruned in the background (app.services.retention)
+    return dict(zip(nets, outcomes))
@@ -0,0 +1,194 @@
+# app/services/scheduler.py
+"""
+Per-range scan scheduler.
+
+Every active range with a `scan_interval` is swept automatically: each
+tick, ranges whose `next_run_at` has passed are claimed (highest
+`scan_priority` first) and handed to `scan_jobs` as one job. The claim
+is a conditional UPDATE on `next_run_at`, so when several API workers
+run a scheduler only one of them starts a given sweep.
+
+`next_run_at` is pushed forward by the interval +/- `scheduler_jitter`
+so ranges drift apart instead of firing together. A range that gets an
+interval for the first time is given a random first run within one
+interval, and because the schedule lives in the DB, a restart picks up
+where it left off rather than scanning everything at once. A range whose
+previous sweep hasn't finished skips that occurrence: it is unfinished
+per `last_run_at` / `last_finished_at` and still alive, that is a job in
+the scan worker covers it, its checkpoint has a live heartbeat, or agent
+shards of it are still open. A sweep whose process died leaves none of
+these behind, so the range is picked up again on its next occurrence.
+
+Ranges with an `agent_site` are queued as shards for remote agents
+(app.services.shards) instead of being scanned here; their
+`last_finished_at` is set when the last shard closes.
+
+On startup, `resume_interrupted` restarts local sweeps that a previous
+process left half done; they continue from their checkpoint
+(app.services.checkpoints).
+"""
+
+import asyncio
+import datetime
+import logging
+import random
+
+from sqlalchemy import select, update, or_
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import IPRange
+from app.services.jobs import scan_jobs, ScanJob
+from app.services.shards import enqueue_range, open_ranges
+from app.services.checkpoints import claim_interrupted, live_sweeps
+
+logger = logging.getLogger(__name__)
+
+
+def next_run(now: datetime.datetime, interval: int, jitter: float) -> datetime.datetime:
+    """`now` plus `interval` seconds, scaled by a random factor in [1-jitter, 1+jitter]."""
+    factor = 1.0 + random.uniform(-jitter, jitter) if jitter > 0 else 1.0
+    return now + datetime.timedelta(seconds=max(interval * factor, 1.0))
+
+
+def sweep_in_flight(r: IPRange, live: set[str]) -> bool:
+    """
+    Whether the range's last scheduled sweep is still running. `live`
+    holds the CIDRs with a live checkpoint heartbeat or open agent shards.
+    """
+    if r.last_run_at is None:
+        return False
+    if r.last_finished_at is not None and r.last_finished_at >= r.last_run_at:
+        return False
+    return r.cidr in live
+
+
+class ScanScheduler:
+    def __init__(self, session_factory: sessionmaker = AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._task: asyncio.Task | None = None
+        self._watchers: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_due()
+            except Exception:
+                logger.exception("scheduler tick failed")
+            await asyncio.sleep(settings.scheduler_tick)
+
+    async def _reschedule(self, db, r: IPRange, when: datetime.datetime, **values) -> bool:
+        """Move r.next_run_at to `when` if nobody else has moved it first."""
+        current = (
+            IPRange.next_run_at.is_(None) if r.next_run_at is None
+            else IPRange.next_run_at == r.next_run_at
+        )
+        res = await db.execute(
+            update(IPRange)
+            .where(IPRange.id == r.id, current)
+            .values(next_run_at=when, **values)
+        )
+        return res.rowcount == 1
+
+    async def run_due(self) -> ScanJob | None:
+        """Claim every due range and start one scan job for them."""
+        now = datetime.datetime.utcnow()
+        claimed: list[IPRange] = []
+        async with self.session_factory() as db:
+            q = await db.execute(
+                select(IPRange)
+                .where(
+                    IPRange.active == True,
+                    IPRange.scan_interval.isnot(None),
+                    or_(IPRange.next_run_at.is_(None), IPRange.next_run_at <= now),
+                )
+                .order_by(IPRange.scan_priority.desc(), IPRange.next_run_at)
+            )
+            due = q.scalars().all()
+            live = (
+                await live_sweeps(db, [r.cidr for r in due if not r.agent_site])
+                | await open_ranges(db, [r.cidr for r in due if r.agent_site])
+            )
+            for r in due:
+                interval = r.scan_interval
+                if r.next_run_at is None:
+                    # newly scheduled: spread first runs over one interval
+                    first = now + datetime.timedelta(seconds=random.uniform(0, interval))
+                    await self._reschedule(db, r, first)
+                    continue
+
+                when = next_run(now, interval, settings.scheduler_jitter)
+                if scan_jobs.scanning(r.cidr) or sweep_in_flight(r, live):
+                    if await self._reschedule(db, r, when):
+                        logger.info("skipping %s: previous sweep still running", r.cidr)
+                    continue
+                if not await self._reschedule(db, r, when, last_run_at=now):
+                    continue
+                if r.agent_site:
+                    await enqueue_range(db, r.cidr, r.agent_site)
+                else:
+                    claimed.append(r)
+            await db.commit()
+
+        if not claimed:
+            return None
+        job, _created = await scan_jobs.submit([r.cidr for r in claimed])
+        logger.info("scheduled scan %s: %s", job.id, ", ".join(job.nets))
+        self._watch(job, [r.id for r in claimed])
+        return job
+
+    async def resume_interrupted(self) -> ScanJob | None:
+        """Start one job for every active local range with an interrupted sweep."""
+        async with self.session_factory() as db:
+            cidrs = await claim_interrupted(db)
+            await db.commit()
+            if not cidrs:
+                return None
+            q = await db.execute(
+                select(IPRange.id, IPRange.cidr).where(
+                    IPRange.cidr.in_(cidrs),
+                    IPRange.active == True,
+                    IPRange.agent_site.is_(None),
+                )
+            )
+            ranges = q.all()
+        if not ranges:
+            return None
+        job, _created = await scan_jobs.submit([cidr for _id, cidr in ranges])
+        logger.info("resuming interrupted scan %s: %s", job.id, ", ".join(job.nets))
+        self._watch(job, [range_id for range_id, _cidr in ranges])
+        return job
+
+    def _watch(self, job: ScanJob, range_ids: list[int]) -> None:
+        """Set the ranges' `last_finished_at` once `job` ends."""
+        watcher = asyncio.create_task(self._record_finish(job, range_ids))
+        self._watchers.add(watcher)
+        watcher.add_done_callback(self._watchers.discard)
+
+    async def _record_finish(self, job: ScanJob, range_ids: list[int]) -> None:
+        await job.wait()
+        async with self.session_factory() as db:
+            await db.execute(
+                update(IPRange)
+                .where(IPRange.id.in_(range_ids))
+                .values(last_finished_at=datetime.datetime.utcnow())
+            )
+            await db.commit()
+
+
+# Module-level singleton, started with the app
+scheduler = ScanScheduler()
@@ -0,0 +1,143 @@
+# app/services/shards.py
+"""
+DB-backed work queue for remote scan agents.
+
+Ranges with an `agent_site` are not probed by the API host: a sweep of
+one is split into shards (slices of AGENT_SHARD_PREFIX) in `scan_shards`,
+and agents of that site lease them over the agent API (app.routers.agents),
+probe locally and send the results back in batches.
+
+A lease lasts AGENT_LEASE_SECONDS and is renewed by every results batch.
+Leasing uses SELECT ... FOR UPDATE SKIP LOCKED, so concurrent agents never
+get the same shard; a shard whose lease ran out goes back to the next
+agent that asks, until it has been leased AGENT_MAX_ATTEMPTS times.
+"""
+
+import datetime
+import ipaddress
+import logging
+
+from sqlalchemy import select, update, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import ScanShard, IPRange
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ("pending", "leased")
+
+
+def shard_cidr(cidr: str, prefixlen: int) -> list[str]:
+    """Split `cidr` into subnets of `prefixlen` (or return it whole if it is smaller)."""
+    net = ipaddress.ip_network(cidr, strict=False)
+    if net.prefixlen >= prefixlen:
+        return [str(net)]
+    return [str(sub) for sub in net.subnets(new_prefix=prefixlen)]
+
+
+async def enqueue_range(db: AsyncSession, cidr: str, site: str) -> int:
+    """
+    Queue a sweep of `cidr` for agents of `site`. Returns the number of
+    shards created, 0 if a sweep of the range is still queued or running.
+    Not committed.
+    """
+    open_count = await db.scalar(
+        select(func.count(ScanShard.id))
+        .where(ScanShard.range_cidr == cidr, ScanShard.status.in_(OPEN_STATUSES))
+    )
+    if open_count:
+        return 0
+    shards = [
+        ScanShard(range_cidr=cidr, cidr=sub, site=site, status="pending", attempts=0)
+        for sub in shard_cidr(cidr, settings.agent_shard_prefix)
+    ]
+    db.add_all(shards)
+    logger.info("queued %d shard(s) of %s for site %s", len(shards), cidr, site)
+    return len(shards)
+
+
+async def open_ranges(db: AsyncSession, cidrs: list[str]) -> set[str]:
+    """Those of `cidrs` with a sweep still queued or running on agents."""
+    if not cidrs:
+        return set()
+    q = await db.execute(
+        select(ScanShard.range_cidr).distinct()
+        .where(ScanShard.range_cidr.in_(cidrs), ScanShard.status.in_(OPEN_STATUSES))
+    )
+    return set(q.scalars().all())
+
+
+async def lease_shards(db: AsyncSession, agent: str, site: str, limit: int) -> list[ScanShard]:
+    """Lease up to `limit` pending (or lease-expired) shards of `site` to `agent`."""
+    now = datetime.datetime.utcnow()
+    q = await db.execute(
+        select(ScanShard)
+        .where(
+            ScanShard.site == site,
+            or_(
+                ScanShard.status == "pending",
+                and_(ScanShard.status == "leased", ScanShard.lease_expires_at < now),
+            ),
+        )
+        .order_by(ScanShard.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    leased: list[ScanShard] = []
+    for shard in q.scalars().all():
+        if shard.attempts >= settings.agent_max_attempts:
+            logger.warning("shard %s (%s) failed: lease expired %d times",
+                           shard.id, shard.cidr, shard.attempts)
+            await finish_shard(db, shard, "failed", error=shard.error or "lease expired")
+            continue
+        shard.status           = "leased"
+        shard.lease_owner      = agent
+        shard.lease_expires_at = now + datetime.timedelta(seconds=settings.agent_lease_seconds)
+        shard.attempts        += 1
+        leased.append(shard)
+    return leased
+
+
+def renew_lease(shard: ScanShard) -> None:
+    shard.lease_expires_at = (
+        datetime.datetime.utcnow() + datetime.timedelta(seconds=settings.agent_lease_seconds)
+    )
+
+
+async def finish_shard(
+    db: AsyncSession,
+    shard: ScanShard,
+    status: str,
+    error: str | None = None,
+) -> None:
+    """Close a shard as done/failed; when it was its range's last, mark the sweep finished."""
+    now = datetime.datetime.utcnow()
+    shard.status           = status
+    shard.error            = error
+    shard.finished_at      = now
+    shard.lease_owner      = None
+    shard.lease_expires_at = None
+    await db.flush()
+
+    remaining = await db.scalar(
+        select(func.count(ScanShard.id))
+        .where(ScanShard.range_cidr == shard.range_cidr, ScanShard.status.in_(OPEN_STATUSES))
+    )
+    if not remaining:
+        await db.execute(
+            update(IPRange)
+            .where(IPRange.cidr == shard.range_cidr)
+            .values(last_finished_at=now)
+        )
+
+
+async def release_shard(db: AsyncSession, shard: ScanShard, error: str) -> None:
+    """An agent gave up on a shard: requeue it, or fail it once out of attempts."""
+    if shard.attempts >= settings.agent_max_attempts:
+        await finish_shard(db, shard, "failed", error=error)
+        return
+    shard.status           = "pending"
+    shard.error            = error
+    shard.lease_owner      = None
+    shard.lease_expires_at = None
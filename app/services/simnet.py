@@ -0,0 +1,131 @@
+# app/services/simnet.py
+"""
+Deterministic simulated network for benchmarks and regression checks.
+
+Every address's behaviour (up or not, MAC, reply latency, PTR record,
+DNS delay) is derived from a hash of (seed, address), so two runs with
+the same parameters see exactly the same network. Packet loss is drawn
+per (address, attempt), so retries behave like they would on a real
+lossy link.
+
+`time_scale` shrinks every simulated delay (timeouts included) so that
+a /16 doesn't take minutes; hosts/sec figures are then relative, which
+is what regression comparisons need.
+"""
+
+import asyncio
+import hashlib
+import socket
+import struct
+from typing import Iterable
+
+from app.services.probes import ProbeBackend, OnDone
+
+
+class SimulatedNetwork:
+    def __init__(
+        self,
+        up_ratio: float = 0.3,
+        latency_ms: tuple[float, float] = (0.2, 20.0),
+        loss: float = 0.0,
+        ptr_ratio: float = 0.6,
+        dns_delay_ms: tuple[float, float] = (1.0, 50.0),
+        seed: int = 0,
+        time_scale: float = 1.0,
+    ):
+        self.up_ratio     = up_ratio
+        self.latency_ms   = latency_ms
+        self.loss         = loss
+        self.ptr_ratio    = ptr_ratio
+        self.dns_delay_ms = dns_delay_ms
+        self.seed         = seed
+        self.time_scale   = time_scale
+        self._attempts: dict[str, int] = {}
+
+    def _unit(self, ip: str, salt: str) -> float:
+        """Deterministic value in [0, 1) for (seed, ip, salt)."""
+        digest = hashlib.blake2b(f"{self.seed}|{ip}|{salt}".encode(), digest_size=8).digest()
+        return struct.unpack("<Q", digest)[0] / 2**64
+
+    def _between(self, ip: str, salt: str, bounds: tuple[float, float]) -> float:
+        lo, hi = bounds
+        return lo + (hi - lo) * self._unit(ip, salt)
+
+    async def sleep_ms(self, ms: float) -> None:
+        await asyncio.sleep(ms * self.time_scale / 1000.0)
+
+    def is_up(self, ip: str) -> bool:
+        return self._unit(ip, "up") < self.up_ratio
+
+    def latency(self, ip: str) -> float:
+        return self._between(ip, "rtt", self.latency_ms)
+
+    def mac(self, ip: str) -> str:
+        raw = hashlib.blake2b(f"{self.seed}|{ip}|mac".encode(), digest_size=5).digest()
+        return ":".join(f"{b:02X}" for b in b"\x02" + raw)
+
+    def hostname(self, ip: str) -> str | None:
+        if self._unit(ip, "ptr") >= self.ptr_ratio:
+            return None
+        return f"host-{ip.replace('.', '-').replace(':', '-')}.sim"
+
+    def answers(self, ip: str) -> bool:
+        """Whether this attempt at `ip` gets a reply (up and not lost)."""
+        attempt = self._attempts.get(ip, 0)
+        self._attempts[ip] = attempt + 1
+        return self.is_up(ip) and self._unit(ip, f"loss{attempt}") >= self.loss
+
+    def neighbours(self) -> dict[str, str]:
+        """Like a neighbour table: MACs of up hosts that have been probed."""
+        return {ip: self.mac(ip) for ip in self._attempts if self.is_up(ip)}
+
+    def expected_up(self, hosts: Iterable[str]) -> set[str]:
+        return {ip for ip in hosts if self.is_up(ip)}
+
+    async def getnameinfo(self, ip: str) -> str:
+        """Stand-in for a reverse lookup; raises socket.gaierror without a PTR."""
+        await self.sleep_ms(self._between(ip, "dns", self.dns_delay_ms))
+        name = self.hostname(ip)
+        if name is None:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return name
+
+    def backend(self, timeout: float = 1.0, batch_size: int = 256) -> "SimulatedBackend":
+        return SimulatedBackend(self, timeout, batch_size)
+
+
+class SimulatedBackend(ProbeBackend):
+    """Echo-style probe against a SimulatedNetwork, `batch_size` hosts in flight."""
+
+    name = "sim"
+
+    def __init__(self, net: SimulatedNetwork, timeout: float = 1.0, batch_size: int = 256):
+        self.net        = net
+        self.timeout    = timeout
+        self.batch_size = batch_size
+
+    def mac_table(self, include_v6: bool = False) -> dict[str, str]:
+        return self.net.neighbours()
+
+    async def probe(self, hosts: list[str], on_done: OnDone | None = None) -> dict[str, dict]:
+        slots = asyncio.Semaphore(self.batch_size)
+        timeout_ms = self.timeout * 1000.0
+
+        async def one(ip: str) -> float | None:
+            async with slots:
+                await self.pace()
+                if self.net.answers(ip) and self.net.latency(ip) < timeout_ms:
+                    rtt = self.net.latency(ip)
+                    await self.net.sleep_ms(rtt)
+                else:
+                    rtt = None
+                    await self.net.sleep_ms(timeout_ms)
+            if on_done is not None:
+                on_done(ip, rtt)
+            return rtt
+
+        rtts = await asyncio.gather(*(one(ip) for ip in hosts))
+        return {
+            ip: {"status": "Up" if rtt is not None else "Down", "rtt_ms": rtt}
+            for ip, rtt in zip(hosts, rtts)
+        }
@@ -0,0 +1,368 @@
+# app/services/worker.py
+"""
+Out-of-process scan execution.
+
+Scan jobs run in one long-lived scan worker process per host, shared by
+every API worker: ICMP bookkeeping, vendor lookups and row building never
+compete with request handling, and since every job runs in the same
+process, the probe rate caps (app.services.ratelimit) bound all scans on
+the host together and the reverse-DNS cache outlives each sweep.
+
+The worker listens on a unix socket (SCAN_WORKER_SOCKET). Every API
+process connects to it from startup (`scan_worker.start()` in the app's
+lifespan), starting it if none is running (`python -m
+app.services.worker`, detached), and reconnects with backoff, restarting
+it, if the connection drops. The worker owns the job registry (a
+`ScanJobManager`, app.services.jobs): API processes submit and cancel
+jobs over the connection (`request` / `notify`), and the worker sends
+every API process a snapshot of the registry when it connects and the
+state of each running job every tick, which `SharedScanJobs` mirrors.
+Results go straight to the DB from the worker. Live-update events
+(app.services.events), probe packet counts, which feed the rate meters,
+and reverse-DNS cache counters go to every API process too. A lock file
+next to the socket keeps a second worker from starting, and the worker
+exits once no API process has been connected, and no job running, for
+SCAN_WORKER_IDLE_EXIT seconds.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from multiprocessing.connection import Client, Listener
+from typing import Callable
+
+from app.config import settings
+from app.services.events import broker
+from app.services.ratelimit import probe_rates
+from app.services.resolver import resolver
+
+logger = logging.getLogger(__name__)
+
+# seconds between job-state / packet-count messages from the worker
+_PROGRESS_INTERVAL = 0.25
+
+# seconds an API process waits for a freshly started worker to listen
+_START_TIMEOUT = 15.0
+
+# backoff between reconnection attempts, in seconds
+_RECONNECT_MIN = 0.5
+_RECONNECT_MAX = 30.0
+
+
+def _authkey() -> bytes:
+    return hashlib.sha256(b"scan-worker:" + settings.secret_key.encode()).digest()
+
+
+# -- worker side ------------------------------------------------------------
+
+class _Session:
+    """One API process connected to the worker."""
+
+    def __init__(self, server: "_ScanServer", conn):
+        self.server = server
+        self.conn   = conn
+        self.closed = False
+
+    def read(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Reader thread: hand each message to the event loop."""
+        while True:
+            try:
+                msg = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            loop.call_soon_threadsafe(self.server.handle, self, msg)
+        loop.call_soon_threadsafe(self.close)
+
+    def send(self, msg: tuple) -> None:
+        if self.closed:
+            return
+        try:
+            self.conn.send(msg)
+        except (OSError, ValueError):
+            self.close()
+
+    def close(self) -> None:
+        # its jobs carry on: they belong to the worker, not to the process
+        if self.closed:
+            return
+        self.closed = True
+        self.conn.close()
+        self.server.sessions.discard(self)
+
+
+class _ScanServer:
+    def __init__(self, listener: Listener):
+        # imported here: app.services.jobs imports this module
+        from app.services.jobs import ScanJobManager
+
+        self.listener = listener
+        self.sessions: set[_Session] = set()
+        self.jobs = ScanJobManager()
+        self.idle_since = time.monotonic()
+        self._packets  = probe_rates.totals()
+        self._dns      = dict(resolver.counters)
+        # ids of the jobs reported as unfinished by the last tick
+        self._reported: set[str] = set()
+
+    @property
+    def busy(self) -> bool:
+        """An API process is connected or a job is running."""
+        return bool(self.sessions) or bool(self.jobs.running())
+
+    def accept(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Accept thread: one _Session per connecting API process."""
+        while True:
+            try:
+                conn = self.listener.accept()
+            except multiprocessing.AuthenticationError:
+                logger.warning("scan worker: rejected a connection with the wrong key")
+                continue
+            except OSError:
+                return   # listener closed
+            loop.call_soon_threadsafe(self._open, loop, conn)
+
+    def _open(self, loop: asyncio.AbstractEventLoop, conn) -> None:
+        session = _Session(self, conn)
+        self.sessions.add(session)
+        threading.Thread(target=session.read, args=(loop,), daemon=True).start()
+        # the registry and the DNS counters so far; later ticks send what changes
+        session.send(("jobs", None, [job.as_dict() for job in self.jobs.jobs.values()], True))
+        session.send(("dns", None, self._dns, resolver.stats()["entries"]))
+
+    def broadcast(self, msg: tuple) -> None:
+        for session in list(self.sessions):
+            session.send(msg)
+
+    def handle(self, session: _Session, msg: tuple) -> None:
+        kind, request_id, *args = msg
+        if kind == "submit":
+            asyncio.create_task(self._submit(session, request_id, args[0]))
+        elif kind == "cancel":
+            self.jobs.cancel(args[0])
+
+    async def _submit(self, session: _Session, request_id: str, nets: list[str]) -> None:
+        job, created = await self.jobs.submit(nets)
+        state = job.as_dict()
+        # everyone learns of the job before its id is handed out
+        self.broadcast(("jobs", None, [state], False))
+        session.send(("reply", request_id, (state, created)))
+
+    def tick(self) -> None:
+        running = {job.id for job in self.jobs.running()}
+        changed = [self.jobs.jobs[i] for i in running | self._reported if i in self.jobs.jobs]
+        self._reported = running
+        if changed:
+            self.broadcast(("jobs", None, [job.as_dict() for job in changed], False))
+        totals = probe_rates.totals()
+        sent = {c: n - self._packets.get(c, 0) for c, n in totals.items() if n != self._packets.get(c, 0)}
+        self._packets = totals
+        if sent:
+            self.broadcast(("packets", None, sent))
+        counters = dict(resolver.counters)
+        if counters != self._dns:
+            looked_up = {k: n - self._dns.get(k, 0) for k, n in counters.items()}
+            self._dns = counters
+            self.broadcast(("dns", None, looked_up, resolver.stats()["entries"]))
+
+    async def serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        broker.forward_to(lambda event: self.broadcast(("event", None, event)))
+        threading.Thread(target=self.accept, args=(loop,), daemon=True).start()
+        while time.monotonic() - self.idle_since < settings.scan_worker_idle_exit:
+            await asyncio.sleep(_PROGRESS_INTERVAL)
+            self.tick()
+            if self.busy:
+                self.idle_since = time.monotonic()
+        logger.info("scan worker: idle for %ss, exiting", settings.scan_worker_idle_exit)
+
+
+def main() -> None:
+    """Entry point of the scan worker process (`python -m app.services.worker`)."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    path = settings.scan_worker_socket
+    lock = open(path + ".lock", "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return   # another scan worker already serves this host
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)   # left behind by a worker that died
+    listener = Listener(path, "AF_UNIX", authkey=_authkey())
+    logger.info("scan worker %s listening on %s", os.getpid(), path)
+    try:
+        asyncio.run(_ScanServer(listener).serve())
+    finally:
+        # unlinks the socket; the lock goes with the process
+        listener.close()
+
+
+# -- API side ---------------------------------------------------------------
+
+class _WorkerLost(Exception):
+    pass
+
+
+def _start_worker() -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.services.worker"],
+        stdin=subprocess.DEVNULL,
+        start_new_session=True,   # survives the API worker that started it
+    )
+    # reap it if it exits while we are still around
+    threading.Thread(target=proc.wait, daemon=True).start()
+    return proc
+
+
+def _connect():
+    """Connect to the scan worker, starting one if none is listening."""
+    path = settings.scan_worker_socket
+    deadline = time.monotonic() + _START_TIMEOUT
+    proc = None
+    while True:
+        try:
+            return Client(path, "AF_UNIX", authkey=_authkey())
+        except (FileNotFoundError, ConnectionRefusedError, ConnectionResetError):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"no scan worker listening on {path}")
+            # a worker that lost the lock race (or is exiting) is replaced
+            if proc is None or proc.poll() is not None:
+                proc = _start_worker()
+            time.sleep(0.1)
+
+
+class ScanWorkerClient:
+    """This API process's connection to the scan worker."""
+
+    def __init__(self):
+        self._conn = None
+        self._connecting = asyncio.Lock()
+        self._disconnected = asyncio.Event()
+        self._keeper: asyncio.Task | None = None
+        self._requests: dict[str, asyncio.Future] = {}
+        # called with (job states, whether they are the whole registry)
+        self.on_jobs: Callable[[list[dict], bool], None] | None = None
+
+    def start(self) -> None:
+        """Stay connected from now on, so live events arrive without a job of our own."""
+        if self._keeper is None or self._keeper.done():
+            self._keeper = asyncio.create_task(self._keep_connected())
+
+    async def stop(self) -> None:
+        if self._keeper is not None:
+            self._keeper.cancel()
+            try:
+                await self._keeper
+            except asyncio.CancelledError:
+                pass
+            self._keeper = None
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    async def _keep_connected(self) -> None:
+        delay = _RECONNECT_MIN
+        while True:
+            try:
+                await self._connection()
+            except Exception as exc:
+                logger.warning("scan worker unavailable (%s); retrying in %.1fs", exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _RECONNECT_MAX)
+                continue
+            delay = _RECONNECT_MIN
+            await self._disconnected.wait()
+
+    async def _connection(self):
+        async with self._connecting:
+            if self._conn is None:
+                loop = asyncio.get_running_loop()
+                conn = await loop.run_in_executor(None, _connect)
+                self._conn = conn
+                self._disconnected.clear()
+                threading.Thread(target=self._read, args=(conn, loop), daemon=True).start()
+            return self._conn
+
+    def _read(self, conn, loop: asyncio.AbstractEventLoop) -> None:
+        """Reader thread: hand each message to the event loop."""
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            loop.call_soon_threadsafe(self._dispatch, msg)
+        loop.call_soon_threadsafe(self._lost, conn)
+
+    def _lost(self, conn) -> None:
+        if self._conn is not conn:
+            return
+        self._conn = None
+        self._disconnected.set()
+        conn.close()
+        for future in self._requests.values():
+            if not future.done():
+                future.set_exception(_WorkerLost())
+
+    def _dispatch(self, msg: tuple) -> None:
+        kind, request_id, *args = msg
+        if kind == "reply":
+            future = self._requests.get(request_id)
+            if future is not None and not future.done():
+                future.set_result(args[0])
+        elif kind == "jobs":
+            if self.on_jobs is not None:
+                self.on_jobs(*args)
+        elif kind == "event":
+            broker.publish(args[0])
+        elif kind == "packets":
+            for cidr, n in args[0].items():
+                probe_rates.record(cidr, n)
+        elif kind == "dns":
+            resolver.record(*args)
+
+    def _send(self, msg: tuple) -> None:
+        conn = self._conn
+        if conn is None:
+            raise _WorkerLost()
+        try:
+            conn.send(msg)
+        except (OSError, ValueError):
+            self._lost(conn)
+            raise _WorkerLost()
+
+    def notify(self, kind: str, *args) -> None:
+        """Send a message that gets no reply; dropped if the worker is away."""
+        with contextlib.suppress(_WorkerLost):
+            self._send((kind, None, *args))
+
+    async def request(self, kind: str, *args):
+        """Send a message to the worker and wait for its reply."""
+        # a second attempt covers a worker that exited just as the message was sent
+        for attempt in (1, 2):
+            request_id = uuid.uuid4().hex
+            future = self._requests[request_id] = asyncio.get_running_loop().create_future()
+            try:
+                await self._connection()
+                self._send((kind, request_id, *args))
+                return await future
+            except _WorkerLost:
+                if attempt == 2:
+                    raise RuntimeError("scan worker exited") from None
+            finally:
+                del self._requests[request_id]
+
+
+# Module-level singleton, like `settings`
+scan_worker = ScanWorkerClient()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# app/utils/netaddr.py
+"""
+Binary address keys for indexed CIDR filtering.
+
+`ips`, `live_monitor` and `history` carry an `ip_bin` VARBINARY(16)
+column next to their address string: the 16-byte big-endian address,
+with IPv4 stored IPv4-mapped (::ffff:a.b.c.d) so both families share one
+byte order. A network is then the contiguous key range [first, last],
+and `in_cidr` filters with an indexed BETWEEN whose cost follows the
+number of rows in the network, for any prefix length (a /20 or a /16 as
+well as a /24), instead of a LIKE over address strings.
+
+Rows get their key from the column default (`ip_bin_default`), so
+ORM objects and Core multi-row inserts that only set the address string
+are covered too.
+"""
+
+import ipaddress
+
+from sqlalchemy import or_, false
+
+_V4_MAPPED = b"\x00" * 10 + b"\xff\xff"
+
+
+def ip_to_bin(ip: str) -> bytes | None:
+    """16-byte key of an address string, None if it isn't one."""
+    try:
+        addr = ipaddress.ip_address(ip.strip().split("%", 1)[0])
+    except (ValueError, AttributeError):
+        return None
+    return _V4_MAPPED + addr.packed if addr.version == 4 else addr.packed
+
+
+def bin_to_ip(key: bytes) -> str:
+    addr = ipaddress.IPv6Address(key)
+    return str(addr.ipv4_mapped or addr)
+
+
+def cidr_bounds(cidr: str) -> tuple[bytes, bytes]:
+    """(first, last) keys of a network, inclusive."""
+    net = ipaddress.ip_network(cidr, strict=False)
+    prefix = _V4_MAPPED if net.version == 4 else b""
+    return prefix + net.network_address.packed, prefix + net.broadcast_address.packed
+
+
+def in_cidr(column, cidr: str):
+    """SQL predicate: binary-key `column` lies within `cidr`."""
+    first, last = cidr_bounds(cidr)
+    return column.between(first, last)
+
+
+def in_any_cidr(column, cidrs: list[str]):
+    """SQL predicate: `column` lies within any of `cidrs` (false for none)."""
+    if not cidrs:
+        return false()
+    return or_(*(in_cidr(column, c) for c in cidrs))
+
+
+def ip_bin_default(address_column: str):
+    """Column default/onupdate computing the key from `address_column`'s value."""
+    def default(context):
+        return ip_to_bin(context.get_current_parameters().get(address_column) or "")
+    return default
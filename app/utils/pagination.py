@@ -0,0 +1,218 @@
+# app/utils/pagination.py
+"""
+Keyset pagination, prefix search and sorting for the list endpoints.
+
+A listing called with no paging parameters still returns its whole
+result as a JSON array. With `limit`, `cursor` or DataTables' `draw`, it
+returns one page instead:
+
+  ?limit=100[&sort=-scan_time][&q=10.1.]     {items, next_cursor, total, total_exact}
+  ?limit=100&cursor=<next_cursor>            the following page
+  ?draw=3&start=0&length=100&...             DataTables server-side envelope
+
+Pages are read by keyset: the statement is ordered by the sort column and
+the table's key, and the next page starts after the last row of this
+one (`cursor` encodes that row's sort value and key). Each endpoint
+offers only sort columns that lead an index, so a page costs an index
+range read of `limit` rows whatever its depth. DataTables jumps to
+arbitrary pages by `start`; without a cursor that falls back to OFFSET.
+
+Counts are capped at PAGE_COUNT_LIMIT rows (`total_exact` tells whether
+the cap was hit), so they stay bounded too.
+"""
+
+import base64
+import datetime
+import enum
+import json
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+from fastapi import HTTPException, Query, Request
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+
+@dataclass
+class PageParams:
+    limit:  int | None
+    cursor: str | None
+    sort:   str | None
+    search: str | None
+    # DataTables server-side processing
+    draw:   int | None
+    start:  int
+
+    @property
+    def paged(self) -> bool:
+        return self.limit is not None or self.cursor is not None or self.draw is not None
+
+
+def page_params(
+    request: Request,
+    limit: int | None = Query(None, ge=1, description="Page size (enables pagination)"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    sort: str | None = Query(None, description="Sort column; prefix with '-' for descending"),
+    q: str | None = Query(None, description="Prefix search"),
+    draw: int | None = Query(None, description="DataTables draw counter"),
+    start: int = Query(0, ge=0, description="DataTables row offset"),
+    length: int | None = Query(None, description="DataTables page length (-1 = all)"),
+) -> PageParams:
+    """FastAPI dependency: paging parameters, native or DataTables-style."""
+    qp = request.query_params
+    if draw is not None:
+        if limit is None:
+            limit = settings.page_max_limit if length is None or length < 0 else max(1, length)
+        if q is None:
+            q = qp.get("search[value]")
+        if sort is None and (col := qp.get("order[0][column]")) is not None:
+            name = qp.get(f"columns[{col}][name]") or qp.get(f"columns[{col}][data]")
+            if name:
+                sort = ("-" if qp.get("order[0][dir]") == "desc" else "") + name
+    elif limit is None and cursor is not None:
+        limit = settings.page_default_limit
+    if limit is not None:
+        limit = min(limit, settings.page_max_limit)
+    return PageParams(limit, cursor, sort, q.strip() if q and q.strip() else None, draw, start)
+
+
+class PageResult(NamedTuple):
+    items:          list
+    next_cursor:    str | None
+    total:          int     # rows before the search filter, capped
+    total_filtered: int     # rows after it, capped
+    total_exact:    bool
+
+
+def prefix_match(column, value: str):
+    """Index-friendly `column LIKE 'value%'`, with LIKE wildcards escaped."""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.like(escaped + "%", escape="\\")
+
+
+def _dump(value):
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"b": value.hex()}
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.datetime.fromisoformat(value["dt"])
+        if "b" in value:
+            return bytes.fromhex(value["b"])
+    return value
+
+
+def encode_cursor(sort: str, value, key) -> str:
+    raw = json.dumps([sort, _dump(value), _dump(key)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# what a cursor's value and key may decode to
+_CURSOR_TYPES = (str, int, float, bool, type(None), datetime.datetime, bytes)
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        fields = json.loads(raw)
+        if not isinstance(fields, list) or len(fields) != 3:
+            raise ValueError("not a [sort, value, key] list")
+        name, value, key = fields[0], _load(fields[1]), _load(fields[2])
+        if not isinstance(value, _CURSOR_TYPES) or not isinstance(key, _CURSOR_TYPES):
+            raise ValueError("not a scalar value / key")
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+    if name != sort:
+        raise HTTPException(400, "Cursor belongs to a different sort order")
+    return value, key
+
+
+async def _capped_count(db: AsyncSession, stmt) -> int:
+    capped = stmt.with_only_columns(stmt.selected_columns[0]).order_by(None).limit(settings.page_count_limit)
+    return await db.scalar(select(func.count()).select_from(capped.subquery()))
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt,
+    params: PageParams,
+    *,
+    key,
+    sorts: dict,
+    default: str,
+    search: Callable | None = None,
+) -> PageResult:
+    """
+    One page of `stmt` (a select of a single ORM entity) per `params`.
+
+    `key` is the entity's unique key column, `sorts` maps sort names to
+    the (indexed) attributes they order by, `default` is the sort used
+    when none is given ("-name" for descending), and `search(q)` builds
+    the filter for a prefix search, if the listing has one.
+    """
+    sort = params.sort or default
+    desc = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in sorts:
+        raise HTTPException(400, f"Cannot sort by {name!r}; choose from {', '.join(sorts)}")
+    column = sorts[name]
+
+    total = await _capped_count(db, stmt)
+    if params.search and search is not None:
+        stmt = stmt.where(search(params.search))
+        total_filtered = await _capped_count(db, stmt)
+    else:
+        total_filtered = total
+
+    if params.cursor:
+        value, last = decode_cursor(params.cursor, sort)
+        if column is key:
+            stmt = stmt.where(key < last if desc else key > last)
+        elif desc:
+            stmt = stmt.where(column <= value, or_(column < value, and_(column == value, key < last)))
+        else:
+            stmt = stmt.where(column >= value, or_(column > value, and_(column == value, key > last)))
+    elif params.start:
+        stmt = stmt.offset(params.start)
+
+    order = (column.desc(), key.desc()) if desc else (column.asc(), key.asc())
+    if column is key:
+        order = order[:1]
+    rows = (await db.execute(stmt.order_by(*order).limit(params.limit + 1))).scalars().all()
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        tail = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(tail, column.key), getattr(tail, key.key))
+    return PageResult(
+        rows, next_cursor, total, total_filtered,
+        total_exact=total_filtered < settings.page_count_limit,
+    )
+
+
+def page_response(params: PageParams, page: PageResult, items: list) -> dict:
+    """Envelope for `items` (page.items, converted): DataTables' when it asked."""
+    if params.draw is not None:
+        return {
+            "draw":            params.draw,
+            "recordsTotal":    page.total,
+            "recordsFiltered": page.total_filtered,
+            "data":            items,
+            "next_cursor":     page.next_cursor,
+        }
+    return {
+        "items":       items,
+        "next_cursor": page.next_cursor,
+        "total":       page.total_filtered,
+        "total_exact": page.total_exact,
+    }
@@ -1,8 +1,9 @@
 # app/utils/security.py
 
 from datetime import datetime, timedelta
+import hmac
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from passlib.context import CryptContext
@@ -10,7 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Admin, RoleEnum
 
 # Password hashing
@@ -63,13 +64,8 @@ async def get_token(
 
 
 # Load the Admin ORM instance
-async def get_current_user(
-    token: str = Depends(get_token),
-    db: AsyncSession = Depends(get_db)
-) -> Admin:
-    """
-    Decode JWT, fetch the Admin from DB, and return it.
-    """
+async def _load_user(token: str, db: AsyncSession) -> Admin:
+    """Decode JWT and fetch the Admin it names from `db`."""
     payload = decode_access_token(token)
     user_id = payload.get("sub")
     if user_id is None:
@@ -90,6 +86,28 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    token: str = Depends(get_token),
+    db: AsyncSession = Depends(get_read_db)
+) -> Admin:
+    """
+    The authenticated Admin, read through the read-only session, so read
+    handlers share it with their auth check.
+    """
+    return await _load_user(token, db)
+
+
+async def get_current_user_primary(
+    token: str = Depends(get_token),
+    db: AsyncSession = Depends(get_db)
+) -> Admin:
+    """
+    The authenticated Admin, read from the primary: a replica may still
+    hold an account that was just deleted or demoted.
+    """
+    return await _load_user(token, db)
+
+
 # Dependency: any authenticated user (viewer or admin)
 async def require_viewer_or_admin(
     user: Admin = Depends(get_current_user)
@@ -97,10 +115,7 @@ async def require_viewer_or_admin(
     return user
 
 
-# Dependency: only allow role="admin"
-async def require_admin(
-    user: Admin = Depends(get_current_user)
-) -> Admin:
+def _check_admin(user: Admin) -> Admin:
     if user.role.value != RoleEnum.admin.value:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -109,9 +124,23 @@ async def require_admin(
     return user
 
 
+# Dependency: only allow role="admin"
+async def require_admin(
+    user: Admin = Depends(get_current_user)
+) -> Admin:
+    return _check_admin(user)
+
+
+# Dependency: role="admin" on routes that write; checked on the primary
+async def require_admin_write(
+    user: Admin = Depends(get_current_user_primary)
+) -> Admin:
+    return _check_admin(user)
+
+
 # New dependency: returns the Admin ORM for full access (including .username)
 async def get_current_admin(
-    user: Admin = Depends(require_admin),
+    user: Admin = Depends(require_admin_write),
     db: AsyncSession = Depends(get_db)
 ) -> Admin:
     """
@@ -125,3 +154,41 @@ async def get_current_admin(
             detail="Admin user not found",
         )
     return admin
+
+
+# Dependency: remote scan agents, authenticated by a shared token
+async def require_agent(
+    x_agent_token: str | None = Header(None),
+) -> None:
+    tokens = [t.strip() for t in settings.agent_tokens.split(",") if t.strip()]
+    if not tokens:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Agent API disabled",
+        )
+    if not x_agent_token or not any(
+        hmac.compare_digest(x_agent_token.encode(), t.encode()) for t in tokens
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid agent token",
+        )
+
+
+# Dependency: Prometheus scraping /metrics with a bearer token
+async def require_metrics_token(
+    authorization: str | None = Header(None),
+) -> None:
+    if not settings.metrics_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Metrics endpoint disabled",
+        )
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), settings.metrics_token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+        )
@@ -0,0 +1,30 @@
+"""add owner and heartbeat to scan_checkpoints
+
+Revision ID: 3c7e1a9d4b26
+Revises: 5f0b9e2c7a14
+Create Date: 2025-06-18 09:41:12.517804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e1a9d4b26'
+down_revision: Union[str, None] = '5f0b9e2c7a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('scan_checkpoints', sa.Column('owner', sa.String(length=100), nullable=True))
+    op.add_column('scan_checkpoints', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('scan_checkpoints', 'heartbeat_at')
+    op.drop_column('scan_checkpoints', 'owner')
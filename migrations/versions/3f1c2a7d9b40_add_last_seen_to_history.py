@@ -0,0 +1,31 @@
+"""add last_seen to history (transition-only intervals)
+
+Revision ID: 3f1c2a7d9b40
+Revises: e453ebaaa3d0
+Create Date: 2025-05-22 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b40'
+down_revision: Union[str, None] = 'e453ebaaa3d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # scan_time becomes the start of an interval; last_seen is its end.
+    # Existing per-scan rows are zero-length intervals (last_seen = scan_time).
+    op.add_column('history', sa.Column('last_seen', sa.DateTime(), nullable=True))
+    op.execute("UPDATE history SET last_seen = scan_time WHERE last_seen IS NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('history', 'last_seen')
@@ -0,0 +1,36 @@
+"""add scan_checkpoints for resumable sweeps
+
+Revision ID: 4a9d3e61c0b8
+Revises: b71d0e5c2f86
+Create Date: 2025-06-02 09:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9d3e61c0b8'
+down_revision: Union[str, None] = 'b71d0e5c2f86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'scan_checkpoints',
+        sa.Column('cidr', sa.String(length=50), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('chunks_done', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('cidr'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('scan_checkpoints')
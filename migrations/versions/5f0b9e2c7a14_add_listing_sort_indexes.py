@@ -0,0 +1,31 @@
+"""add indexes behind the paginated users and devices listings
+
+Revision ID: 5f0b9e2c7a14
+Revises: a8c3f51e6d27
+Create Date: 2025-06-16 14:05:33.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f0b9e2c7a14'
+down_revision: Union[str, None] = 'a8c3f51e6d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_username', 'users', ['username'])
+    op.create_index('ix_devices_account_name', 'devices', ['account_name'])
+    op.create_index('ix_devices_hostname', 'devices', ['hostname'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_devices_hostname', table_name='devices')
+    op.drop_index('ix_devices_account_name', table_name='devices')
+    op.drop_index('ix_users_username', table_name='users')
@@ -0,0 +1,28 @@
+"""add ip_ranges.max_pps per-range probe rate cap
+
+Revision ID: 6e1f08b3a5d2
+Revises: 4a9d3e61c0b8
+Create Date: 2025-06-04 15:27:03.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1f08b3a5d2'
+down_revision: Union[str, None] = '4a9d3e61c0b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ip_ranges', sa.Column('max_pps', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ip_ranges', 'max_pps')
@@ -0,0 +1,32 @@
+"""make history.last_seen non-null and index it
+
+Revision ID: 7b2f4d8e1c63
+Revises: 3c7e1a9d4b26
+Create Date: 2025-06-18 16:22:47.305119
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2f4d8e1c63'
+down_revision: Union[str, None] = '3c7e1a9d4b26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # legacy per-scan rows: a single observation ends where it starts
+    op.execute("UPDATE history SET last_seen = scan_time WHERE last_seen IS NULL")
+    op.alter_column('history', 'last_seen', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_history_last_seen', 'history', ['last_seen'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_history_last_seen', table_name='history')
+    op.alter_column('history', 'last_seen', existing_type=sa.DateTime(), nullable=True)
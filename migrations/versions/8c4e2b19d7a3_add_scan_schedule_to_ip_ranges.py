@@ -0,0 +1,38 @@
+"""add scan schedule to ip_ranges
+
+Revision ID: 8c4e2b19d7a3
+Revises: 3f1c2a7d9b40
+Create Date: 2025-05-26 14:03:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2b19d7a3'
+down_revision: Union[str, None] = '3f1c2a7d9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ip_ranges', sa.Column('scan_interval', sa.Integer(), nullable=True))
+    op.add_column('ip_ranges', sa.Column('scan_priority', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('ip_ranges', sa.Column('last_run_at', sa.DateTime(), nullable=True))
+    op.add_column('ip_ranges', sa.Column('last_finished_at', sa.DateTime(), nullable=True))
+    op.add_column('ip_ranges', sa.Column('next_run_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_ip_ranges_next_run_at', 'ip_ranges', ['next_run_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ip_ranges_next_run_at', table_name='ip_ranges')
+    op.drop_column('ip_ranges', 'next_run_at')
+    op.drop_column('ip_ranges', 'last_finished_at')
+    op.drop_column('ip_ranges', 'last_run_at')
+    op.drop_column('ip_ranges', 'scan_priority')
+    op.drop_column('ip_ranges', 'scan_interval')
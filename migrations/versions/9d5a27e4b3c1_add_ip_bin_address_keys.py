@@ -0,0 +1,64 @@
+"""add ip_bin binary address keys to ips, live_monitor and history
+
+Revision ID: 9d5a27e4b3c1
+Revises: f2d84c6a1e57
+Create Date: 2025-06-12 10:22:51.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d5a27e4b3c1'
+down_revision: Union[str, None] = 'f2d84c6a1e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, address column, has an integer id to walk)
+TABLES = (
+    ('ips', 'ip_address', True),
+    ('live_monitor', 'ip', False),
+    ('history', 'ip', True),
+)
+
+# 16-byte key, IPv4 stored IPv4-mapped (see app/utils/netaddr.py);
+# NULL for anything that isn't an address
+KEY_SQL = (
+    "IF(IS_IPV4({col}), "
+    "CONCAT(UNHEX('00000000000000000000FFFF'), INET6_ATON({col})), "
+    "INET6_ATON({col}))"
+)
+
+BACKFILL_BATCH = 50000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for table, col, has_id in TABLES:
+        op.add_column(table, sa.Column('ip_bin', sa.VARBINARY(length=16), nullable=True))
+
+        key = KEY_SQL.format(col=col)
+        if not has_id:
+            bind.execute(sa.text(f"UPDATE {table} SET ip_bin = {key}"))
+        else:
+            # walk the id space so no single statement locks the whole table
+            lo, hi = bind.execute(sa.text(f"SELECT MIN(id), MAX(id) FROM {table}")).one()
+            while lo is not None and lo <= hi:
+                bind.execute(
+                    sa.text(f"UPDATE {table} SET ip_bin = {key} WHERE id >= :lo AND id < :hi"),
+                    {"lo": lo, "hi": lo + BACKFILL_BATCH},
+                )
+                lo += BACKFILL_BATCH
+
+        op.create_index(f'ix_{table}_ip_bin', table, ['ip_bin'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, _col, _has_id in reversed(TABLES):
+        op.drop_index(f'ix_{table}_ip_bin', table_name=table)
+        op.drop_column(table, 'ip_bin')
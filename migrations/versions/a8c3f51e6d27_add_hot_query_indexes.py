@@ -0,0 +1,35 @@
+"""add indexes for history, ips and live_monitor hot queries
+
+Revision ID: a8c3f51e6d27
+Revises: 9d5a27e4b3c1
+Create Date: 2025-06-13 09:41:07.218554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c3f51e6d27'
+down_revision: Union[str, None] = '9d5a27e4b3c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_history_ip_scan_time', 'history', ['ip', 'scan_time'])
+    op.create_index('ix_history_scan_time', 'history', ['scan_time'])
+    # e453ebaaa3d0 dropped the unique `ip_address` index; the lookup
+    # still needs one, non-unique since an address may have several owners
+    op.create_index('ix_ips_ip_address', 'ips', ['ip_address'])
+    op.create_index('ix_live_monitor_status', 'live_monitor', ['status'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_live_monitor_status', table_name='live_monitor')
+    op.drop_index('ix_ips_ip_address', table_name='ips')
+    op.drop_index('ix_history_scan_time', table_name='history')
+    op.drop_index('ix_history_ip_scan_time', table_name='history')
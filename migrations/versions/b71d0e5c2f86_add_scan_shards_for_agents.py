@@ -0,0 +1,48 @@
+"""add scan_shards and ip_ranges.agent_site for remote scan agents
+
+Revision ID: b71d0e5c2f86
+Revises: 8c4e2b19d7a3
+Create Date: 2025-05-29 10:41:07.553120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d0e5c2f86'
+down_revision: Union[str, None] = '8c4e2b19d7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ip_ranges', sa.Column('agent_site', sa.String(length=50), nullable=True))
+    op.create_table(
+        'scan_shards',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('range_cidr', sa.String(length=50), nullable=False),
+        sa.Column('cidr', sa.String(length=50), nullable=False),
+        sa.Column('site', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('lease_owner', sa.String(length=100), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_scan_shards_range_cidr', 'scan_shards', ['range_cidr'])
+    op.create_index('ix_scan_shards_queue', 'scan_shards', ['site', 'status', 'lease_expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scan_shards_queue', table_name='scan_shards')
+    op.drop_index('ix_scan_shards_range_cidr', table_name='scan_shards')
+    op.drop_table('scan_shards')
+    op.drop_column('ip_ranges', 'agent_site')
@@ -0,0 +1,48 @@
+"""add scan_runs for per-phase sweep timings
+
+Revision ID: c3b7f2a90e41
+Revises: 6e1f08b3a5d2
+Create Date: 2025-06-06 11:05:38.641027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3b7f2a90e41'
+down_revision: Union[str, None] = '6e1f08b3a5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PHASES = ('total', 'probe', 'recheck', 'mac', 'fallback', 'owners', 'dns', 'persist')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'scan_runs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('cidr', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=False),
+        sa.Column('hosts_total', sa.Integer(), nullable=False),
+        sa.Column('hosts_probed', sa.Integer(), nullable=False),
+        sa.Column('hosts_up', sa.Integer(), nullable=False),
+        sa.Column('rows_written', sa.Integer(), nullable=False),
+        sa.Column('dns_lookups', sa.Integer(), nullable=False),
+        sa.Column('dns_unresolved', sa.Integer(), nullable=False),
+        *(sa.Column(f'seconds_{p}', sa.Float(), nullable=False) for p in PHASES),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_scan_runs_cidr_started', 'scan_runs', ['cidr', 'started_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scan_runs_cidr_started', table_name='scan_runs')
+    op.drop_table('scan_runs')
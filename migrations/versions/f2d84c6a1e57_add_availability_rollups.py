@@ -0,0 +1,56 @@
+"""add ip_availability and range_availability rollups
+
+Revision ID: f2d84c6a1e57
+Revises: c3b7f2a90e41
+Create Date: 2025-06-09 14:48:12.207751
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d84c6a1e57'
+down_revision: Union[str, None] = 'c3b7f2a90e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ip_availability',
+        sa.Column('ip', sa.String(length=45), nullable=False),
+        sa.Column('period', sa.String(length=5), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.Column('up_samples', sa.Integer(), nullable=False),
+        sa.Column('first_up', sa.DateTime(), nullable=True),
+        sa.Column('last_up', sa.DateTime(), nullable=True),
+        sa.Column('macs', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('ip', 'period', 'bucket'),
+    )
+    op.create_table(
+        'range_availability',
+        sa.Column('cidr', sa.String(length=50), nullable=False),
+        sa.Column('period', sa.String(length=5), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.Column('up_samples', sa.Integer(), nullable=False),
+        sa.Column('up_hosts', sa.Integer(), nullable=False),
+        sa.Column('first_up', sa.DateTime(), nullable=True),
+        sa.Column('last_up', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('cidr', 'period', 'bucket'),
+    )
+    op.create_index('ix_ip_availability_period_bucket', 'ip_availability', ['period', 'bucket'])
+    op.create_index('ix_range_availability_period_bucket', 'range_availability', ['period', 'bucket'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_range_availability_period_bucket', table_name='range_availability')
+    op.drop_index('ix_ip_availability_period_bucket', table_name='ip_availability')
+    op.drop_table('range_availability')
+    op.drop_table('ip_availability')
@@ -0,0 +1,101 @@
+# scripts/bench_scanner.py
+"""
+Scanner throughput benchmark against the simulated network.
+
+Runs the scanner's stages (probe sweep with re-check and fallback,
+reverse DNS through ReverseResolver, row building with vendor lookups)
+for /24 up to /16 ranges on a deterministic SimulatedNetwork and prints
+hosts/sec and per-phase timings. No database or real network is touched.
+
+    python -m scripts.bench_scanner --prefixes 24 22 20 18 16 --time-scale 0.01
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import time
+
+from app.services.probes import probe_hosts
+from app.services.resolver import ReverseResolver
+from app.services.scanner import build_rows
+from app.services.simnet import SimulatedNetwork
+
+
+async def bench_range(cidr: str, args) -> dict:
+    sim   = SimulatedNetwork(
+        up_ratio=args.up_ratio,
+        loss=args.loss,
+        seed=args.seed,
+        time_scale=args.time_scale,
+    )
+    hosts = [str(h) for h in ipaddress.ip_network(cidr).hosts()]
+    timings: dict[str, float] = {}
+
+    start = time.perf_counter()
+    results = await probe_hosts(
+        hosts,
+        sim.backend(timeout=args.timeout, batch_size=args.batch_size),
+        # a second, slower pass over silent hosts stands in for nmap
+        fallback=sim.backend(timeout=args.timeout * 2, batch_size=args.batch_size),
+        macs=sim.backend(),
+    )
+    timings["probing"] = time.perf_counter() - start
+
+    resolver = ReverseResolver(
+        ttl=3600, negative_ttl=300,
+        timeout=args.dns_timeout * args.time_scale,
+        concurrency=args.dns_concurrency,
+        getnameinfo=sim.getnameinfo,
+    )
+    start = time.perf_counter()
+    up = [ip for ip, rec in results.items() if rec["status"] == "Up"]
+    for ip, name in (await resolver.resolve_many(up)).items():
+        if name:
+            results[ip]["hostname"] = name
+    timings["dns"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = build_rows(results, datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+    timings["rows"] = time.perf_counter() - start
+
+    expected = sim.expected_up(hosts)
+    return {
+        "cidr":    cidr,
+        "hosts":   len(hosts),
+        "up":      len(up),
+        "missed":  len(expected - set(up)),
+        "rows":    len(rows),
+        "timings": timings,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--prefixes", type=int, nargs="+", default=[24, 22, 20, 18, 16])
+    ap.add_argument("--base", default="10.0.0.0")
+    ap.add_argument("--up-ratio", type=float, default=0.3)
+    ap.add_argument("--loss", type=float, default=0.02)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--time-scale", type=float, default=0.01,
+                    help="multiplier on every simulated delay (1.0 = real time)")
+    ap.add_argument("--timeout", type=float, default=1.0)
+    ap.add_argument("--batch-size", type=int, default=256)
+    ap.add_argument("--dns-timeout", type=float, default=2.0)
+    ap.add_argument("--dns-concurrency", type=int, default=32)
+    args = ap.parse_args()
+
+    print(f"{'range':<18} {'hosts':>7} {'up':>6} {'missed':>6}"
+          f" {'probe s':>8} {'dns s':>7} {'rows s':>7} {'hosts/s':>9}")
+    for prefix in args.prefixes:
+        cidr = str(ipaddress.ip_network(f"{args.base}/{prefix}", strict=False))
+        r = asyncio.run(bench_range(cidr, args))
+        t = r["timings"]
+        total = sum(t.values())
+        print(f"{r['cidr']:<18} {r['hosts']:>7} {r['up']:>6} {r['missed']:>6}"
+              f" {t['probing']:>8.2f} {t['dns']:>7.2f} {t['rows']:>7.2f}"
+              f" {r['hosts'] / total:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
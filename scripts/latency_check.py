@@ -0,0 +1,107 @@
+# scripts/latency_check.py
+"""
+Check that a running scan does not slow down the API.
+
+Measures GET /api/live/ latency while idle, starts a scan of CIDR, measures
+again until the scan job finishes, and prints p50/p99 for both. Exits 1
+if the p99 under scan is more than --max-ratio times the idle p99.
+
+    python -m scripts.latency_check --base http://localhost:8000 \
+        --user admin --password 'P@ssw0rd' --cidr 10.0.0.0/22
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+
+class Client:
+    def __init__(self, base: str):
+        self.base  = base.rstrip("/")
+        self.token = None
+
+    def request(self, method: str, path: str, body=None, form=None) -> dict | list:
+        headers = {}
+        data = None
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        req = urllib.request.Request(self.base + path, data=data, headers=headers, method=method)
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return json.loads(resp.read() or b"null")
+
+    def login(self, username: str, password: str) -> None:
+        res = self.request("POST", "/auth/login", form={"username": username, "password": password})
+        self.token = res["access_token"]
+
+
+def sample(client: Client, until, interval: float) -> list[float]:
+    """Time GET /api/live/ repeatedly (ms) until `until(times)` is true."""
+    times: list[float] = []
+    while not until(times):
+        start = time.perf_counter()
+        client.request("GET", "/api/live/")
+        times.append((time.perf_counter() - start) * 1000.0)
+        time.sleep(interval)
+    return times
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--base", default="http://localhost:8000")
+    ap.add_argument("--user", default="admin")
+    ap.add_argument("--password", required=True)
+    ap.add_argument("--cidr", required=True, help="range to scan, e.g. a /22")
+    ap.add_argument("--baseline-requests", type=int, default=100)
+    ap.add_argument("--interval", type=float, default=0.05)
+    ap.add_argument("--max-ratio", type=float, default=2.0)
+    args = ap.parse_args()
+
+    client = Client(args.base)
+    client.login(args.user, args.password)
+
+    n = args.baseline_requests
+    idle = sample(client, lambda times: len(times) >= n, args.interval)
+
+    job_id = client.request("POST", "/api/live/scan", body={"nets": [args.cidr]})["job_id"]
+    state = {"checked": 0.0, "done": False}
+
+    def scan_finished(_times) -> bool:
+        # poll the job at most once a second
+        if time.monotonic() - state["checked"] >= 1.0:
+            state["checked"] = time.monotonic()
+            job = client.request("GET", f"/api/live/scan/{job_id}")
+            state["done"] = job["status"] not in ("queued", "running")
+        return state["done"]
+
+    busy = sample(client, scan_finished, args.interval)
+
+    for label, times in (("idle", idle), ("scanning", busy)):
+        print(f"{label:>8}: n={len(times):4d}  p50={percentile(times, 50):7.1f} ms"
+              f"  p99={percentile(times, 99):7.1f} ms")
+
+    if not busy:
+        print("scan finished before any request was sampled")
+        return 0
+    ratio = percentile(busy, 99) / max(percentile(idle, 99), 0.001)
+    print(f"p99 ratio: {ratio:.2f} (limit {args.max_ratio})")
+    return 0 if ratio <= args.max_ratio else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())